@@ -1,3 +1,47 @@
+"""
+Configuración del admin de Django para los modelos de la API
+"""
 from django.contrib import admin
+from .models import AjustePrecio, ArchivoMovimientos, ReporteJob, ResultadoReporte, ResumenMovimiento
 
-# Register your models here.
+
+@admin.register(ReporteJob)
+class ReporteJobAdmin(admin.ModelAdmin):
+    list_display = ['id', 'tipo', 'estado', 'intentos', 'fecha_creacion', 'fecha_fin']
+    list_filter = ['tipo', 'estado']
+    readonly_fields = ['clave', 'resultado', 'error', 'fecha_creacion', 'fecha_inicio', 'fecha_fin']
+    ordering = ['-fecha_creacion']
+
+
+@admin.register(ResultadoReporte)
+class ResultadoReporteAdmin(admin.ModelAdmin):
+    list_display = ['tipo', 'parametros', 'fecha_calculo']
+    list_filter = ['tipo']
+    readonly_fields = ['clave', 'tipo', 'parametros', 'resultado', 'fecha_calculo']
+    ordering = ['-fecha_calculo']
+
+
+@admin.register(AjustePrecio)
+class AjustePrecioAdmin(admin.ModelAdmin):
+    list_display = ['id', 'modo', 'valor', 'redondeo', 'productos_afectados', 'fecha']
+    list_filter = ['modo']
+    readonly_fields = [
+        'modo', 'valor', 'redondeo', 'filtros', 'productos_afectados',
+        'total_antes', 'total_despues', 'fecha'
+    ]
+    ordering = ['-fecha']
+
+
+@admin.register(ResumenMovimiento)
+class ResumenMovimientoAdmin(admin.ModelAdmin):
+    list_display = ['mes', 'producto_id', 'tipo', 'movimientos', 'cantidad']
+    list_filter = ['tipo', 'mes']
+    search_fields = ['producto_id']
+    ordering = ['-mes', 'producto_id']
+
+
+@admin.register(ArchivoMovimientos)
+class ArchivoMovimientosAdmin(admin.ModelAdmin):
+    list_display = ['ruta', 'mes', 'filas', 'tamano_bytes', 'fecha_creacion']
+    readonly_fields = ['mes', 'ruta', 'filas', 'tamano_bytes', 'sha256', 'fecha_creacion']
+    ordering = ['-mes']
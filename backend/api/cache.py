@@ -0,0 +1,290 @@
+"""
+Cachés en memoria del proceso (una copia por worker de Gunicorn)
+
+Cada caché es una LRU acotada que declara de qué registros depende cada
+entrada ((tabla, id)). Las escrituras llaman a `invalidar_al_confirmar`
+con la tabla y los ids modificados, y se eliminan solo las entradas que
+dependen de ellos, después del COMMIT.
+
+Los demás workers se enteran por el canal `inventrix_cache` de PostgreSQL:
+la escritura publica un NOTIFY dentro de su transacción (Postgres lo entrega
+al hacer COMMIT y lo descarta con ROLLBACK) y cada worker de Gunicorn tiene
+un thread con LISTEN (EscuchaInvalidaciones, iniciado desde
+gunicorn.conf.py) que invalida sus entradas locales. El TTL queda como red
+de seguridad para cambios hechos fuera de la API.
+"""
+import logging
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from contextlib import contextmanager
+
+import orjson
+import psycopg
+from django.conf import settings
+from django.db import connection, transaction
+
+from .eventos import parametros_conexion
+from .metrics import CACHE_INVALIDACIONES_TOTAL, registrar_cache
+
+logger = logging.getLogger(__name__)
+
+
+CANAL = 'inventrix_cache'
+
+# Un NOTIFY admite menos de 8000 bytes: con más ids se invalida la tabla completa
+MAX_IDS_NOTIFICACION = 500
+
+# Identifica los mensajes de este proceso (ya invalidados localmente); el pid
+# distingue a los workers aunque la aplicación se cargue antes del fork
+_INSTANCIA = uuid.uuid4().hex[:8]
+
+
+def _origen():
+    return f'{os.getpid()}-{_INSTANCIA}'
+
+
+# nombre: CacheLRU
+_caches = {}
+
+
+class CacheLRU:
+    """
+    LRU con TTL, segura entre threads (los workers WSGI usan 2)
+
+    Args:
+        nombre: Nombre de la caché (etiqueta `cache` de las métricas)
+        max_entradas: Entradas máximas; al superarlas se descarta la menos usada
+        ttl: Segundos de validez de cada entrada (None: sin vencimiento)
+        dependencias: Función valor -> iterable de (tabla, id) de los que
+            depende la entrada
+    """
+
+    def __init__(self, nombre, max_entradas=1000, ttl=None, dependencias=None):
+        self.nombre = nombre
+        self.max_entradas = max_entradas
+        self.ttl = ttl
+        self._dependencias = dependencias or (lambda valor: ())
+        self._entradas = OrderedDict()  # clave: (vence, valor, dependencias)
+        self._por_registro = {}  # (tabla, id): set de claves
+        # Aumenta con cada invalidación: un valor calculado antes de una
+        # invalidación puede estar desactualizado y no se guarda
+        self._generacion = 0
+        self._lock = threading.Lock()
+        _caches[nombre] = self
+
+    def __len__(self):
+        return len(self._entradas)
+
+    def _quitar(self, clave):
+        _, _, dependencias = self._entradas.pop(clave)
+        for registro in dependencias:
+            claves = self._por_registro.get(registro)
+            if claves is not None:
+                claves.discard(clave)
+                if not claves:
+                    del self._por_registro[registro]
+
+    def obtener(self, clave, calcular):
+        """
+        Valor de `clave`; si no está o venció se obtiene con `calcular()`
+
+        Si `calcular` retorna None no se guarda (no se cachean ausencias).
+        """
+        ahora = time.monotonic()
+        with self._lock:
+            entrada = self._entradas.get(clave)
+            if entrada is not None and (entrada[0] is None or entrada[0] > ahora):
+                self._entradas.move_to_end(clave)
+                registrar_cache(self.nombre, True)
+                return entrada[1]
+            generacion = self._generacion
+
+        registrar_cache(self.nombre, False)
+        valor = calcular()
+        if valor is not None:
+            self.guardar(clave, valor, generacion)
+        return valor
+
+    def guardar(self, clave, valor, generacion=None):
+        vence = time.monotonic() + self.ttl if self.ttl else None
+        dependencias = tuple(self._dependencias(valor))
+        with self._lock:
+            if generacion is not None and generacion != self._generacion:
+                return
+            if clave in self._entradas:
+                self._quitar(clave)
+            self._entradas[clave] = (vence, valor, dependencias)
+            for registro in dependencias:
+                self._por_registro.setdefault(registro, set()).add(clave)
+            while len(self._entradas) > self.max_entradas:
+                self._quitar(next(iter(self._entradas)))
+
+    def invalidar(self, tabla, ids=None):
+        """Elimina las entradas que dependen de esos ids de `tabla` (todas las de la tabla si ids es None)"""
+        with self._lock:
+            self._generacion += 1
+            if ids is None:
+                claves = {
+                    clave for (t, _), claves in self._por_registro.items() if t == tabla for clave in claves
+                }
+            else:
+                claves = set()
+                for id_registro in ids:
+                    claves.update(self._por_registro.get((tabla, id_registro), ()))
+            for clave in claves:
+                self._quitar(clave)
+            return len(claves)
+
+    def limpiar(self):
+        with self._lock:
+            self._generacion += 1
+            self._entradas.clear()
+            self._por_registro.clear()
+
+
+def invalidar(tabla, ids=None):
+    """Invalida en todas las cachés del proceso las entradas que dependen de esos registros"""
+    return sum(cache.invalidar(tabla, ids) for cache in list(_caches.values()))
+
+
+def limpiar():
+    """Vacía todas las cachés del proceso"""
+    for cache in list(_caches.values()):
+        cache.limpiar()
+
+
+def publicar(tabla, ids=None):
+    """
+    Publica la invalidación para los demás procesos
+
+    Se ejecuta en la transacción actual: el NOTIFY sale con el COMMIT.
+    """
+    if ids is not None and len(ids) > MAX_IDS_NOTIFICACION:
+        ids = None
+    mensaje = orjson.dumps({'origen': _origen(), 'tabla': tabla, 'ids': ids}).decode()
+    with connection.cursor() as cursor:
+        cursor.execute('SELECT pg_notify(%s, %s)', [CANAL, mensaje])
+
+
+def invalidar_al_confirmar(tabla, ids=None):
+    """
+    Invalida después del COMMIT de la transacción actual (o de inmediato si
+    no hay una): antes, otra petición podría volver a cachear el valor viejo
+
+    La invalidación se publica también a los demás workers (ver `publicar`).
+    """
+    ids = None if ids is None else list(ids)
+    publicar(tabla, ids)
+    transaction.on_commit(lambda: _invalidar_local(tabla, ids))
+
+
+def _invalidar_local(tabla, ids):
+    CACHE_INVALIDACIONES_TOTAL.labels(origen='local').inc()
+    invalidar(tabla, ids)
+
+
+# ============================================================================
+# CÁLCULO ÚNICO POR CLAVE (single-flight)
+# ============================================================================
+
+class CalculoUnico:
+    """
+    Un lock por clave: los threads del proceso que piden la misma clave a la
+    vez esperan al primero en lugar de repetir el cálculo
+
+    Los locks se crean al pedirlos y se descartan cuando ningún thread los usa.
+    """
+
+    def __init__(self):
+        self._locks = {}  # clave: [lock, threads que lo usan o esperan]
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def bloqueo(self, clave, timeout=-1):
+        """Context manager que retorna True si obtuvo el lock, False si venció `timeout`"""
+        with self._lock:
+            entrada = self._locks.setdefault(clave, [threading.Lock(), 0])
+            entrada[1] += 1
+        adquirido = entrada[0].acquire(timeout=timeout)
+        try:
+            yield adquirido
+        finally:
+            if adquirido:
+                entrada[0].release()
+            with self._lock:
+                entrada[1] -= 1
+                if not entrada[1]:
+                    del self._locks[clave]
+
+
+# ============================================================================
+# INVALIDACIÓN ENTRE WORKERS (LISTEN/NOTIFY)
+# ============================================================================
+
+class EscuchaInvalidaciones:
+    """Thread del proceso con LISTEN en `inventrix_cache` que invalida las cachés locales"""
+
+    ESPERA_MAXIMA = 30
+
+    def __init__(self):
+        self._thread = None
+
+    def iniciar(self):
+        """Inicia el thread si no está corriendo (una vez por worker)"""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._thread = threading.Thread(target=self._escuchar, name='escucha-cache', daemon=True)
+        self._thread.start()
+
+    def _recibir(self, payload):
+        try:
+            mensaje = orjson.loads(payload)
+            origen, tabla, ids = mensaje['origen'], mensaje['tabla'], mensaje['ids']
+        except (orjson.JSONDecodeError, KeyError, TypeError):
+            logger.warning(f'Notificación inválida en {CANAL}: {payload[:200]}')
+            return
+        if origen == _origen():
+            return
+        CACHE_INVALIDACIONES_TOTAL.labels(origen='remota').inc()
+        invalidar(tabla, ids)
+
+    def _escuchar(self):
+        """Mantiene el LISTEN reconectando con espera exponencial"""
+        espera = 1
+        while True:
+            try:
+                with psycopg.connect(**parametros_conexion(), autocommit=True) as conexion:
+                    conexion.execute(f'LISTEN {CANAL}')
+                    # Las invalidaciones publicadas sin LISTEN activo se perdieron
+                    # (o es el arranque): lo cacheado hasta ahora no es confiable
+                    CACHE_INVALIDACIONES_TOTAL.labels(origen='reconexion').inc()
+                    limpiar()
+                    espera = 1
+                    for notificacion in conexion.notifies():
+                        self._recibir(notificacion.payload)
+            except psycopg.Error as e:
+                logger.warning(f'Conexión LISTEN de cachés perdida, reintentando en {espera}s: {e}')
+            except Exception:
+                logger.exception('Error en la escucha de invalidaciones de cachés')
+            time.sleep(espera)
+            espera = min(espera * 2, self.ESPERA_MAXIMA)
+
+
+# Uno por proceso (lo inicia el hook post_worker_init de gunicorn.conf.py)
+escucha = EscuchaInvalidaciones()
+
+
+# ============================================================================
+# CACHÉS
+# ============================================================================
+
+# Búsqueda exacta por SKU (lector de código de barras): SKU -> dict del producto
+productos_por_sku = CacheLRU(
+    'productos_sku',
+    max_entradas=settings.SKU_CACHE_MAX_ENTRIES,
+    ttl=settings.SKU_CACHE_TTL,
+    dependencias=lambda producto: [('productos', producto['id_producto'])],
+)
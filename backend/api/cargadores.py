@@ -0,0 +1,98 @@
+"""
+Carga por lotes de registros relacionados durante la serialización
+
+Las tablas heredadas guardan las referencias como enteros (id_proveedor,
+id_cliente), no como ForeignKey, así que select_related no sirve. El
+CargadorLotes acumula los ids pedidos y los resuelve con una consulta IN
+por modelo; se guarda en la petición, así que una misma petición nunca
+consulta dos veces el mismo registro.
+
+Los serializers con CargaPorLotesMixin y `list_serializer_class =
+ListaCargaPorLotes` declaran sus relaciones en `cargas_por_lote`; con
+many=True, la lista anota todos los ids de la página antes de serializar
+el primer objeto.
+"""
+from collections import defaultdict
+
+from django.db import models
+from rest_framework import serializers
+
+
+class CargadorLotes:
+    """Resuelve instancias por id con una consulta IN por modelo"""
+
+    TAMANO_LOTE = 1000
+
+    def __init__(self):
+        self._pendientes = defaultdict(set)  # modelo: ids sin consultar
+        self._cargados = defaultdict(dict)  # modelo: {id: instancia o None}
+
+    @classmethod
+    def de(cls, context):
+        """Cargador de la petición del contexto (o del propio contexto si no hay petición)"""
+        portador = context.get('request')
+        if portador is None:
+            return context.setdefault('_cargador_lotes', cls())
+        cargador = getattr(portador, '_cargador_lotes', None)
+        if cargador is None:
+            cargador = cls()
+            portador._cargador_lotes = cargador
+        return cargador
+
+    def solicitar(self, modelo, ids):
+        """Anota ids para la próxima consulta de `modelo`"""
+        cargados = self._cargados[modelo]
+        self._pendientes[modelo].update(i for i in ids if i is not None and i not in cargados)
+
+    def obtener(self, modelo, id_registro):
+        """Instancia de `modelo` con ese id, o None si no existe"""
+        if id_registro is None:
+            return None
+        cargados = self._cargados[modelo]
+        if id_registro not in cargados:
+            self._pendientes[modelo].add(id_registro)
+            self._cargar(modelo)
+        return cargados[id_registro]
+
+    def _cargar(self, modelo):
+        ids = sorted(self._pendientes.pop(modelo, ()))
+        cargados = self._cargados[modelo]
+        for inicio in range(0, len(ids), self.TAMANO_LOTE):
+            lote = ids[inicio:inicio + self.TAMANO_LOTE]
+            encontrados = modelo._default_manager.in_bulk(lote)
+            for id_registro in lote:
+                cargados[id_registro] = encontrados.get(id_registro)
+
+
+class ListaCargaPorLotes(serializers.ListSerializer):
+    """ListSerializer que anota los ids relacionados de todos los objetos antes de serializarlos"""
+
+    def to_representation(self, data):
+        if isinstance(data, models.manager.BaseManager):
+            data = data.all()
+        data = list(data)
+        self.child.precargar(data)
+        return super().to_representation(data)
+
+
+class CargaPorLotesMixin:
+    """
+    Relaciones por id resueltas con CargadorLotes
+
+    `cargas_por_lote = {nombre: (modelo, atributo con el id, campos que la usan)}`;
+    solo se precargan las relaciones con algún campo en la respuesta
+    (respeta ?fields= de CamposDinamicosMixin).
+    """
+
+    cargas_por_lote = {}
+
+    def precargar(self, instancias):
+        cargador = CargadorLotes.de(self.context)
+        for modelo, atributo, campos in self.cargas_por_lote.values():
+            if any(campo in self.fields for campo in campos):
+                cargador.solicitar(modelo, (getattr(instancia, atributo) for instancia in instancias))
+
+    def relacionado(self, nombre, instancia):
+        """Instancia relacionada `nombre` de `instancia`, o None si no existe"""
+        modelo, atributo, _ = self.cargas_por_lote[nombre]
+        return CargadorLotes.de(self.context).obtener(modelo, getattr(instancia, atributo))
@@ -0,0 +1,95 @@
+"""
+Enrutamiento de lecturas a la réplica de base de datos
+
+Si existe el alias 'replica' en DATABASES (ver DB_REPLICA_URL en settings),
+las lecturas de listados y reportes van a la réplica. Todo lo demás, incluidas
+las escrituras, las lecturas dentro de una transacción (select_for_update de
+InventoryService) y las lecturas justo después de una escritura del mismo
+cliente, queda en la primaria.
+
+La decisión por petición la toma ReplicaMiddleware; el router solo consulta
+la variable de contexto, así que también funciona dentro de los hilos que
+usan los reportes async.
+"""
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+
+
+REPLICA_DB_ALIAS = 'replica'
+
+_leer_de_replica = ContextVar('leer_de_replica', default=False)
+
+
+def replica_configurada():
+    return REPLICA_DB_ALIAS in settings.DATABASES
+
+
+def alias_lectura():
+    """Alias a usar para una lectura en el contexto actual"""
+    if (
+        _leer_de_replica.get()
+        and replica_configurada()
+        and not connections[DEFAULT_DB_ALIAS].in_atomic_block
+    ):
+        return REPLICA_DB_ALIAS
+    return DEFAULT_DB_ALIAS
+
+
+def conexion_lectura():
+    """Conexión para SQL crudo de solo lectura (reportes, exportaciones)"""
+    return connections[alias_lectura()]
+
+
+def activar_lecturas_replica():
+    """Envía a la réplica las lecturas del contexto actual; retorna el token para restaurar"""
+    return _leer_de_replica.set(True)
+
+
+def restaurar_lecturas(token):
+    _leer_de_replica.reset(token)
+
+
+@contextmanager
+def lecturas_en_replica():
+    """Envía a la réplica (si existe) las lecturas dentro del bloque"""
+    token = activar_lecturas_replica()
+    try:
+        yield
+    finally:
+        restaurar_lecturas(token)
+
+
+def ruta_de_lectura(nombre_ruta):
+    """
+    Indica si una ruta es de las que pueden leer de la réplica
+
+    Listados del router y reportes/exportaciones. Se excluye el estado de
+    los trabajos de reporte: el trabajo se acaba de crear en la primaria.
+    """
+    if nombre_ruta in ('reporte-job', None):
+        return False
+    return (
+        nombre_ruta.endswith('-list')
+        or nombre_ruta.startswith(('reporte-', 'exportar-'))
+        or nombre_ruta == 'productos-mas-vendidos'
+    )
+
+
+class ReplicaRouter:
+    """Router de Django: lecturas a la réplica cuando el contexto lo permite"""
+
+    def db_for_read(self, model, **hints):
+        return alias_lectura()
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Primaria y réplica tienen los mismos datos
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db == DEFAULT_DB_ALIAS
@@ -0,0 +1,120 @@
+"""
+Utilidades de base de datos de bajo nivel (COPY de filas y de CSV, identificadores)
+
+Funcionan tanto con psycopg2 como con psycopg 3, que es el driver que Django
+usa cuando ambos están instalados.
+"""
+
+
+def quote_ident(nombre):
+    """Escapa un identificador SQL (tabla o columna) con comillas dobles"""
+    return '"' + nombre.replace('"', '""') + '"'
+
+
+def _valor_copy(valor):
+    """Convierte un valor Python al formato de texto de COPY"""
+    if valor is None:
+        return '\\N'
+    texto = str(valor)
+    return (
+        texto.replace('\\', '\\\\')
+        .replace('\t', '\\t')
+        .replace('\n', '\\n')
+        .replace('\r', '\\r')
+    )
+
+
+class _FilasComoArchivo:
+    """
+    Objeto tipo archivo que genera el texto de COPY bajo demanda a partir de un
+    iterable de filas, para no materializar millones de filas en memoria
+    """
+
+    def __init__(self, filas):
+        self._filas = iter(filas)
+        self._buffer = ''
+
+    def read(self, size=-1):
+        while size < 0 or len(self._buffer) < size:
+            try:
+                fila = next(self._filas)
+            except StopIteration:
+                break
+            self._buffer += '\t'.join(_valor_copy(v) for v in fila) + '\n'
+
+        if size < 0:
+            datos, self._buffer = self._buffer, ''
+        else:
+            datos, self._buffer = self._buffer[:size], self._buffer[size:]
+        return datos
+
+    readline = read
+
+
+def copy_rows(cursor, tabla, columnas, filas):
+    """
+    Carga filas en una tabla usando COPY ... FROM STDIN
+
+    Args:
+        cursor: Cursor de Django (connection.cursor())
+        tabla: Nombre de la tabla destino
+        columnas: Lista de columnas en el orden de cada fila
+        filas: Iterable de tuplas
+
+    Returns:
+        int: Número de filas cargadas (según el driver)
+    """
+    sql = 'COPY {} ({}) FROM STDIN'.format(
+        quote_ident(tabla), ', '.join(quote_ident(c) for c in columnas)
+    )
+    raw = getattr(cursor, 'cursor', cursor)
+
+    if hasattr(raw, 'copy'):
+        # psycopg 3
+        with raw.copy(sql) as copy:
+            for fila in filas:
+                copy.write_row(fila)
+    else:
+        # psycopg2
+        raw.copy_expert(sql, _FilasComoArchivo(filas))
+    return raw.rowcount
+
+
+
+# Bloques leídos del archivo al enviar un CSV con COPY
+TAMANO_BLOQUE_COPY = 64 * 1024
+
+
+def copy_csv(cursor, tabla, columnas, archivo, delimitador=','):
+    """
+    Carga un CSV en una tabla usando COPY ... FROM STDIN (FORMAT csv)
+
+    El archivo se envía por bloques tal cual, sin parsearlo en Python; es
+    PostgreSQL quien interpreta comillas y delimitadores.
+
+    Args:
+        cursor: Cursor de Django (connection.cursor())
+        tabla: Nombre de la tabla destino
+        columnas: Columnas en el orden del CSV
+        archivo: Objeto tipo archivo (texto o bytes) posicionado después del encabezado
+        delimitador: Separador de campos del CSV
+
+    Returns:
+        int: Número de filas cargadas (según el driver)
+    """
+    sql = "COPY {} ({}) FROM STDIN WITH (FORMAT csv, DELIMITER {})".format(
+        quote_ident(tabla),
+        ', '.join(quote_ident(c) for c in columnas),
+        "'" + delimitador.replace("'", "''") + "'",
+    )
+    raw = getattr(cursor, 'cursor', cursor)
+
+    if hasattr(raw, 'copy'):
+        # psycopg 3
+        with raw.copy(sql) as copy:
+            while bloque := archivo.read(TAMANO_BLOQUE_COPY):
+                copy.write(bloque)
+    else:
+        # psycopg2
+        raw.copy_expert(sql, archivo, size=TAMANO_BLOQUE_COPY)
+    return raw.rowcount
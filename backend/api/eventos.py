@@ -0,0 +1,147 @@
+"""
+Eventos en tiempo real (Server-Sent Events) desde LISTEN/NOTIFY de PostgreSQL
+
+Los triggers de la migración 0003_eventos publican en el canal
+`inventrix_eventos`. Cada proceso mantiene UNA sola conexión con LISTEN, sin
+importar cuántos clientes SSE tenga conectados, y reparte cada notificación
+a la cola de cada cliente. La conexión se abre con el primer cliente y se
+cierra cuando no queda ninguno.
+
+Requiere el servidor en modo ASGI (SERVER_MODE=asgi): cada cliente conectado
+es solo una corrutina esperando en su cola, no un thread ni una conexión.
+"""
+import asyncio
+import json
+import logging
+
+import psycopg
+from django.db import DEFAULT_DB_ALIAS, connections
+
+from .metrics import SSE_CLIENTES, SSE_EVENTOS_TOTAL, SSE_RECONEXIONES_TOTAL
+
+logger = logging.getLogger(__name__)
+
+
+CANAL = 'inventrix_eventos'
+
+TIPOS = ('stock', 'venta', 'orden_compra', 'cambio')
+
+# Se envía cuando el cliente pudo perder eventos (reconexión del LISTEN o
+# cliente lento): debe recargar sus datos
+RESYNC = ('resync', '{}')
+
+
+def parametros_conexion(alias=DEFAULT_DB_ALIAS):
+    """
+    Parámetros de psycopg para conectarse a la base de Django
+
+    Siempre la primaria: las réplicas no reciben los NOTIFY.
+    """
+    parametros = connections[alias].get_connection_params()
+    return {clave: valor for clave, valor in parametros.items() if isinstance(valor, (str, int))}
+
+
+class DifusorEventos:
+    """Conexión LISTEN del proceso que reparte las notificaciones a los clientes"""
+
+    TAMANO_COLA = 100
+    # Cada cuánto se revisa si quedan clientes mientras no llegan notificaciones
+    REVISION_SEGUNDOS = 30
+    ESPERA_MAXIMA = 30
+
+    def __init__(self):
+        self._colas = set()
+        self._tarea = None
+
+    @property
+    def clientes(self):
+        return len(self._colas)
+
+    def suscribir(self):
+        """Registra un cliente; inicia la escucha si es el primero"""
+        cola = asyncio.Queue(self.TAMANO_COLA)
+        self._colas.add(cola)
+        SSE_CLIENTES.inc()
+        if self._tarea is None or self._tarea.done():
+            self._tarea = asyncio.get_running_loop().create_task(self._escuchar())
+        return cola
+
+    def desuscribir(self, cola):
+        if cola in self._colas:
+            self._colas.discard(cola)
+            SSE_CLIENTES.dec()
+
+    def _repartir(self, evento):
+        for cola in list(self._colas):
+            try:
+                cola.put_nowait(evento)
+            except asyncio.QueueFull:
+                # Cliente que no consume: se descarta lo pendiente y se le pide recargar
+                while not cola.empty():
+                    cola.get_nowait()
+                cola.put_nowait(RESYNC)
+
+    def _recibir(self, payload):
+        try:
+            tipo = json.loads(payload)['tipo']
+        except (ValueError, KeyError, TypeError):
+            logger.warning(f'Notificación inválida en {CANAL}: {payload[:200]}')
+            return
+        SSE_EVENTOS_TOTAL.labels(tipo=tipo).inc()
+        self._repartir((tipo, payload))
+
+    async def _escuchar(self):
+        """Mantiene el LISTEN mientras haya clientes, reconectando con espera exponencial"""
+        espera = 1
+        reconexion = False
+        while self._colas:
+            try:
+                async with await psycopg.AsyncConnection.connect(
+                    **parametros_conexion(), autocommit=True
+                ) as conexion:
+                    await conexion.execute(f'LISTEN {CANAL}')
+                    if reconexion:
+                        # Los eventos publicados mientras no había LISTEN se perdieron
+                        self._repartir(RESYNC)
+                    espera = 1
+                    while self._colas:
+                        async for notificacion in conexion.notifies(timeout=self.REVISION_SEGUNDOS):
+                            self._recibir(notificacion.payload)
+            except psycopg.Error as e:
+                logger.warning(f'Conexión LISTEN perdida, reintentando en {espera}s: {e}')
+                SSE_RECONEXIONES_TOTAL.inc()
+                reconexion = True
+                await asyncio.sleep(espera)
+                espera = min(espera * 2, self.ESPERA_MAXIMA)
+
+
+# Uno por proceso (un event loop por worker de Uvicorn)
+difusor = DifusorEventos()
+
+
+def formatear_evento(tipo, datos):
+    """Mensaje en formato text/event-stream"""
+    return f'event: {tipo}\ndata: {datos}\n\n'
+
+
+async def stream_eventos(tipos, heartbeat=15):
+    """
+    Generador async del stream SSE de un cliente
+
+    Envía un comentario cada `heartbeat` segundos sin eventos para que
+    proxies y balanceadores no cierren la conexión ociosa.
+    """
+    cola = difusor.suscribir()
+    try:
+        # Reintento del EventSource del navegador si se corta la conexión
+        yield 'retry: 5000\n\n'
+        while True:
+            try:
+                tipo, datos = await asyncio.wait_for(cola.get(), heartbeat)
+            except asyncio.TimeoutError:
+                yield ': ping\n\n'
+                continue
+            if tipo in tipos or (tipo, datos) == RESYNC:
+                yield formatear_evento(tipo, datos)
+    finally:
+        difusor.desuscribir(cola)
@@ -0,0 +1,43 @@
+"""
+Vista del stream de eventos en tiempo real (Server-Sent Events)
+
+Reemplaza el polling de las terminales: stock, ventas, órdenes de compra y
+cambios de recursos llegan en cuanto se hace COMMIT (ver api/eventos.py).
+"""
+from django.core.handlers.asgi import ASGIRequest
+from django.http import JsonResponse, StreamingHttpResponse
+from django.views.decorators.http import require_GET
+
+from .eventos import TIPOS, stream_eventos
+
+
+@require_GET
+async def eventos_stream(request):
+    """
+    Stream text/event-stream de eventos
+
+    Query params:
+        tipos: Tipos de evento separados por coma (default: todos)
+    """
+    if not isinstance(request, ASGIRequest):
+        # Con WSGI cada cliente ocuparía un thread de Gunicorn indefinidamente
+        return JsonResponse(
+            {'error': 'El stream de eventos requiere el servidor en modo ASGI (SERVER_MODE=asgi)'},
+            status=503
+        )
+
+    tipos = set(TIPOS)
+    if request.GET.get('tipos'):
+        tipos = {tipo.strip() for tipo in request.GET['tipos'].split(',') if tipo.strip()}
+        desconocidos = tipos - set(TIPOS)
+        if desconocidos:
+            return JsonResponse(
+                {'error': f"Tipos de evento desconocidos: {', '.join(sorted(desconocidos))}"},
+                status=400
+            )
+
+    response = StreamingHttpResponse(stream_eventos(tipos), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    # Sin buffering en proxies (nginx) para que cada evento salga de inmediato
+    response['X-Accel-Buffering'] = 'no'
+    return response
@@ -0,0 +1,215 @@
+"""
+Vistas para exportar reportes en streaming (CSV y XLSX)
+
+Las filas se leen con un cursor del lado del servidor y se escriben directo
+a la respuesta, sin construir la lista completa en memoria.
+"""
+import csv
+import tempfile
+
+from django.http import StreamingHttpResponse
+from django.utils.dateparse import parse_date
+from openpyxl import Workbook
+from rest_framework.decorators import api_view
+from rest_framework.response import Response
+
+from .db_router import conexion_lectura
+
+
+# Filas por viaje al servidor del cursor
+TAMANO_LOTE = 2000
+# Bloques de lectura del archivo XLSX temporal
+TAMANO_BLOQUE = 64 * 1024
+
+FORMATOS = {
+    'csv': 'text/csv; charset=utf-8',
+    'xlsx': 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+}
+
+SQL_INVENTARIO = """
+    SELECT
+        sku_producto,
+        nombre,
+        cantidad_actual,
+        cantidad_minima,
+        precio_final,
+        (cantidad_actual * precio_final) as valor_stock
+    FROM productos
+    ORDER BY nombre
+"""
+
+SQL_VENTAS = """
+    SELECT
+        v.id_venta,
+        c.nombre,
+        v.fecha,
+        v.total,
+        'confirmada'
+    FROM ventas v
+    INNER JOIN cliente c ON c.id_cliente = v.id_cliente
+    WHERE v.fecha BETWEEN %s AND %s
+    ORDER BY v.fecha DESC
+"""
+
+SQL_COMPRAS = """
+    SELECT
+        oc.id_orden,
+        pr.nombre_empresa,
+        oc.fecha_creacion,
+        (SELECT COALESCE(SUM(p.precio_compra_unitario), 0)
+         FROM orden_producto op
+         INNER JOIN productos p ON p.id_producto = op.id_producto
+         WHERE op.id_orden = oc.id_orden),
+        CASE
+            WHEN oc.id_estado = 1 THEN 'cancelada'
+            WHEN oc.id_estado = 2 THEN 'pendiente'
+            WHEN oc.id_estado = 3 THEN 'recibida'
+            ELSE 'desconocido'
+        END
+    FROM orden_compra oc
+    INNER JOIN proveedores pr ON pr.id_proveedor = oc.id_proveedor
+    {where_clause}
+    ORDER BY oc.fecha_creacion DESC
+"""
+
+
+class _Eco:
+    """Pseudo-buffer para csv.writer que retorna lo escrito en vez de guardarlo"""
+
+    def write(self, valor):
+        return valor
+
+
+def _filas(sql, params):
+    """
+    Itera las filas de una consulta usando un cursor del lado del servidor
+
+    La conexión se elige al crear el iterador: la respuesta se consume después
+    de que los middlewares terminaron (ver ReplicaMiddleware).
+    """
+    return _iterar(conexion_lectura(), sql, params)
+
+
+def _iterar(conexion, sql, params):
+    cursor = conexion.chunked_cursor()
+    try:
+        cursor.execute(sql, params)
+        while True:
+            lote = cursor.fetchmany(TAMANO_LOTE)
+            if not lote:
+                break
+            yield from lote
+    finally:
+        cursor.close()
+
+
+def _csv(encabezados, filas):
+    escritor = csv.writer(_Eco())
+    # BOM para que Excel reconozca el archivo como UTF-8
+    yield '\ufeff' + escritor.writerow(encabezados)
+    for fila in filas:
+        yield escritor.writerow(fila)
+
+
+def _xlsx(titulo, encabezados, filas):
+    """
+    Genera el XLSX con openpyxl en modo write-only
+
+    El modo write-only escribe cada fila a disco al agregarla; el archivo zip
+    solo puede cerrarse al final, así que se arma en un archivo temporal y
+    luego se envía por bloques. La memoria usada es constante.
+    """
+    libro = Workbook(write_only=True)
+    hoja = libro.create_sheet(title=titulo)
+    hoja.append(encabezados)
+    for fila in filas:
+        hoja.append(list(fila))
+
+    with tempfile.TemporaryFile() as archivo:
+        libro.save(archivo)
+        archivo.seek(0)
+        while True:
+            bloque = archivo.read(TAMANO_BLOQUE)
+            if not bloque:
+                break
+            yield bloque
+
+
+def _exportar(request, nombre, titulo, encabezados, filas):
+    """Construye la respuesta en streaming en el formato solicitado"""
+    formato = request.GET.get('formato', 'csv').lower()
+    if formato not in FORMATOS:
+        return Response(
+            {'error': f"formato debe ser uno de: {', '.join(FORMATOS)}"}, status=400
+        )
+    if formato == 'xlsx':
+        contenido = _xlsx(titulo, encabezados, filas)
+    else:
+        contenido = _csv(encabezados, filas)
+
+    response = StreamingHttpResponse(contenido, content_type=FORMATOS[formato])
+    response['Content-Disposition'] = f'attachment; filename="{nombre}.{formato}"'
+    return response
+
+
+def _rango_fechas(request):
+    """Retorna (fecha_inicio, fecha_fin) validadas, o None si faltan o son inválidas"""
+    try:
+        fecha_inicio = parse_date(request.GET.get('fecha_inicio', ''))
+        fecha_fin = parse_date(request.GET.get('fecha_fin', ''))
+    except ValueError:
+        return None
+    if not fecha_inicio or not fecha_fin:
+        return None
+    return fecha_inicio, fecha_fin
+
+
+@api_view(['GET'])
+def exportar_inventario(request):
+    """Exporta el listado de productos del reporte de inventario"""
+    return _exportar(
+        request,
+        'reporte-inventario',
+        'Inventario',
+        ['Código', 'Producto', 'Stock', 'Stock Mínimo', 'Precio Venta', 'Valor Stock'],
+        _filas(SQL_INVENTARIO, []),
+    )
+
+
+@api_view(['GET'])
+def exportar_ventas(request):
+    """Exporta las órdenes del reporte de ventas en un rango de fechas"""
+    rango = _rango_fechas(request)
+    if rango is None:
+        return Response({'error': 'Debe proporcionar fecha_inicio y fecha_fin válidas (YYYY-MM-DD)'}, status=400)
+
+    return _exportar(
+        request,
+        f'reporte-ventas-{rango[0]}_{rango[1]}',
+        'Ventas',
+        ['Orden', 'Cliente', 'Fecha', 'Total', 'Estado'],
+        _filas(SQL_VENTAS, list(rango)),
+    )
+
+
+@api_view(['GET'])
+def exportar_compras(request):
+    """Exporta las órdenes del reporte de compras en un rango de fechas"""
+    rango = _rango_fechas(request)
+    if rango is None:
+        return Response({'error': 'Debe proporcionar fecha_inicio y fecha_fin válidas (YYYY-MM-DD)'}, status=400)
+
+    where_clause = "WHERE oc.fecha_creacion BETWEEN %s AND %s"
+    params = list(rango)
+    proveedor_id = request.GET.get('proveedor')
+    if proveedor_id:
+        where_clause += " AND oc.id_proveedor = %s"
+        params.append(proveedor_id)
+
+    return _exportar(
+        request,
+        f'reporte-compras-{rango[0]}_{rango[1]}',
+        'Compras',
+        ['Orden', 'Proveedor', 'Fecha', 'Total', 'Estado'],
+        _filas(SQL_COMPRAS.format(where_clause=where_clause), params),
+    )
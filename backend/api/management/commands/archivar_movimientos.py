@@ -0,0 +1,64 @@
+"""
+Archiva los movimientos de inventario antiguos
+
+Los meses completos anteriores a la retención se retiran de
+movimientos_inventario: los totales por producto, mes y tipo quedan en
+movimientos_resumen_mensual y el detalle en un archivo gzip NDJSON por mes en
+MOVIMIENTOS_ARCHIVO_DIR (consultable en GET /api/movimientos/archivados/).
+Cada mes es una transacción. Pensado para ejecutarse a diario o mensualmente (cron).
+
+Uso:
+    python manage.py archivar_movimientos --meses 12
+    python manage.py archivar_movimientos --meses 12 --simular
+"""
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from api.services import ArchivoMovimientosService
+
+
+class Command(BaseCommand):
+    help = 'Resume y archiva en archivos gzip los movimientos de inventario más antiguos que la retención'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--meses', type=int, default=12,
+            help='Meses anteriores al actual que se conservan en la tabla'
+        )
+        parser.add_argument('--simular', action='store_true', help='Solo mostrar qué meses se archivarían')
+
+    def handle(self, *args, **options):
+        if options['meses'] < 0:
+            raise CommandError('--meses no puede ser negativo')
+
+        pendientes = ArchivoMovimientosService.pendientes(options['meses'])
+        corte = ArchivoMovimientosService.corte(options['meses'])
+        if not pendientes:
+            self.stdout.write(f'No hay movimientos anteriores a {corte:%Y-%m}')
+            return
+
+        if options['simular']:
+            for mes, movimientos in pendientes:
+                self.stdout.write(f'  {mes:%Y-%m}: {movimientos:,} movimiento(s)')
+            total = sum(movimientos for _, movimientos in pendientes)
+            self.stdout.write(self.style.SUCCESS(
+                f'🔎 Simulación: se archivarían {total:,} movimiento(s) anteriores a {corte:%Y-%m}'
+            ))
+            return
+
+        inicio = time.perf_counter()
+        total = 0
+        for mes, _ in pendientes:
+            archivo = ArchivoMovimientosService.archivar_mes(mes)
+            if archivo is None:
+                continue
+            total += archivo.filas
+            self.stdout.write(
+                f'  {mes:%Y-%m}: {archivo.filas:,} movimiento(s) → {archivo.ruta} '
+                f'({archivo.tamano_bytes / 1024:,.0f} KB)'
+            )
+
+        self.stdout.write(self.style.SUCCESS(
+            f'✅ {total:,} movimiento(s) archivado(s) en {time.perf_counter() - inicio:.1f}s'
+        ))
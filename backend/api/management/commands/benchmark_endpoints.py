@@ -0,0 +1,193 @@
+"""
+Benchmark de endpoints de la API con presupuesto de consultas y latencia
+
+Ejecuta cada endpoint del router (listado y detalle) y los reportes contra la
+base de datos actual (normalmente poblada con generate_dataset), registra el
+número de consultas SQL, percentiles de latencia y tamaño de respuesta, y los
+compara con las líneas base guardadas en benchmarks/baselines.json.
+
+El presupuesto de consultas de un endpoint es su campo `consultas`, o
+`presupuesto_consultas` si se definió a mano en el archivo de líneas base.
+El archivo versionado solo trae `presupuesto_consultas` (no depende del
+hardware); la latencia se compara solo si hay `p95_ms` grabado con
+--actualizar en la máquina donde se ejecuta. Un endpoint sin línea base
+cuenta como fallo.
+
+Se cuentan las consultas de todas las conexiones (primaria y réplica). Los
+reportes se piden con `Cache-Control: no-cache` para medir el cálculo y no
+la caché de resultados.
+
+Uso:
+    python manage.py benchmark_endpoints
+    python manage.py benchmark_endpoints --solo producto-list reporte-ventas
+    python manage.py benchmark_endpoints --actualizar   # regrabar líneas base
+"""
+import json
+import math
+import time
+from datetime import date, timedelta
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from contextlib import ExitStack
+
+from django.db import connections
+from django.test import Client
+from django.test.utils import setup_test_environment, teardown_test_environment
+from django.urls import reverse
+
+from api.metrics import ContadorConsultas
+from api.urls import router
+
+
+DEFAULT_BASELINES = Path(settings.BASE_DIR) / 'benchmarks' / 'baselines.json'
+
+
+def percentil(valores, p):
+    """Percentil por rango más cercano de una lista de valores"""
+    ordenados = sorted(valores)
+    indice = max(0, math.ceil(p / 100 * len(ordenados)) - 1)
+    return ordenados[indice]
+
+
+class Command(BaseCommand):
+    help = 'Mide consultas, latencia y tamaño de respuesta de los endpoints y compara con las líneas base'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--repeticiones', type=int, default=20, help='Peticiones medidas por endpoint')
+        parser.add_argument('--calentamiento', type=int, default=2, help='Peticiones previas no medidas')
+        parser.add_argument(
+            '--tolerancia', type=float, default=0.25,
+            help='Regresión de latencia permitida sobre la línea base (0.25 = 25%%)'
+        )
+        parser.add_argument('--baselines', default=str(DEFAULT_BASELINES), help='Archivo de líneas base')
+        parser.add_argument('--solo', nargs='*', default=None, help='Nombres de endpoints a medir')
+        parser.add_argument('--actualizar', action='store_true', help='Guardar los resultados como nuevas líneas base')
+        parser.add_argument('--fecha-inicio', default=None, help='Inicio del rango para reportes (default: hace 30 días)')
+        parser.add_argument('--fecha-fin', default=None, help='Fin del rango para reportes (default: hoy)')
+
+    def handle(self, *args, **options):
+        hoy = date.today()
+        rango = {
+            'fecha_inicio': options['fecha_inicio'] or (hoy - timedelta(days=30)).isoformat(),
+            'fecha_fin': options['fecha_fin'] or hoy.isoformat(),
+        }
+        endpoints = self._endpoints(rango)
+        if options['solo']:
+            endpoints = [e for e in endpoints if e[0] in options['solo']]
+
+        ruta_baselines = Path(options['baselines'])
+        baselines = json.loads(ruta_baselines.read_text()) if ruta_baselines.exists() else {}
+
+        setup_test_environment()
+        try:
+            cliente = Client()
+            resultados = {
+                nombre: self._medir(cliente, url, headers, options['calentamiento'], options['repeticiones'])
+                for nombre, url, headers in endpoints
+            }
+        finally:
+            teardown_test_environment()
+
+        fallos = self._reportar(resultados, baselines, options['tolerancia'], options['actualizar'])
+
+        if options['actualizar']:
+            # Conservar campos editados a mano (ej: presupuesto_consultas)
+            for nombre, resultado in resultados.items():
+                baselines[nombre] = {**baselines.get(nombre, {}), **resultado}
+            ruta_baselines.parent.mkdir(parents=True, exist_ok=True)
+            ruta_baselines.write_text(json.dumps(baselines, indent=2, sort_keys=True) + '\n')
+            self.stdout.write(self.style.SUCCESS(f'✅ Líneas base guardadas en {ruta_baselines}'))
+            return
+
+        if fallos:
+            raise CommandError(
+                f'{len(fallos)} endpoint(s) fuera de presupuesto o sin línea base: ' + ', '.join(fallos)
+            )
+        self.stdout.write(self.style.SUCCESS('✅ Todos los endpoints dentro de presupuesto'))
+
+    def _endpoints(self, rango):
+        """Construye la lista (nombre, url, headers) de endpoints a medir"""
+        endpoints = []
+        for prefijo, viewset, basename in router.registry:
+            endpoints.append((f'{basename}-list', reverse(f'{basename}-list'), {}))
+
+            modelo = viewset.queryset.model
+            pk = modelo._default_manager.order_by('pk').values_list('pk', flat=True).first()
+            if pk is not None:
+                endpoints.append((f'{basename}-detail', reverse(f'{basename}-detail', args=[pk]), {}))
+
+        # Sin la caché de resultados (ReporteCompartidoService): cada repetición calcula
+        sin_cache = {'HTTP_CACHE_CONTROL': 'no-cache'}
+        query = f"?fecha_inicio={rango['fecha_inicio']}&fecha_fin={rango['fecha_fin']}"
+        endpoints += [
+            ('reporte-inventario', reverse('reporte-inventario'), sin_cache),
+            ('reporte-ventas', reverse('reporte-ventas') + query, sin_cache),
+            ('reporte-compras', reverse('reporte-compras') + query, sin_cache),
+            ('productos-mas-vendidos', reverse('productos-mas-vendidos') + query, sin_cache),
+        ]
+        return endpoints
+
+    def _pedir(self, cliente, url, headers):
+        response = cliente.get(url, **headers)
+        if response.status_code != 200:
+            raise CommandError(f'{url} respondió {response.status_code}')
+        return response
+
+    def _medir(self, cliente, url, headers, calentamiento, repeticiones):
+        for _ in range(calentamiento):
+            self._pedir(cliente, url, headers)
+
+        tiempos = []
+        consultas = 0
+        for _ in range(repeticiones):
+            contador = ContadorConsultas()
+            with ExitStack() as stack:
+                # Todas las conexiones: los listados y reportes leen de la réplica si existe
+                for conexion in connections.all():
+                    stack.enter_context(conexion.execute_wrapper(contador))
+                inicio = time.perf_counter()
+                response = self._pedir(cliente, url, headers)
+                tiempos.append((time.perf_counter() - inicio) * 1000)
+            consultas = max(consultas, contador.total)
+
+        contenido = b''.join(response) if response.streaming else response.content
+        return {
+            'url': url,
+            'consultas': consultas,
+            'p50_ms': round(percentil(tiempos, 50), 2),
+            'p95_ms': round(percentil(tiempos, 95), 2),
+            'p99_ms': round(percentil(tiempos, 99), 2),
+            'bytes': len(contenido),
+        }
+
+    def _reportar(self, resultados, baselines, tolerancia, actualizar):
+        """Imprime la tabla de resultados y retorna los endpoints que fallan"""
+        fallos = []
+        self.stdout.write(
+            f"{'endpoint':<28}{'consultas':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'bytes':>12}  estado"
+        )
+        for nombre, r in resultados.items():
+            base = baselines.get(nombre)
+            if base is None:
+                estado = 'sin línea base'
+                if not actualizar:
+                    fallos.append(nombre)
+            else:
+                problemas = []
+                presupuesto = base.get('presupuesto_consultas', base.get('consultas'))
+                if presupuesto is not None and r['consultas'] > presupuesto:
+                    problemas.append(f"consultas {r['consultas']} > {presupuesto}")
+                if 'p95_ms' in base and r['p95_ms'] > base['p95_ms'] * (1 + tolerancia):
+                    problemas.append(f"p95 {r['p95_ms']}ms > {base['p95_ms']}ms +{tolerancia:.0%}")
+                if problemas:
+                    fallos.append(nombre)
+                estado = '; '.join(problemas) or 'ok'
+
+            linea = (
+                f"{nombre:<28}{r['consultas']:>10}{r['p50_ms']:>10}{r['p95_ms']:>10}"
+                f"{r['p99_ms']:>10}{r['bytes']:>12}  {estado}"
+            )
+            self.stdout.write(self.style.ERROR(linea) if nombre in fallos else linea)
+        return fallos
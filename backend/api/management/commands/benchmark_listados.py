@@ -0,0 +1,115 @@
+"""
+Compara el listado estándar de DRF con el listado rápido por values_list()
+
+Para cada serializer de listado que usa ListadoRapidoMixin mide filas por
+segundo de ambos caminos (lectura + serialización) y verifica que el JSON
+resultante sea idéntico byte a byte.
+
+Uso:
+    python manage.py benchmark_listados --limite 5000
+    python manage.py benchmark_listados --sintetico 20000   # sin base de datos
+"""
+import time
+from datetime import date, datetime, timezone
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand, CommandError
+
+from api.mixins import filas_a_dicts, proyeccion_valores
+from api.renderers import ORJSONRenderer
+from api.serializers import ClienteListSerializer, ProductoListSerializer, ProveedorListSerializer
+
+
+SERIALIZERS = [ProductoListSerializer, ClienteListSerializer, ProveedorListSerializer]
+
+
+def valor_sintetico(campo, i):
+    """Valor plausible para una columna según su tipo"""
+    tipo = campo.get_internal_type()
+    if tipo in ('AutoField', 'BigAutoField', 'IntegerField', 'BigIntegerField', 'SmallIntegerField'):
+        return i
+    if tipo == 'DecimalField':
+        return Decimal(f'{i % 10000}.{i % 100:02d}')
+    if tipo == 'DateTimeField':
+        return datetime(2024, 1, 1, tzinfo=timezone.utc)
+    if tipo == 'DateField':
+        return date(2024, 1, 1)
+    if tipo == 'BooleanField':
+        return i % 2 == 0
+    if campo.null and i % 7 == 0:
+        return None
+    return f'{campo.name} {i} ñ'
+
+
+class Command(BaseCommand):
+    help = 'Mide filas/s del listado estándar vs el listado rápido por values_list()'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--limite', type=int, default=5000, help='Filas leídas de la base por listado')
+        parser.add_argument('--repeticiones', type=int, default=5, help='Repeticiones por medición (se toma la mejor)')
+        parser.add_argument('--sintetico', type=int, default=None, help='Usar N filas sintéticas en memoria')
+
+    def handle(self, *args, **options):
+        self.stdout.write(f"{'serializer':<28}{'filas':>8}{'estándar filas/s':>20}{'rápido filas/s':>18}{'x':>7}")
+        for serializer_class in SERIALIZERS:
+            proyeccion = proyeccion_valores(serializer_class)
+            if proyeccion is None:
+                raise CommandError(f'{serializer_class.__name__} no es una proyección de columnas')
+
+            if options['sintetico']:
+                estandar, rapido = self._caminos_sinteticos(serializer_class, proyeccion, options['sintetico'])
+            else:
+                estandar, rapido = self._caminos_reales(serializer_class, proyeccion, options['limite'])
+
+            salida_estandar, t_estandar = self._medir(estandar, options['repeticiones'])
+            salida_rapida, t_rapido = self._medir(rapido, options['repeticiones'])
+            if salida_estandar != salida_rapida:
+                raise CommandError(f'{serializer_class.__name__}: la salida del listado rápido difiere')
+
+            filas = len(salida_estandar[1])
+            self.stdout.write(
+                f'{serializer_class.__name__:<28}{filas:>8}{filas / t_estandar:>20,.0f}'
+                f'{filas / t_rapido:>18,.0f}{t_estandar / t_rapido:>6.1f}x'
+            )
+
+    def _medir(self, camino, repeticiones):
+        """Ejecuta el camino y retorna ((json, datos), mejor tiempo en segundos)"""
+        renderer = ORJSONRenderer()
+        mejor = None
+        for _ in range(repeticiones):
+            inicio = time.perf_counter()
+            datos = camino()
+            duracion = time.perf_counter() - inicio
+            mejor = duracion if mejor is None else min(mejor, duracion)
+        return (renderer.render(datos), datos), mejor
+
+    def _caminos_reales(self, serializer_class, proyeccion, limite):
+        modelo = serializer_class.Meta.model
+        queryset = modelo.objects.order_by('pk')[:limite]
+        columnas = [columna for _, columna, _ in proyeccion]
+
+        def estandar():
+            return serializer_class(list(queryset), many=True).data
+
+        def rapido():
+            return filas_a_dicts(proyeccion, list(queryset.values_list(*columnas)))
+
+        return estandar, rapido
+
+    def _caminos_sinteticos(self, serializer_class, proyeccion, filas):
+        """Filas en memoria: instancias como las crea el ORM (from_db) vs tuplas"""
+        modelo = serializer_class.Meta.model
+        campos = modelo._meta.concrete_fields
+        attnames = [campo.attname for campo in campos]
+        completas = [tuple(valor_sintetico(campo, i) for campo in campos) for i in range(filas)]
+        indices = [attnames.index(columna) for _, columna, _ in proyeccion]
+        proyectadas = [tuple(fila[i] for i in indices) for fila in completas]
+
+        def estandar():
+            instancias = [modelo.from_db('default', attnames, fila) for fila in completas]
+            return serializer_class(instancias, many=True).data
+
+        def rapido():
+            return filas_a_dicts(proyeccion, proyectadas)
+
+        return estandar, rapido
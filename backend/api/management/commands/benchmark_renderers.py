@@ -0,0 +1,129 @@
+"""
+Compara el renderer/parser JSON estándar de DRF con los basados en orjson
+
+Toma las respuestas más grandes de la API (reportes y listados) de la base
+de datos actual, o genera un reporte de inventario sintético, y mide el
+tiempo de render y de parseo de cada implementación. También verifica que
+ambas produzcan el mismo JSON.
+
+Uso:
+    python manage.py benchmark_renderers
+    python manage.py benchmark_renderers --sintetico 50000
+"""
+import io
+import json
+import statistics
+import time
+from datetime import date, timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.test import Client
+from django.test.utils import setup_test_environment, teardown_test_environment
+from django.urls import reverse
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+
+from api.renderers import ORJSONParser, ORJSONRenderer
+
+
+def reporte_sintetico(filas):
+    """Reporte de inventario con la misma forma y tipos que el real"""
+    return {
+        'total_productos': filas,
+        'valor_total': 123456789.5,
+        'generado': date.today(),
+        'productos': [
+            {
+                'id': i,
+                'codigo': f'SKU-{i:06d}',
+                'nombre': f'Producto de prueba {i} ñandú',
+                'stock_actual': i % 500,
+                'stock_minimo': 10,
+                'precio_venta': float(f'{i % 9000}.{i % 100:02d}'),
+                'valor_stock': float((i % 500) * (i % 9000)),
+            }
+            for i in range(filas)
+        ],
+    }
+
+
+def medir(funcion, repeticiones):
+    tiempos = []
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        funcion()
+        tiempos.append((time.perf_counter() - inicio) * 1000)
+    return statistics.median(tiempos)
+
+
+class Command(BaseCommand):
+    help = 'Compara JSONRenderer/JSONParser de DRF con ORJSONRenderer/ORJSONParser'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--repeticiones', type=int, default=10, help='Repeticiones por medición')
+        parser.add_argument(
+            '--sintetico', type=int, default=None,
+            help='Usar un reporte de inventario sintético con N productos en vez de la base de datos'
+        )
+        parser.add_argument('--fecha-inicio', default=None, help='Inicio del rango para reportes (default: hace 1 año)')
+        parser.add_argument('--fecha-fin', default=None, help='Fin del rango para reportes (default: hoy)')
+
+    def handle(self, *args, **options):
+        if options['sintetico']:
+            cargas = {'reporte-inventario (sintético)': reporte_sintetico(options['sintetico'])}
+        else:
+            cargas = self._cargas_reales(options)
+
+        self.stdout.write(
+            f"{'respuesta':<34}{'bytes':>12}{'render DRF':>12}{'render orjson':>15}{'x':>7}"
+            f"{'parse DRF':>12}{'parse orjson':>14}{'x':>7}"
+        )
+        for nombre, datos in cargas.items():
+            self._comparar(nombre, datos, options['repeticiones'])
+
+    def _cargas_reales(self, options):
+        """Obtiene los datos (antes de renderizar) de las respuestas más grandes"""
+        hoy = date.today()
+        query = (
+            f"?fecha_inicio={options['fecha_inicio'] or (hoy - timedelta(days=365)).isoformat()}"
+            f"&fecha_fin={options['fecha_fin'] or hoy.isoformat()}"
+        )
+        urls = {
+            'reporte-inventario': reverse('reporte-inventario'),
+            'reporte-ventas': reverse('reporte-ventas') + query,
+            'reporte-compras': reverse('reporte-compras') + query,
+            'producto-list': reverse('producto-list'),
+            'orden-venta-list': reverse('orden-venta-list'),
+            'orden-compra-list': reverse('orden-compra-list'),
+        }
+
+        setup_test_environment()
+        try:
+            cliente = Client()
+            cargas = {}
+            for nombre, url in urls.items():
+                response = cliente.get(url)
+                if response.status_code != 200:
+                    raise CommandError(f'{url} respondió {response.status_code}')
+                cargas[nombre] = response.data
+        finally:
+            teardown_test_environment()
+        return cargas
+
+    def _comparar(self, nombre, datos, repeticiones):
+        estandar, rapido = JSONRenderer(), ORJSONRenderer()
+        salida_estandar = estandar.render(datos)
+        salida_rapida = rapido.render(datos)
+        if json.loads(salida_estandar) != json.loads(salida_rapida):
+            raise CommandError(f'{nombre}: el JSON de orjson difiere del de DRF')
+
+        render_estandar = medir(lambda: estandar.render(datos), repeticiones)
+        render_rapido = medir(lambda: rapido.render(datos), repeticiones)
+        parse_estandar = medir(lambda: JSONParser().parse(io.BytesIO(salida_estandar)), repeticiones)
+        parse_rapido = medir(lambda: ORJSONParser().parse(io.BytesIO(salida_estandar)), repeticiones)
+
+        self.stdout.write(
+            f'{nombre:<34}{len(salida_estandar):>12,}{render_estandar:>10.2f}ms{render_rapido:>13.2f}ms'
+            f'{render_estandar / render_rapido:>6.1f}x{parse_estandar:>10.2f}ms{parse_rapido:>12.2f}ms'
+            f'{parse_estandar / parse_rapido:>6.1f}x'
+        )
@@ -0,0 +1,351 @@
+"""
+Comando para generar un dataset sintético de tamaño configurable
+
+Carga los datos con COPY en bloques, para que un dataset de ~10M de filas
+tome minutos. La popularidad de los SKUs sigue una distribución tipo Zipf y
+las fechas tienen estacionalidad mensual y semanal.
+
+Uso:
+    python manage.py generate_dataset --escala 0.01
+    python manage.py generate_dataset --productos 100000 --ventas 1000000 --truncar
+"""
+import random
+import time
+from bisect import bisect
+from datetime import date, datetime, time as dtime, timedelta
+from decimal import Decimal
+from itertools import accumulate
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.utils import timezone
+
+from api.db_utils import copy_rows
+
+
+# Factor de ventas por mes (diciembre y temporada escolar más altos)
+FACTOR_MES = {
+    1: 0.8, 2: 0.85, 3: 0.95, 4: 1.0, 5: 1.05, 6: 1.0,
+    7: 1.1, 8: 1.0, 9: 0.95, 10: 1.0, 11: 1.2, 12: 1.6,
+}
+# Factor por día de la semana (lunes=0); los sábados son el día fuerte del taller
+FACTOR_DIA_SEMANA = {0: 1.0, 1: 0.95, 2: 0.95, 3: 1.0, 4: 1.15, 5: 1.4, 6: 0.4}
+
+CATEGORIAS_PRODUCTO = [
+    'Aceite', 'Filtro', 'Bujía', 'Cadena', 'Piñón', 'Pastilla de freno',
+    'Llanta', 'Neumático', 'Batería', 'Espejo', 'Faro', 'Cable de clutch',
+    'Kit de arrastre', 'Amortiguador', 'Manigueta', 'Casco', 'Guantes',
+]
+MARCAS_MOTO = {
+    'Honda': ['CB190R', 'XR150L', 'Wave 110', 'CBR250R'],
+    'Yamaha': ['FZ-16', 'NMAX 155', 'YBR125', 'XTZ150'],
+    'Suzuki': ['GN125', 'Gixxer 150', 'AX100'],
+    'Bajaj': ['Pulsar 200', 'Boxer 150', 'Discover 125'],
+    'Genesis': ['KLR 150', 'GBR 150'],
+}
+NOMBRES = ['Juan', 'María', 'Carlos', 'Ana', 'Luis', 'Rosa', 'Pedro', 'Carmen',
+           'José', 'Elena', 'Miguel', 'Sofía', 'Jorge', 'Lucía', 'Roberto']
+APELLIDOS = ['Pérez', 'González', 'Rodríguez', 'López', 'Martínez', 'Sánchez',
+             'Ramírez', 'Torres', 'Flores', 'Rivera', 'Gómez', 'Díaz', 'Reyes']
+
+# Tamaños por defecto (escala 1.0)
+DEFAULTS = {
+    'proveedores': 500,
+    'productos': 100_000,
+    'clientes': 50_000,
+    'motos': 50_000,
+    'ventas': 1_000_000,
+    'lineas_venta': 5_000_000,
+    'ordenes_compra': 50_000,
+    'movimientos': 2_000_000,
+}
+
+TABLAS = [
+    'producto_venta', 'ventas', 'orden_producto', 'orden_compra',
+    'movimientos_inventario', 'servicio_motos', 'motos', 'cliente',
+    'productos', 'proveedores',
+]
+
+BLOQUE = 50_000
+
+
+class Command(BaseCommand):
+    help = 'Genera un dataset sintético de tamaño configurable usando COPY'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--escala', type=float, default=1.0,
+            help='Multiplicador aplicado a todos los tamaños por defecto (ej: 0.01)'
+        )
+        for nombre, valor in DEFAULTS.items():
+            parser.add_argument(
+                f'--{nombre.replace("_", "-")}', type=int, default=None, dest=nombre,
+                help=f'Número de filas (default: {valor:,} x escala)'
+            )
+        parser.add_argument('--anios', type=int, default=3, help='Años de historia (default: 3)')
+        parser.add_argument('--zipf', type=float, default=1.1, help='Exponente de popularidad de SKUs')
+        parser.add_argument('--seed', type=int, default=42, help='Semilla aleatoria')
+        parser.add_argument(
+            '--truncar', action='store_true',
+            help='Vaciar las tablas (TRUNCATE ... RESTART IDENTITY) antes de cargar'
+        )
+
+    def handle(self, *args, **options):
+        self.rng = random.Random(options['seed'])
+        self.tamanos = {
+            nombre: options[nombre] if options[nombre] is not None
+            else max(1, int(valor * options['escala']))
+            for nombre, valor in DEFAULTS.items()
+        }
+        if self.tamanos['ventas'] > self.tamanos['lineas_venta']:
+            raise CommandError('Debe haber al menos una línea de venta por venta')
+
+        self.stdout.write('🚀 Generando dataset: ' + ', '.join(
+            f'{nombre}={valor:,}' for nombre, valor in self.tamanos.items()
+        ))
+
+        hoy = date.today()
+        self.fechas, self.pesos_fechas = self._calendario(hoy - timedelta(days=365 * options['anios']), hoy)
+        inicio_total = time.perf_counter()
+
+        with transaction.atomic(), connection.cursor() as cursor:
+            if options['truncar']:
+                cursor.execute('TRUNCATE {} RESTART IDENTITY CASCADE'.format(', '.join(TABLAS)))
+
+            proveedores = self._cargar(cursor, 'proveedores', self._proveedores)
+            productos = self._cargar(cursor, 'productos', self._productos)
+            clientes = self._cargar(cursor, 'cliente', self._clientes)
+            self._cargar(cursor, 'motos', lambda c: self._motos(c, clientes))
+
+            # Popularidad tipo Zipf: unos pocos SKUs concentran la mayoría de las ventas
+            self.rng.shuffle(productos)
+            self.pesos_productos = list(accumulate(
+                1.0 / (rango ** options['zipf']) for rango in range(1, len(productos) + 1)
+            ))
+            self.productos = productos
+            self.precios = {p[0]: p[7] for p in productos}
+
+            self._ventas(cursor, clientes)
+            self._compras(cursor, proveedores)
+            self._movimientos(cursor)
+
+            for tabla in TABLAS:
+                cursor.execute(f'ANALYZE {tabla}')
+
+        self.stdout.write(self.style.SUCCESS(
+            f'✅ Dataset generado en {time.perf_counter() - inicio_total:.1f}s'
+        ))
+
+    # ------------------------------------------------------------------
+    # Helpers
+    # ------------------------------------------------------------------
+
+    def _calendario(self, desde, hasta):
+        """Retorna los días del rango y sus pesos acumulados por estacionalidad"""
+        fechas = []
+        dia = desde
+        while dia <= hasta:
+            fechas.append(dia)
+            dia += timedelta(days=1)
+        pesos = list(accumulate(
+            FACTOR_MES[d.month] * FACTOR_DIA_SEMANA[d.weekday()] for d in fechas
+        ))
+        return fechas, pesos
+
+    def _fecha(self):
+        return self.fechas[bisect(self.pesos_fechas, self.rng.random() * self.pesos_fechas[-1])]
+
+    def _producto(self):
+        indice = bisect(self.pesos_productos, self.rng.random() * self.pesos_productos[-1])
+        return self.productos[indice]
+
+    def _siguiente_id(self, cursor, tabla, columna):
+        cursor.execute(f'SELECT COALESCE(MAX({columna}), 0) FROM {tabla}')
+        return cursor.fetchone()[0] + 1
+
+    def _ajustar_secuencia(self, cursor, tabla, columna):
+        """Sincroniza la secuencia serial con los IDs cargados explícitamente"""
+        cursor.execute(f"""
+            SELECT setval(pg_get_serial_sequence(%s, %s), COALESCE(MAX({columna}), 1))
+            FROM {tabla}
+        """, [tabla, columna])
+
+    def _cargar(self, cursor, tabla, generador):
+        """Carga una tabla con IDs explícitos y retorna la lista de filas generadas"""
+        inicio = time.perf_counter()
+        columnas, filas = generador(cursor)
+        copy_rows(cursor, tabla, columnas, filas)
+        self._ajustar_secuencia(cursor, tabla, columnas[0])
+        self._reportar(tabla, len(filas), inicio)
+        return filas
+
+    def _reportar(self, tabla, total, inicio):
+        self.stdout.write(f'  ✓ {tabla}: {total:,} filas en {time.perf_counter() - inicio:.1f}s')
+
+    # ------------------------------------------------------------------
+    # Generadores por tabla
+    # ------------------------------------------------------------------
+
+    def _proveedores(self, cursor):
+        primero = self._siguiente_id(cursor, 'proveedores', 'id_proveedor')
+        filas = [
+            (
+                primero + i,
+                f'Repuestos {self.rng.choice(APELLIDOS)} {primero + i} S.A.',
+                f'{self.rng.choice(NOMBRES)} {self.rng.choice(APELLIDOS)}',
+                f'505-{self.rng.randint(2000, 8999)}-{self.rng.randint(1000, 9999)}',
+                f'ventas{primero + i}@proveedor.com',
+                'Managua, Nicaragua',
+            )
+            for i in range(self.tamanos['proveedores'])
+        ]
+        columnas = ['id_proveedor', 'nombre_empresa', 'persona_contacto', 'telefono', 'email', 'direccion']
+        return columnas, filas
+
+    def _productos(self, cursor):
+        primero = self._siguiente_id(cursor, 'productos', 'id_producto')
+        filas = []
+        for i in range(self.tamanos['productos']):
+            id_producto = primero + i
+            categoria = self.rng.choice(CATEGORIAS_PRODUCTO)
+            marca = self.rng.choice(list(MARCAS_MOTO))
+            precio_compra = self.rng.randint(20, 5000)
+            precio_final = (Decimal(precio_compra) * Decimal(str(self.rng.uniform(1.15, 1.6)))).quantize(Decimal('0.01'))
+            minimo = self.rng.randint(2, 20)
+            actual = max(0, int(self.rng.gauss(minimo * 3, minimo * 2)))
+            filas.append((
+                id_producto,
+                f'{categoria[:3].upper()}-{id_producto:07d}',
+                f'{categoria} {marca} #{id_producto}',
+                actual,
+                actual + self.rng.randint(0, 200),
+                minimo,
+                precio_compra,
+                precio_final,
+            ))
+        columnas = [
+            'id_producto', 'sku_producto', 'nombre', 'cantidad_actual', 'cantidad_total',
+            'cantidad_minima', 'precio_compra_unitario', 'precio_final'
+        ]
+        return columnas, filas
+
+    def _clientes(self, cursor):
+        primero = self._siguiente_id(cursor, 'cliente', 'id_cliente')
+        filas = [
+            (
+                primero + i,
+                f'{self.rng.choice(NOMBRES)} {self.rng.choice(APELLIDOS)} {self.rng.choice(APELLIDOS)}',
+                f'8{self.rng.randint(100, 999)}-{self.rng.randint(1000, 9999)}',
+                f'cliente{primero + i}@email.com' if self.rng.random() < 0.7 else None,
+            )
+            for i in range(self.tamanos['clientes'])
+        ]
+        return ['id_cliente', 'nombre', 'telefono', 'email'], filas
+
+    def _motos(self, cursor, clientes):
+        primero = self._siguiente_id(cursor, 'motos', 'id_moto')
+        anio_actual = date.today().year
+        filas = []
+        for i in range(self.tamanos['motos']):
+            marca = self.rng.choice(list(MARCAS_MOTO))
+            filas.append((
+                primero + i,
+                self.rng.choice(clientes)[0],
+                marca,
+                self.rng.choice(MARCAS_MOTO[marca]),
+                self.rng.randint(anio_actual - 15, anio_actual),
+                f'M{primero + i:07d}',
+            ))
+        return ['id_moto', 'id_cliente', 'marca', 'modelo', 'aÑo', 'placa'], filas
+
+    def _ventas(self, cursor, clientes):
+        """Genera ventas y sus líneas por bloques para mantener memoria constante"""
+        inicio = time.perf_counter()
+        total_ventas = self.tamanos['ventas']
+        lineas_por_venta = self.tamanos['lineas_venta'] / total_ventas
+        id_venta = self._siguiente_id(cursor, 'ventas', 'id_venta')
+        total_lineas = 0
+
+        for desde in range(0, total_ventas, BLOQUE):
+            ventas, lineas = [], []
+            for _ in range(min(BLOQUE, total_ventas - desde)):
+                # Número de líneas: 1 + cola exponencial, con media ~lineas_por_venta
+                n_lineas = 1 + min(30, round(self.rng.expovariate(1 / max(lineas_por_venta - 1, 0.01))))
+                total = Decimal('0.00')
+                lineas_venta = []
+                for producto in {self._producto()[0] for _ in range(n_lineas)}:
+                    precio = self.precios[producto]
+                    cantidad = self.rng.choices((1, 2, 3, 4, 5, 10), (50, 25, 10, 6, 5, 4))[0]
+                    total += precio * cantidad
+                    lineas_venta.append((id_venta, producto, cantidad, precio))
+                cliente, fecha = self.rng.choice(clientes)[0], self._fecha()
+                ventas.append((id_venta, cliente, fecha, total))
+                # producto_venta.fecha repite la de la venta (clave de partición)
+                lineas.extend(linea + (fecha,) for linea in lineas_venta)
+                id_venta += 1
+
+            copy_rows(cursor, 'ventas', ['id_venta', 'id_cliente', 'fecha', 'total'], ventas)
+            copy_rows(
+                cursor, 'producto_venta', ['id_venta', 'id_producto', 'cantidad', 'precio_unitario', 'fecha'], lineas
+            )
+            total_lineas += len(lineas)
+
+        self._ajustar_secuencia(cursor, 'ventas', 'id_venta')
+        self._reportar('ventas', total_ventas, inicio)
+        self.stdout.write(f'  ✓ producto_venta: {total_lineas:,} filas')
+
+    def _compras(self, cursor, proveedores):
+        inicio = time.perf_counter()
+        id_orden = self._siguiente_id(cursor, 'orden_compra', 'id_orden')
+        total = self.tamanos['ordenes_compra']
+
+        for desde in range(0, total, BLOQUE):
+            ordenes, lineas = [], []
+            for _ in range(min(BLOQUE, total - desde)):
+                ordenes.append((
+                    id_orden,
+                    self.rng.choice(proveedores)[0],
+                    self.rng.choices((1, 2, 3), (5, 15, 80))[0],
+                    self._fecha(),
+                ))
+                for producto in {self._producto()[0] for _ in range(self.rng.randint(1, 6))}:
+                    lineas.append((id_orden, producto))
+                id_orden += 1
+
+            copy_rows(cursor, 'orden_compra', ['id_orden', 'id_proveedor', 'id_estado', 'fecha_creacion'], ordenes)
+            copy_rows(cursor, 'orden_producto', ['id_orden', 'id_producto'], lineas)
+
+        self._ajustar_secuencia(cursor, 'orden_compra', 'id_orden')
+        self._reportar('orden_compra', total, inicio)
+
+    def _movimientos(self, cursor):
+        inicio = time.perf_counter()
+        total = self.tamanos['movimientos']
+        tz = timezone.get_current_timezone()
+        tipos = (
+            ('ENTRADA', 'ORDEN_COMPRA'),
+            ('SALIDA', 'ORDEN_VENTA'),
+            ('AJUSTE', 'AJUSTE_MANUAL'),
+        )
+
+        def filas():
+            for i in range(total):
+                tipo, tipo_referencia = self.rng.choices(tipos, (30, 65, 5))[0]
+                momento = datetime.combine(
+                    self._fecha(),
+                    dtime(self.rng.randint(8, 18), self.rng.randint(0, 59), self.rng.randint(0, 59)),
+                    tzinfo=tz,
+                )
+                yield (
+                    self._producto()[0],
+                    tipo,
+                    self.rng.randint(1, 20),
+                    momento,
+                    f'REF-{i:08d}',
+                    tipo_referencia,
+                    None,
+                )
+
+        columnas = ['producto_id', 'tipo', 'cantidad', 'fecha', 'referencia', 'tipo_referencia', 'notas']
+        copy_rows(cursor, 'movimientos_inventario', columnas, filas())
+        self._reportar('movimientos_inventario', total, inicio)
@@ -0,0 +1,54 @@
+"""
+Importa el catálogo de productos desde un CSV (lista de precios del proveedor)
+
+Mismo proceso que POST /api/productos/importar/: COPY a una tabla temporal,
+validación en SQL y un solo INSERT ... ON CONFLICT (sku_producto).
+
+Columnas reconocidas (las demás se ignoran): sku_producto (obligatoria),
+nombre, precio_compra_unitario, precio_final, cantidad_minima.
+
+Uso:
+    python manage.py importar_productos lista_precios.csv
+    python manage.py importar_productos lista_precios.csv --simular --delimitador ';'
+"""
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from api.services import CatalogoService
+
+
+class Command(BaseCommand):
+    help = 'Crea o actualiza productos por SKU desde un CSV'
+
+    def add_arguments(self, parser):
+        parser.add_argument('archivo', help='Ruta del CSV (UTF-8, con encabezado)')
+        parser.add_argument('--simular', action='store_true', help='Validar y contar sin guardar cambios')
+        parser.add_argument('--delimitador', default=',', help='Separador de campos (default: ,)')
+
+    def handle(self, *args, **options):
+        inicio = time.perf_counter()
+        try:
+            with open(options['archivo'], 'rb') as archivo:
+                resultado = CatalogoService.importar_csv(
+                    archivo, simular=options['simular'], delimitador=options['delimitador']
+                )
+        except (OSError, ValueError) as e:
+            raise CommandError(str(e))
+        duracion = time.perf_counter() - inicio
+
+        for error in resultado['errores']:
+            self.stdout.write(self.style.WARNING(
+                f"  línea {error['linea']} ({error['sku_producto']}): {error['error']}"
+            ))
+        if resultado['rechazados'] > len(resultado['errores']):
+            self.stdout.write(f"  ... y {resultado['rechazados'] - len(resultado['errores'])} más")
+        if resultado['columnas_ignoradas']:
+            self.stdout.write(f"Columnas ignoradas: {', '.join(resultado['columnas_ignoradas'])}")
+
+        prefijo = '🔎 Simulación' if resultado['simulado'] else '✅ Importación'
+        self.stdout.write(self.style.SUCCESS(
+            f"{prefijo}: {resultado['total']:,} filas en {duracion:.1f}s — "
+            f"{resultado['insertados']:,} insertadas, {resultado['actualizados']:,} actualizadas, "
+            f"{resultado['sin_cambios']:,} sin cambios, {resultado['rechazados']:,} rechazadas"
+        ))
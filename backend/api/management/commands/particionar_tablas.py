@@ -0,0 +1,104 @@
+"""
+Particiona por mes las tablas que crecen sin límite (ventas, producto_venta,
+movimientos_inventario) y mantiene sus particiones futuras
+
+Cada tabla se reemplaza por una tabla particionada por rango con el mismo
+nombre, así que modelos y SQL no cambian; los reportes por rango de fechas
+solo leen las particiones de los meses pedidos. Ver ParticionesService.
+
+La conversión bloquea la tabla mientras copia las filas: ejecutarla en una
+ventana de mantenimiento. Las tablas ya particionadas se saltan, así que el
+comando se puede repetir sin riesgo. Después de convertir, basta con
+--solo-futuras (lo ejecutan docker-entrypoint.sh y run_report_worker).
+
+Uso:
+    python manage.py particionar_tablas
+    python manage.py particionar_tablas --tabla ventas --tabla producto_venta
+    python manage.py particionar_tablas --simular        # convierte y revierte
+    python manage.py particionar_tablas --solo-futuras   # solo crear meses próximos
+"""
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+
+from api.services import ParticionesService
+
+
+class Command(BaseCommand):
+    help = 'Convierte las tablas de ventas y movimientos en tablas particionadas por mes'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--tabla', action='append', choices=list(ParticionesService.TABLAS),
+            help='Tabla a procesar (repetible; default: todas)'
+        )
+        parser.add_argument(
+            '--meses-futuros', type=int, default=ParticionesService.MESES_FUTUROS,
+            help='Meses posteriores al actual con partición creada de antemano'
+        )
+        parser.add_argument(
+            '--solo-futuras', action='store_true',
+            help='No convertir tablas; solo crear particiones faltantes en las ya particionadas'
+        )
+        parser.add_argument('--simular', action='store_true', help='Hacer la conversión y revertirla')
+        parser.add_argument(
+            '--conservar-original', action='store_true',
+            help='Conservar la tabla original como <tabla>_sin_particionar'
+        )
+
+    def handle(self, *args, **options):
+        tablas = options['tabla'] or list(ParticionesService.TABLAS)
+
+        if not options['solo_futuras']:
+            for tabla in tablas:
+                self._particionar(tabla, options)
+
+        if options['simular']:
+            return
+
+        creadas = ParticionesService.mantener(tablas, options['meses_futuros'])
+        for nombre in creadas:
+            self.stdout.write(f'  + {nombre}')
+        self.stdout.write(self.style.SUCCESS(f'✅ {len(creadas)} partición(es) nueva(s)'))
+
+    def _particionar(self, tabla, options):
+        with connection.cursor() as cursor:
+            tipo = ParticionesService.tipo_tabla(cursor, tabla)
+        if tipo is None:
+            self.stdout.write(self.style.WARNING(f'⚠️  {tabla} no existe, se omite'))
+            return
+        if tipo == 'p':
+            self.stdout.write(f'{tabla} ya está particionada')
+            return
+
+        inicio = time.perf_counter()
+        try:
+            with transaction.atomic():
+                resultado = ParticionesService.particionar(
+                    tabla, options['meses_futuros'], options['conservar_original']
+                )
+                if options['simular']:
+                    transaction.set_rollback(True)
+        except ValueError as e:
+            raise CommandError(str(e))
+        duracion = time.perf_counter() - inicio
+
+        for nombre in resultado['llaves_ampliadas']:
+            self.stdout.write(f'  llave {nombre}: se agregó la columna de partición')
+        for nombre in resultado['fks_eliminadas']:
+            self.stdout.write(self.style.WARNING(
+                f'  ⚠️  llave foránea {nombre} eliminada (no puede apuntar a una tabla particionada)'
+            ))
+        for nombre in resultado['indices_omitidos']:
+            self.stdout.write(self.style.WARNING(
+                f'  ⚠️  índice único {nombre} omitido (no incluye la columna de partición)'
+            ))
+        if resultado['original']:
+            self.stdout.write(f"  tabla original conservada como {resultado['original']}")
+
+        prefijo = '🔎 Simulación' if options['simular'] else '✅'
+        self.stdout.write(self.style.SUCCESS(
+            f"{prefijo} {tabla}: {resultado['filas']:,} filas en "
+            f"{resultado['particiones']} partición(es) mensuales + default ({duracion:.1f}s)"
+        ))
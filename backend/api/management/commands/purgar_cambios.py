@@ -0,0 +1,23 @@
+"""
+Purga el registro de cambios usado por los endpoints /cambios/?since=
+
+Los clientes con un cursor más antiguo que la retención deben volver a hacer
+la carga completa. Pensado para ejecutarse a diario (cron).
+
+Uso:
+    python manage.py purgar_cambios --dias 7
+"""
+from django.core.management.base import BaseCommand
+
+from api.services import CambiosService
+
+
+class Command(BaseCommand):
+    help = 'Elimina del registro de cambios las entradas más antiguas que la retención'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dias', type=int, default=7, help='Días de cambios a conservar')
+
+    def handle(self, *args, **options):
+        eliminados = CambiosService.purgar(options['dias'])
+        self.stdout.write(self.style.SUCCESS(f'✅ {eliminados:,} cambio(s) eliminado(s)'))
@@ -0,0 +1,202 @@
+"""
+Reproduce tráfico real grabado contra un servidor local
+
+Lee el access log de Gunicorn (formato por defecto, el que escribe
+docker-entrypoint.sh con --access-logfile -) o un log JSON por línea
+({"ts": 1700000000.5, "method": "GET", "path": "/api/productos/?search=ac"})
+y reproduce la mezcla de peticiones con la concurrencia y tasa indicadas.
+
+Solo se reproducen peticiones GET/HEAD: el access log no guarda los cuerpos
+de las escrituras.
+
+La latencia se mide desde el momento programado de cada petición, no desde
+que un hilo la toma: si el servidor se atrasa y las peticiones esperan en la
+cola del pool, esa espera cuenta (evita la omisión coordinada). También se
+informa cuánto se atrasó el envío respecto del programa.
+
+Uso:
+    python manage.py replay_traffic access.log --concurrencia 16 --velocidad 2
+    python manage.py replay_traffic access.log --rps 100 --limite 20000
+"""
+import http.client
+import json
+import math
+import re
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from urllib.parse import urlsplit
+
+from django.core.management.base import BaseCommand, CommandError
+from django.urls import Resolver404, resolve
+
+
+# Formato por defecto de Gunicorn: %(h)s %(l)s %(u)s %(t)s "%(r)s" %(s)s %(b)s "%(f)s" "%(a)s"
+GUNICORN_LOG = re.compile(
+    r'^\S+ \S+ \S+ \[(?P<ts>[^\]]+)\] "(?P<method>[A-Z]+) (?P<path>\S+) [^"]*" (?P<status>\d{3}) '
+)
+METODOS_REPRODUCIBLES = {'GET', 'HEAD'}
+
+
+def leer_log(ruta):
+    """Retorna la lista de (timestamp, método, path) de un access log o log JSON"""
+    peticiones = []
+    with open(ruta, encoding='utf-8', errors='replace') as archivo:
+        for linea in archivo:
+            linea = linea.strip()
+            if not linea:
+                continue
+            if linea.startswith('{'):
+                registro = json.loads(linea)
+                peticion = (float(registro['ts']), registro.get('method', 'GET'), registro['path'])
+            else:
+                match = GUNICORN_LOG.match(linea)
+                if not match:
+                    continue
+                ts = datetime.strptime(match['ts'], '%d/%b/%Y:%H:%M:%S %z').timestamp()
+                peticion = (ts, match['method'], match['path'])
+            if peticion[1] in METODOS_REPRODUCIBLES:
+                peticiones.append(peticion)
+    peticiones.sort(key=lambda p: p[0])
+    return peticiones
+
+
+def nombre_ruta(path):
+    """Nombre de la ruta de Django para agrupar resultados (igual que las métricas)"""
+    try:
+        match = resolve(urlsplit(path).path)
+    except Resolver404:
+        return 'sin_ruta'
+    return match.url_name or match.view_name
+
+
+def percentil(valores, p):
+    ordenados = sorted(valores)
+    return ordenados[max(0, math.ceil(p / 100 * len(ordenados)) - 1)]
+
+
+class Command(BaseCommand):
+    help = 'Reproduce un access log de Gunicorn contra un servidor y reporta latencia por ruta'
+
+    def add_arguments(self, parser):
+        parser.add_argument('log', help='Access log de Gunicorn o log JSON por línea')
+        parser.add_argument('--base-url', default='http://localhost:8000', help='Servidor destino')
+        parser.add_argument('--concurrencia', type=int, default=8, help='Conexiones simultáneas')
+        parser.add_argument(
+            '--velocidad', type=float, default=1.0,
+            help='Multiplicador del ritmo original (2 = el doble de rápido, 0 = sin esperas)'
+        )
+        parser.add_argument('--rps', type=float, default=None, help='Tasa fija de peticiones por segundo')
+        parser.add_argument('--limite', type=int, default=None, help='Máximo de peticiones a reproducir')
+        parser.add_argument('--timeout', type=float, default=60.0, help='Timeout por petición en segundos')
+
+    def handle(self, *args, **options):
+        peticiones = leer_log(options['log'])[:options['limite']]
+        if not peticiones:
+            raise CommandError('El log no contiene peticiones GET reproducibles')
+
+        destino = urlsplit(options['base_url'])
+        self.host = destino.hostname
+        self.port = destino.port or (443 if destino.scheme == 'https' else 80)
+        self.https = destino.scheme == 'https'
+        self.timeout = options['timeout']
+        self.local = threading.local()
+        self.lock = threading.Lock()
+        self.resultados = defaultdict(list)   # ruta -> [(latencia_ms, status)]
+        self.esperas_cola = []                # ms entre el momento programado y la salida real
+        retrasos_envio = []                   # ms de atraso del bucle que programa los envíos
+
+        self.stdout.write(
+            f'🚀 Reproduciendo {len(peticiones):,} peticiones contra {options["base_url"]} '
+            f'(concurrencia={options["concurrencia"]})'
+        )
+
+        inicio = time.perf_counter()
+        origen = peticiones[0][0]
+        with ThreadPoolExecutor(max_workers=options['concurrencia']) as executor:
+            for i, (ts, metodo, path) in enumerate(peticiones):
+                # Carga de lazo abierto: cada petición sale en su momento programado
+                if options['rps']:
+                    programado = i / options['rps']
+                elif options['velocidad'] > 0:
+                    programado = (ts - origen) / options['velocidad']
+                else:
+                    programado = None
+                if programado is None:
+                    # Sin ritmo: la petición está programada cuando se encola
+                    momento = time.perf_counter()
+                else:
+                    momento = inicio + programado
+                    espera = momento - time.perf_counter()
+                    if espera > 0:
+                        time.sleep(espera)
+                    retrasos_envio.append(max(0.0, time.perf_counter() - momento) * 1000)
+                executor.submit(self._enviar, metodo, path, momento)
+        duracion = time.perf_counter() - inicio
+
+        self._reportar(duracion, retrasos_envio)
+
+    def _conexion(self):
+        """Conexión keep-alive propia de cada hilo"""
+        if getattr(self.local, 'conexion', None) is None:
+            clase = http.client.HTTPSConnection if self.https else http.client.HTTPConnection
+            self.local.conexion = clase(self.host, self.port, timeout=self.timeout)
+        return self.local.conexion
+
+    def _enviar(self, metodo, path, programado):
+        """Envía una petición; la latencia cuenta desde `programado` (perf_counter)"""
+        espera_cola = (time.perf_counter() - programado) * 1000
+        try:
+            conexion = self._conexion()
+            conexion.request(metodo, path, headers={'Accept': 'application/json'})
+            respuesta = conexion.getresponse()
+            respuesta.read()
+            status = respuesta.status
+        except (OSError, http.client.HTTPException):
+            self.local.conexion = None
+            status = 0
+        latencia = (time.perf_counter() - programado) * 1000
+
+        with self.lock:
+            self.resultados[nombre_ruta(path)].append((latencia, status))
+            self.esperas_cola.append(espera_cola)
+
+    def _reportar(self, duracion, retrasos_envio):
+        total = sum(len(r) for r in self.resultados.values())
+        errores_total = sum(1 for r in self.resultados.values() for _, s in r if s == 0 or s >= 500)
+
+        self.stdout.write(
+            f"\n{'ruta':<28}{'peticiones':>11}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'4xx':>7}{'5xx/err':>9}"
+        )
+        for ruta, registros in sorted(self.resultados.items(), key=lambda r: -len(r[1])):
+            latencias = [l for l, _ in registros]
+            cliente = sum(1 for _, s in registros if 400 <= s < 500)
+            servidor = sum(1 for _, s in registros if s == 0 or s >= 500)
+            self.stdout.write(
+                f'{ruta:<28}{len(registros):>11}{percentil(latencias, 50):>10.1f}'
+                f'{percentil(latencias, 95):>10.1f}{percentil(latencias, 99):>10.1f}'
+                f'{cliente:>7}{servidor:>9}'
+            )
+
+        todas = [l for r in self.resultados.values() for l, _ in r]
+        self.stdout.write(
+            f'\nTotal: {total:,} peticiones en {duracion:.1f}s '
+            f'({total / duracion:.1f} req/s), p99 global {percentil(todas, 99):.1f} ms, '
+            f'errores 5xx/conexión {errores_total / total:.2%}'
+        )
+        self.stdout.write(
+            f'Espera antes de enviar (cola del pool): p99 {percentil(self.esperas_cola, 99):.1f} ms, '
+            f'máx {max(self.esperas_cola):.1f} ms'
+        )
+        if retrasos_envio:
+            atrasadas = sum(1 for r in retrasos_envio if r > 1)
+            self.stdout.write(
+                f'Atraso del programa de envíos: p99 {percentil(retrasos_envio, 99):.1f} ms, '
+                f'máx {max(retrasos_envio):.1f} ms ({atrasadas:,} peticiones con más de 1 ms)'
+            )
+            if atrasadas:
+                self.stdout.write(self.style.WARNING(
+                    '⚠️  El generador no alcanzó la tasa pedida: la carga real fue menor que la programada'
+                ))
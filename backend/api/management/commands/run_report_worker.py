@@ -0,0 +1,76 @@
+"""
+Worker de reportes en segundo plano
+
+Consume la tabla reporte_jobs con SELECT ... FOR UPDATE SKIP LOCKED, así que
+pueden correr varios workers a la vez sin repartirse el mismo trabajo.
+
+También crea periódicamente las particiones de los próximos meses de las
+tablas particionadas (ver particionar_tablas).
+
+Uso:
+    python manage.py run_report_worker
+    python manage.py run_report_worker --una-vez   # procesar la cola y salir
+"""
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from api.services import ParticionesService, ReporteCompartidoService, ReporteJobService
+
+
+class Command(BaseCommand):
+    help = 'Procesa la cola de reportes en segundo plano'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--intervalo', type=float, default=2.0, help='Segundos de espera con la cola vacía')
+        parser.add_argument(
+            '--timeout', type=int, default=600,
+            help='Segundos tras los cuales un trabajo en proceso se considera abandonado'
+        )
+        parser.add_argument('--retencion-dias', type=int, default=7, help='Días que se conservan los trabajos terminados')
+        parser.add_argument('--una-vez', action='store_true', help='Procesar los trabajos pendientes y terminar')
+        parser.add_argument(
+            '--intervalo-particiones', type=float, default=3600,
+            help='Segundos entre revisiones de particiones futuras (0 para desactivar)'
+        )
+
+    def handle(self, *args, **options):
+        self.stdout.write('🚀 Worker de reportes iniciado')
+        ultima_revision = None
+
+        while True:
+            close_old_connections()
+            intervalo_particiones = options['intervalo_particiones']
+            if intervalo_particiones and (
+                ultima_revision is None or time.monotonic() - ultima_revision >= intervalo_particiones
+            ):
+                ultima_revision = time.monotonic()
+                for nombre in ParticionesService.mantener():
+                    self.stdout.write(f'🗂️  Partición {nombre} creada')
+            recuperados = ReporteJobService.recuperar_abandonados(options['timeout'])
+            if recuperados:
+                self.stdout.write(f'↩️  {recuperados} trabajo(s) abandonado(s) devuelto(s) a la cola')
+
+            procesados = 0
+            while (job := ReporteJobService.tomar_siguiente()) is not None:
+                inicio = time.perf_counter()
+                job = ReporteJobService.ejecutar(job)
+                duracion = time.perf_counter() - inicio
+                if job.estado == 'COMPLETADO':
+                    self.stdout.write(f'✅ {job} en {duracion:.1f}s')
+                else:
+                    self.stdout.write(self.style.ERROR(f'❌ {job}: {job.error}'))
+                procesados += 1
+                close_old_connections()
+
+            if options['una_vez']:
+                ReporteJobService.limpiar(options['retencion_dias'])
+                ReporteCompartidoService.limpiar()
+                self.stdout.write(f'{procesados} trabajo(s) procesado(s)')
+                return
+
+            if not procesados:
+                ReporteJobService.limpiar(options['retencion_dias'])
+                ReporteCompartidoService.limpiar()
+                time.sleep(options['intervalo'])
@@ -0,0 +1,311 @@
+"""
+Métricas de Inventrix en formato Prometheus
+
+Cuando la variable de entorno PROMETHEUS_MULTIPROC_DIR está definida (ver
+docker-entrypoint.sh), prometheus_client guarda los valores en archivos
+mmap compartidos y el endpoint agrega los de todos los workers de Gunicorn.
+"""
+import hmac
+import inspect
+import ipaddress
+import os
+import threading
+import time
+from contextlib import ExitStack, contextmanager
+from contextvars import ContextVar
+from functools import wraps
+
+from django.conf import settings
+from django.db import connections
+from django.http import HttpResponse, HttpResponseForbidden
+from prometheus_client import (
+    CONTENT_TYPE_LATEST, REGISTRY, CollectorRegistry, Counter, Gauge, Histogram,
+    generate_latest, multiprocess
+)
+
+
+# Buckets pensados para calcular p50/p95/p99 de endpoints interactivos y reportes
+LATENCY_BUCKETS = (
+    0.005, 0.01, 0.025, 0.05, 0.075, 0.1, 0.25, 0.5, 0.75,
+    1.0, 2.5, 5.0, 10.0, 30.0, 60.0
+)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100, 200, 500)
+LOCK_WAIT_BUCKETS = (0.0005, 0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 5.0)
+
+
+# ============================================================================
+# DEFINICIÓN DE MÉTRICAS
+# ============================================================================
+
+REQUEST_LATENCY = Histogram(
+    'inventrix_http_request_duration_seconds',
+    'Latencia de peticiones HTTP por ruta',
+    ['route', 'method'],
+    buckets=LATENCY_BUCKETS,
+)
+
+REQUESTS_TOTAL = Counter(
+    'inventrix_http_requests_total',
+    'Peticiones HTTP por ruta y código de estado',
+    ['route', 'method', 'status'],
+)
+
+DB_QUERIES_PER_REQUEST = Histogram(
+    'inventrix_db_queries_per_request',
+    'Consultas SQL ejecutadas por petición',
+    ['route'],
+    buckets=QUERY_COUNT_BUCKETS,
+)
+
+DB_QUERIES_TOTAL = Counter(
+    'inventrix_db_queries_total',
+    'Consultas SQL ejecutadas',
+    ['route'],
+)
+
+CACHE_REQUESTS_TOTAL = Counter(
+    'inventrix_cache_requests_total',
+    'Consultas a cachés internas (hit/miss)',
+    ['cache', 'result'],
+)
+
+CACHE_INVALIDACIONES_TOTAL = Counter(
+    'inventrix_cache_invalidations_total',
+    'Invalidaciones de cachés internas (local, remota por NOTIFY, o vaciado por reconexión del LISTEN)',
+    ['origen'],
+)
+
+STOCK_LOCK_WAIT = Histogram(
+    'inventrix_stock_lock_wait_seconds',
+    'Tiempo de espera del bloqueo de fila al actualizar stock',
+    buckets=LOCK_WAIT_BUCKETS,
+)
+
+REPORT_DURATION = Histogram(
+    'inventrix_report_duration_seconds',
+    'Duración de la generación de reportes',
+    ['reporte'],
+    buckets=LATENCY_BUCKETS,
+)
+
+# Pool de conexiones (psycopg_pool). Los gauges se suman entre workers vivos.
+DB_POOL_CONNECTIONS = Gauge(
+    'inventrix_db_pool_connections',
+    'Conexiones del pool por estado (abiertas, disponibles, máximo)',
+    ['alias', 'state'],
+    multiprocess_mode='livesum',
+)
+
+DB_POOL_WAITING = Gauge(
+    'inventrix_db_pool_waiting',
+    'Peticiones esperando una conexión del pool',
+    ['alias'],
+    multiprocess_mode='livesum',
+)
+
+DB_POOL_CHECKOUTS_TOTAL = Counter(
+    'inventrix_db_pool_checkouts_total',
+    'Conexiones pedidas al pool (inmediatas, tras esperar en cola, o con error por timeout)',
+    ['alias', 'result'],
+)
+
+DB_POOL_WAIT_SECONDS = Counter(
+    'inventrix_db_pool_wait_seconds_total',
+    'Tiempo total esperado por una conexión del pool',
+    ['alias'],
+)
+
+DB_CONNECT_SECONDS = Counter(
+    'inventrix_db_connect_seconds_total',
+    'Tiempo total dedicado a abrir conexiones nuevas a PostgreSQL',
+    ['alias'],
+)
+
+DB_CONNECTIONS_OPENED = Counter(
+    'inventrix_db_connections_opened_total',
+    'Conexiones nuevas abiertas a PostgreSQL por el pool',
+    ['alias'],
+)
+
+# Eventos en tiempo real (SSE, ver api/eventos.py)
+SSE_CLIENTES = Gauge(
+    'inventrix_sse_clients',
+    'Clientes conectados al stream de eventos',
+    multiprocess_mode='livesum',
+)
+
+SSE_EVENTOS_TOTAL = Counter(
+    'inventrix_sse_events_total',
+    'Notificaciones recibidas de PostgreSQL por tipo de evento',
+    ['tipo'],
+)
+
+SSE_RECONEXIONES_TOTAL = Counter(
+    'inventrix_sse_listener_reconnects_total',
+    'Reconexiones de la conexión LISTEN del proceso',
+)
+
+
+# ============================================================================
+# HELPERS
+# ============================================================================
+
+def nombre_ruta(request):
+    """
+    Retorna el nombre de la ruta resuelta (ej: 'producto-list', 'reporte-ventas')
+
+    Se usa el nombre y no el path para no crear una serie por cada ID.
+    """
+    match = getattr(request, 'resolver_match', None)
+    if match is None:
+        return 'sin_ruta'
+    return match.url_name or match.view_name or 'sin_nombre'
+
+
+def registrar_cache(cache, hit):
+    """Registra un hit o miss de una caché interna"""
+    CACHE_REQUESTS_TOTAL.labels(cache=cache, result='hit' if hit else 'miss').inc()
+
+
+def medir_reporte(nombre):
+    """Decorador que registra la duración de generación de un reporte (síncrono o async)"""
+    def decorador(func):
+        if inspect.iscoroutinefunction(func):
+            @wraps(func)
+            async def wrapper_async(*args, **kwargs):
+                inicio = time.perf_counter()
+                try:
+                    return await func(*args, **kwargs)
+                finally:
+                    REPORT_DURATION.labels(reporte=nombre).observe(time.perf_counter() - inicio)
+            return wrapper_async
+
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            inicio = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                REPORT_DURATION.labels(reporte=nombre).observe(time.perf_counter() - inicio)
+        return wrapper
+    return decorador
+
+
+def registrar_pools():
+    """
+    Vuelca las estadísticas de los pools de conexiones de este proceso
+
+    Usa pop_stats(), que retorna los contadores acumulados desde la última
+    llamada, así cada volcado suma solo lo nuevo.
+    """
+    for conexion in connections.all(initialized_only=True):
+        pool = getattr(conexion, 'pool', None)
+        if pool is None:
+            continue
+        stats = pool.pop_stats()
+        alias = conexion.alias
+
+        DB_POOL_CONNECTIONS.labels(alias=alias, state='abiertas').set(stats.get('pool_size', 0))
+        DB_POOL_CONNECTIONS.labels(alias=alias, state='disponibles').set(stats.get('pool_available', 0))
+        DB_POOL_CONNECTIONS.labels(alias=alias, state='maximo').set(stats.get('pool_max', 0))
+        DB_POOL_WAITING.labels(alias=alias).set(stats.get('requests_waiting', 0))
+
+        pedidas = stats.get('requests_num', 0)
+        en_cola = stats.get('requests_queued', 0)
+        errores = stats.get('requests_errors', 0)
+        DB_POOL_CHECKOUTS_TOTAL.labels(alias=alias, result='inmediata').inc(max(pedidas - en_cola, 0))
+        DB_POOL_CHECKOUTS_TOTAL.labels(alias=alias, result='en_cola').inc(en_cola)
+        DB_POOL_CHECKOUTS_TOTAL.labels(alias=alias, result='error').inc(errores)
+        DB_POOL_WAIT_SECONDS.labels(alias=alias).inc(stats.get('requests_wait_ms', 0) / 1000)
+        DB_CONNECT_SECONDS.labels(alias=alias).inc(stats.get('connections_ms', 0) / 1000)
+        DB_CONNECTIONS_OPENED.labels(alias=alias).inc(stats.get('connections_num', 0))
+
+
+class ContadorConsultas:
+    """
+    execute_wrapper de Django que cuenta las consultas ejecutadas
+
+    Puede estar instalado a la vez en conexiones de varios hilos (ver
+    contar_consultas).
+    """
+
+    def __init__(self):
+        self.total = 0
+        self._lock = threading.Lock()
+
+    def __call__(self, execute, sql, params, many, context):
+        with self._lock:
+            self.total += 1
+        return execute(sql, params, many, context)
+
+
+# Contador de la petición en curso; los hilos creados con sync_to_async lo
+# heredan junto con el resto del contexto
+_contador_peticion = ContextVar('contador_consultas', default=None)
+
+
+@contextmanager
+def contar_consultas(contador=None):
+    """
+    Cuenta las consultas de las conexiones de este hilo
+
+    Las conexiones de Django son por hilo: el execute_wrapper que instala
+    MetricsMiddleware no ve las consultas de los hilos de sync_to_async
+    (reportes async). Sin `contador` se usa el de la petición en curso, así
+    que esos hilos envuelven su trabajo con `contar_consultas()`. Con
+    `contador` además queda como el de la petición dentro del bloque.
+    """
+    token = None
+    if contador is None:
+        contador = _contador_peticion.get()
+    else:
+        token = _contador_peticion.set(contador)
+    try:
+        with ExitStack() as stack:
+            if contador is not None:
+                for conexion in connections.all():
+                    if contador not in conexion.execute_wrappers:
+                        stack.enter_context(conexion.execute_wrapper(contador))
+            yield contador
+    finally:
+        if token is not None:
+            _contador_peticion.reset(token)
+
+
+# ============================================================================
+# ENDPOINT
+# ============================================================================
+
+def _redes_permitidas():
+    return [ipaddress.ip_network(red.strip(), strict=False)
+            for red in settings.METRICS_ALLOWED_IPS if red.strip()]
+
+
+def acceso_metricas_permitido(request):
+    """
+    Las métricas revelan rutas, volumen de tráfico y estado de la base: se
+    sirven con `Authorization: Bearer <METRICS_TOKEN>` o a las IPs/redes de
+    METRICS_ALLOWED_IPS
+    """
+    token = settings.METRICS_TOKEN
+    if token:
+        autorizacion = request.META.get('HTTP_AUTHORIZATION', '')
+        if hmac.compare_digest(autorizacion.encode(), f'Bearer {token}'.encode()):
+            return True
+    try:
+        ip = ipaddress.ip_address(request.META.get('REMOTE_ADDR', ''))
+    except ValueError:
+        return False
+    return any(ip in red for red in _redes_permitidas())
+
+
+def metrics_view(request):
+    """Expone las métricas en formato de texto de Prometheus"""
+    if not acceso_metricas_permitido(request):
+        return HttpResponseForbidden()
+    if os.getenv('PROMETHEUS_MULTIPROC_DIR'):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return HttpResponse(generate_latest(registry), content_type=CONTENT_TYPE_LATEST)
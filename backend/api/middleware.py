@@ -1,13 +1,21 @@
 """
-Middleware para manejo de errores global
+Middleware para manejo de errores global y métricas
 """
 import logging
+import time
 import traceback
+from django.conf import settings
 from django.http import JsonResponse
 from django.core.exceptions import ValidationError, PermissionDenied, ObjectDoesNotExist
 from rest_framework.exceptions import APIException
 from rest_framework import status
 
+from .metrics import (
+    ContadorConsultas, DB_QUERIES_PER_REQUEST, DB_QUERIES_TOTAL,
+    REQUEST_LATENCY, REQUESTS_TOTAL, contar_consultas, nombre_ruta, registrar_pools
+)
+from .db_router import activar_lecturas_replica, replica_configurada, restaurar_lecturas, ruta_de_lectura
+
 logger = logging.getLogger(__name__)
 
 
@@ -80,3 +88,77 @@ class ErrorHandlingMiddleware:
             error_response['error']['method'] = request.method
 
         return JsonResponse(error_response, status=status_code)
+
+
+class MetricsMiddleware:
+    """
+    Middleware que registra latencia, código de estado y número de consultas
+    SQL por ruta (nombre de ruta del router de DRF), y el estado del pool de
+    conexiones del proceso
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        inicio = time.perf_counter()
+
+        # Incluye las consultas de los hilos que usan contar_consultas() (reportes async)
+        with contar_consultas(ContadorConsultas()) as contador:
+            response = self.get_response(request)
+
+        duracion = time.perf_counter() - inicio
+        ruta = nombre_ruta(request)
+
+        REQUEST_LATENCY.labels(route=ruta, method=request.method).observe(duracion)
+        REQUESTS_TOTAL.labels(
+            route=ruta, method=request.method, status=str(response.status_code)
+        ).inc()
+        DB_QUERIES_PER_REQUEST.labels(route=ruta).observe(contador.total)
+        DB_QUERIES_TOTAL.labels(route=ruta).inc(contador.total)
+        registrar_pools()
+
+        return response
+
+
+class ReplicaMiddleware:
+    """
+    Decide por petición si las lecturas pueden ir a la réplica
+
+    Los GET/HEAD a listados y reportes leen de la réplica. Tras una escritura
+    exitosa el cliente lee de la primaria durante DB_REPLICA_RYW_SECONDS
+    (read-your-writes), para que vea sus cambios aunque la réplica tenga
+    retraso. El cliente lo indica con la cookie o el header que envía esta
+    misma respuesta (el frontend usa el header porque es de otro origen).
+    """
+
+    COOKIE = 'inventrix_leer_primaria'
+    HEADER_SEGUNDOS = 'X-Leer-Primaria-Segundos'
+    HEADER_PETICION = 'HTTP_X_LEER_PRIMARIA'
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        request.token_replica = None
+        try:
+            response = self.get_response(request)
+        finally:
+            if request.token_replica is not None:
+                restaurar_lecturas(request.token_replica)
+
+        if request.method not in ('GET', 'HEAD', 'OPTIONS') and response.status_code < 400 and replica_configurada():
+            segundos = settings.DB_REPLICA_RYW_SECONDS
+            response.set_cookie(self.COOKIE, '1', max_age=segundos, httponly=True, samesite='Lax')
+            response[self.HEADER_SEGUNDOS] = str(segundos)
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        if (
+            request.method in ('GET', 'HEAD')
+            and self.COOKIE not in request.COOKIES
+            and self.HEADER_PETICION not in request.META
+            and ruta_de_lectura(nombre_ruta(request))
+        ):
+            request.token_replica = activar_lecturas_replica()
+        return None
@@ -0,0 +1,117 @@
+"""
+Registro de cambios por triggers para sincronización incremental (?since=)
+
+Las tablas de negocio son heredadas (no administradas por Django) y no tienen
+updated_at, así que cada INSERT/UPDATE/DELETE se anota en registro_cambios
+desde un trigger; así quedan incluidos los DELETE por SQL directo de
+perform_destroy y las escrituras de otros sistemas.
+
+Las tablas que aún no existen (ej: base de tests) se saltan; volver a aplicar
+la migración (migrate api 0001 && migrate api) instala los triggers faltantes.
+"""
+from django.db import migrations
+
+
+# (tabla, recurso, columna con el id del recurso, operación fija o '' para usar la del trigger)
+# Las líneas de una orden se registran como modificación de la orden.
+TABLAS = [
+    ('productos', 'productos', 'id_producto', ''),
+    ('cliente', 'clientes', 'id_cliente', ''),
+    ('proveedores', 'proveedores', 'id_proveedor', ''),
+    ('ventas', 'ordenes-venta', 'id_venta', ''),
+    ('producto_venta', 'ordenes-venta', 'id_venta', 'U'),
+    ('orden_compra', 'ordenes-compra', 'id_orden', ''),
+    ('orden_producto', 'ordenes-compra', 'id_orden', 'U'),
+]
+
+VALORES = ',\n            '.join(
+    f"('{tabla}', '{recurso}', '{columna}', '{operacion}')" for tabla, recurso, columna, operacion in TABLAS
+)
+
+CREAR = f"""
+CREATE TABLE IF NOT EXISTS registro_cambios (
+    id bigserial PRIMARY KEY,
+    recurso varchar(50) NOT NULL,
+    id_registro bigint NOT NULL,
+    operacion char(1) NOT NULL,
+    xid xid8 NOT NULL DEFAULT pg_current_xact_id(),
+    fecha timestamptz NOT NULL DEFAULT now()
+);
+
+-- El cursor de sincronización es (xid, id): ver CambiosService
+CREATE INDEX IF NOT EXISTS registro_cambios_cursor_idx ON registro_cambios (recurso, xid, id);
+CREATE INDEX IF NOT EXISTS registro_cambios_fecha_idx ON registro_cambios (fecha);
+
+CREATE OR REPLACE FUNCTION registrar_cambio() RETURNS trigger AS $$
+DECLARE
+    fila jsonb;
+BEGIN
+    IF TG_OP = 'DELETE' THEN
+        fila := to_jsonb(OLD);
+    ELSE
+        fila := to_jsonb(NEW);
+    END IF;
+
+    INSERT INTO registro_cambios (recurso, id_registro, operacion)
+    VALUES (
+        TG_ARGV[0],
+        (fila ->> TG_ARGV[1])::bigint,
+        COALESCE(NULLIF(TG_ARGV[2], ''), left(TG_OP, 1))
+    );
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DO $$
+DECLARE
+    t record;
+BEGIN
+    FOR t IN
+        SELECT * FROM (VALUES
+            {VALORES}
+        ) AS v(tabla, recurso, columna, operacion)
+    LOOP
+        IF to_regclass(t.tabla) IS NOT NULL THEN
+            EXECUTE format('DROP TRIGGER IF EXISTS registrar_cambio ON %I', t.tabla);
+            EXECUTE format(
+                'CREATE TRIGGER registrar_cambio AFTER INSERT OR UPDATE OR DELETE ON %I '
+                'FOR EACH ROW EXECUTE FUNCTION registrar_cambio(%L, %L, %L)',
+                t.tabla, t.recurso, t.columna, t.operacion
+            );
+        END IF;
+    END LOOP;
+END;
+$$;
+"""
+
+ELIMINAR = f"""
+DO $$
+DECLARE
+    t record;
+BEGIN
+    FOR t IN
+        SELECT * FROM (VALUES
+            {VALORES}
+        ) AS v(tabla, recurso, columna, operacion)
+    LOOP
+        IF to_regclass(t.tabla) IS NOT NULL THEN
+            EXECUTE format('DROP TRIGGER IF EXISTS registrar_cambio ON %I', t.tabla);
+        END IF;
+    END LOOP;
+END;
+$$;
+
+DROP FUNCTION IF EXISTS registrar_cambio();
+DROP TABLE IF EXISTS registro_cambios;
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.RunSQL(CREAR, ELIMINAR),
+    ]
@@ -0,0 +1,151 @@
+"""
+Eventos en tiempo real por LISTEN/NOTIFY (ver api/eventos.py)
+
+Todos los eventos se publican en el canal `inventrix_eventos` con un JSON:
+
+- stock:  cambia cantidad_actual de un producto
+- venta:  se crea o modifica una venta
+- orden_compra: se crea o cambia de estado una orden de compra
+- cambio: hubo cambios en un recurso del registro de cambios (?since=).
+          Postgres descarta los NOTIFY idénticos dentro de una transacción,
+          así que una escritura masiva genera un solo evento por recurso.
+
+Los NOTIFY se entregan al hacer COMMIT; un ROLLBACK no publica nada.
+"""
+from django.db import migrations
+
+
+CANAL = 'inventrix_eventos'
+
+# (tabla, función, condición del trigger)
+TRIGGERS = [
+    ('productos', 'notificar_stock', 'AFTER UPDATE OF cantidad_actual',
+     'WHEN (OLD.cantidad_actual IS DISTINCT FROM NEW.cantidad_actual)'),
+    ('ventas', 'notificar_venta', 'AFTER INSERT OR UPDATE', ''),
+    ('orden_compra', 'notificar_orden_compra', 'AFTER INSERT OR UPDATE OF id_estado', ''),
+]
+
+VALORES = ',\n            '.join(
+    f"('{tabla}', '{funcion}', '{evento}', '{condicion}')" for tabla, funcion, evento, condicion in TRIGGERS
+)
+
+REGISTRAR_CAMBIO = """
+CREATE OR REPLACE FUNCTION registrar_cambio() RETURNS trigger AS $$
+DECLARE
+    fila jsonb;
+BEGIN
+    IF TG_OP = 'DELETE' THEN
+        fila := to_jsonb(OLD);
+    ELSE
+        fila := to_jsonb(NEW);
+    END IF;
+
+    INSERT INTO registro_cambios (recurso, id_registro, operacion)
+    VALUES (
+        TG_ARGV[0],
+        (fila ->> TG_ARGV[1])::bigint,
+        COALESCE(NULLIF(TG_ARGV[2], ''), left(TG_OP, 1))
+    );
+    {notificar}
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+"""
+
+CREAR = REGISTRAR_CAMBIO.replace(
+    '{notificar}',
+    f"PERFORM pg_notify('{CANAL}', json_build_object('tipo', 'cambio', 'recurso', TG_ARGV[0])::text);"
+) + f"""
+CREATE OR REPLACE FUNCTION notificar_stock() RETURNS trigger AS $$
+BEGIN
+    PERFORM pg_notify('{CANAL}', json_build_object(
+        'tipo', 'stock',
+        'id_producto', NEW.id_producto,
+        'sku_producto', NEW.sku_producto,
+        'cantidad_actual', NEW.cantidad_actual,
+        'cantidad_minima', NEW.cantidad_minima
+    )::text);
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION notificar_venta() RETURNS trigger AS $$
+BEGIN
+    PERFORM pg_notify('{CANAL}', json_build_object(
+        'tipo', 'venta',
+        'operacion', left(TG_OP, 1),
+        'id_venta', NEW.id_venta,
+        'id_cliente', NEW.id_cliente,
+        'fecha', NEW.fecha,
+        'total', NEW.total
+    )::text);
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION notificar_orden_compra() RETURNS trigger AS $$
+BEGIN
+    PERFORM pg_notify('{CANAL}', json_build_object(
+        'tipo', 'orden_compra',
+        'operacion', left(TG_OP, 1),
+        'id_orden', NEW.id_orden,
+        'id_proveedor', NEW.id_proveedor,
+        'id_estado', NEW.id_estado
+    )::text);
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DO $$
+DECLARE
+    t record;
+BEGIN
+    FOR t IN
+        SELECT * FROM (VALUES
+            {VALORES}
+        ) AS v(tabla, funcion, evento, condicion)
+    LOOP
+        IF to_regclass(t.tabla) IS NOT NULL THEN
+            EXECUTE format('DROP TRIGGER IF EXISTS %I ON %I', t.funcion, t.tabla);
+            EXECUTE format(
+                'CREATE TRIGGER %I %s ON %I FOR EACH ROW %s EXECUTE FUNCTION %I()',
+                t.funcion, t.evento, t.tabla, t.condicion, t.funcion
+            );
+        END IF;
+    END LOOP;
+END;
+$$;
+"""
+
+ELIMINAR = f"""
+DO $$
+DECLARE
+    t record;
+BEGIN
+    FOR t IN
+        SELECT * FROM (VALUES
+            {VALORES}
+        ) AS v(tabla, funcion, evento, condicion)
+    LOOP
+        IF to_regclass(t.tabla) IS NOT NULL THEN
+            EXECUTE format('DROP TRIGGER IF EXISTS %I ON %I', t.funcion, t.tabla);
+        END IF;
+    END LOOP;
+END;
+$$;
+
+DROP FUNCTION IF EXISTS notificar_stock();
+DROP FUNCTION IF EXISTS notificar_venta();
+DROP FUNCTION IF EXISTS notificar_orden_compra();
+""" + REGISTRAR_CAMBIO.replace('{notificar}', '')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0002_registro_cambios'),
+    ]
+
+    operations = [
+        migrations.RunSQL(CREAR, ELIMINAR),
+    ]
@@ -0,0 +1,44 @@
+"""
+Índice único en productos.sku_producto
+
+Lo necesita la importación de catálogo (INSERT ... ON CONFLICT (sku_producto))
+y garantiza que el SKU identifique a un solo producto.
+
+Si la tabla ya tiene SKUs repetidos el índice no se crea (se emite un
+WARNING) y la importación responde con un error hasta que se corrijan; luego
+volver a aplicar la migración (migrate api 0003 && migrate api).
+"""
+from django.db import migrations
+
+
+INDICE = 'productos_sku_producto_uniq'
+
+CREAR = f"""
+DO $$
+BEGIN
+    IF to_regclass('productos') IS NULL THEN
+        RETURN;
+    END IF;
+
+    IF EXISTS (SELECT 1 FROM productos GROUP BY sku_producto HAVING count(*) > 1) THEN
+        RAISE WARNING 'productos tiene SKUs repetidos; no se creó el índice {INDICE}';
+        RETURN;
+    END IF;
+
+    CREATE UNIQUE INDEX IF NOT EXISTS {INDICE} ON productos (sku_producto);
+END;
+$$;
+"""
+
+ELIMINAR = f'DROP INDEX IF EXISTS {INDICE};'
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0003_eventos'),
+    ]
+
+    operations = [
+        migrations.RunSQL(CREAR, ELIMINAR),
+    ]
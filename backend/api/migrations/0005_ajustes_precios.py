@@ -0,0 +1,34 @@
+# Generated by Django 5.2.18 on 2026-10-19 18:28
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0004_productos_sku_unico'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AjustePrecio',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('modo', models.CharField(choices=[('porcentaje', 'Porcentaje sobre el precio final'), ('monto', 'Monto fijo sobre el precio final'), ('margen', 'Margen sobre el precio de compra')], max_length=20)),
+                ('valor', models.DecimalField(decimal_places=4, max_digits=12)),
+                ('redondeo', models.DecimalField(blank=True, decimal_places=2, max_digits=10, null=True)),
+                ('filtros', models.JSONField(default=dict)),
+                ('productos_afectados', models.IntegerField(default=0)),
+                ('total_antes', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('total_despues', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('notas', models.TextField(blank=True, null=True)),
+                ('fecha', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'verbose_name': 'Ajuste de Precios',
+                'verbose_name_plural': 'Ajustes de Precios',
+                'db_table': 'ajustes_precios',
+                'ordering': ['-fecha'],
+            },
+        ),
+    ]
@@ -0,0 +1,91 @@
+"""
+Columna fecha en producto_venta (copia de ventas.fecha)
+
+Es la clave de partición de producto_venta (ver el comando
+particionar_tablas): sin ella, las líneas no se podrían repartir por mes y
+los reportes por rango no podrían descartar particiones.
+
+- Se rellena desde ventas para las filas existentes (sin pasar por el
+  registro de cambios: ningún dato visible cambia).
+- Un trigger BEFORE INSERT la completa si quien inserta no la envía; solo
+  sirve mientras la tabla no esté particionada, porque Postgres elige la
+  partición antes de ejecutarlo. Después de particionar, las inserciones
+  deben incluir la fecha (la API y generate_dataset ya lo hacen).
+- Otro trigger en ventas la mantiene al día si cambia la fecha de la venta.
+
+Al revertir se quitan los triggers pero se conserva la columna (puede ser ya
+la clave de partición).
+"""
+from django.db import migrations
+
+
+CREAR = """
+CREATE OR REPLACE FUNCTION completar_fecha_producto_venta() RETURNS trigger AS $$
+BEGIN
+    IF NEW.fecha IS NULL THEN
+        SELECT v.fecha INTO NEW.fecha FROM ventas v WHERE v.id_venta = NEW.id_venta;
+    END IF;
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION propagar_fecha_venta() RETURNS trigger AS $$
+BEGIN
+    UPDATE producto_venta SET fecha = NEW.fecha WHERE id_venta = NEW.id_venta;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DO $$
+BEGIN
+    IF to_regclass('producto_venta') IS NULL OR to_regclass('ventas') IS NULL THEN
+        RETURN;
+    END IF;
+
+    ALTER TABLE producto_venta ADD COLUMN IF NOT EXISTS fecha date;
+
+    ALTER TABLE producto_venta DISABLE TRIGGER USER;
+    UPDATE producto_venta pv
+    SET fecha = v.fecha
+    FROM ventas v
+    WHERE v.id_venta = pv.id_venta AND pv.fecha IS DISTINCT FROM v.fecha;
+    ALTER TABLE producto_venta ENABLE TRIGGER USER;
+
+    DROP TRIGGER IF EXISTS completar_fecha_producto_venta ON producto_venta;
+    CREATE TRIGGER completar_fecha_producto_venta BEFORE INSERT ON producto_venta
+        FOR EACH ROW EXECUTE FUNCTION completar_fecha_producto_venta();
+
+    DROP TRIGGER IF EXISTS propagar_fecha_venta ON ventas;
+    CREATE TRIGGER propagar_fecha_venta AFTER UPDATE OF fecha ON ventas
+        FOR EACH ROW WHEN (OLD.fecha IS DISTINCT FROM NEW.fecha)
+        EXECUTE FUNCTION propagar_fecha_venta();
+END;
+$$;
+"""
+
+ELIMINAR = """
+DO $$
+BEGIN
+    IF to_regclass('ventas') IS NOT NULL THEN
+        DROP TRIGGER IF EXISTS propagar_fecha_venta ON ventas;
+    END IF;
+    IF to_regclass('producto_venta') IS NOT NULL THEN
+        DROP TRIGGER IF EXISTS completar_fecha_producto_venta ON producto_venta;
+    END IF;
+END;
+$$;
+
+DROP FUNCTION IF EXISTS propagar_fecha_venta();
+DROP FUNCTION IF EXISTS completar_fecha_producto_venta();
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0005_ajustes_precios'),
+    ]
+
+    operations = [
+        migrations.RunSQL(CREAR, ELIMINAR),
+    ]
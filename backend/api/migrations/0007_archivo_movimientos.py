@@ -0,0 +1,51 @@
+# Generated by Django 5.2.18 on 2026-10-19 18:39
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0006_producto_venta_fecha'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArchivoMovimientos',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('mes', models.DateField(db_index=True)),
+                ('ruta', models.CharField(max_length=255, unique=True)),
+                ('filas', models.IntegerField(default=0)),
+                ('tamano_bytes', models.BigIntegerField(default=0)),
+                ('sha256', models.CharField(max_length=64)),
+                ('fecha_creacion', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'verbose_name': 'Archivo de Movimientos',
+                'verbose_name_plural': 'Archivos de Movimientos',
+                'db_table': 'movimientos_archivos',
+                'ordering': ['-mes', '-fecha_creacion'],
+            },
+        ),
+        migrations.CreateModel(
+            name='ResumenMovimiento',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('producto_id', models.IntegerField()),
+                ('mes', models.DateField()),
+                ('tipo', models.CharField(max_length=20)),
+                ('movimientos', models.IntegerField(default=0)),
+                ('cantidad', models.BigIntegerField(default=0)),
+                ('primera_fecha', models.DateTimeField()),
+                ('ultima_fecha', models.DateTimeField()),
+            ],
+            options={
+                'verbose_name': 'Resumen Mensual de Movimientos',
+                'verbose_name_plural': 'Resúmenes Mensuales de Movimientos',
+                'db_table': 'movimientos_resumen_mensual',
+                'ordering': ['-mes', 'producto_id', 'tipo'],
+                'constraints': [models.UniqueConstraint(fields=('producto_id', 'mes', 'tipo'), name='resumen_movimiento_unico')],
+            },
+        ),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 5.2.18 on 2026-10-19 18:48
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0007_archivo_movimientos'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ResultadoReporte',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('clave', models.CharField(max_length=64, unique=True)),
+                ('tipo', models.CharField(max_length=50)),
+                ('parametros', models.JSONField(default=dict)),
+                ('resultado', models.JSONField()),
+                ('fecha_calculo', models.DateTimeField()),
+            ],
+            options={
+                'verbose_name': 'Resultado de Reporte',
+                'verbose_name_plural': 'Resultados de Reportes',
+                'db_table': 'reportes_resultados',
+                'ordering': ['-fecha_calculo'],
+            },
+        ),
+    ]
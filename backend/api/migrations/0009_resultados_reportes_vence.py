@@ -0,0 +1,25 @@
+# Generated by Django 5.2.18 on 2026-10-19 19:02
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0008_resultados_reportes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='resultadoreporte',
+            name='duracion',
+            field=models.FloatField(default=0),
+        ),
+        migrations.AddField(
+            model_name='resultadoreporte',
+            name='vence',
+            field=models.DateTimeField(db_index=True, default=django.utils.timezone.now),
+            preserve_default=False,
+        ),
+    ]
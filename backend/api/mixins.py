@@ -0,0 +1,371 @@
+"""
+Mixins reutilizables para los ViewSets de la API
+"""
+import hashlib
+from functools import lru_cache
+
+import orjson
+from django.utils.http import parse_etags
+from rest_framework import serializers, status
+from rest_framework.decorators import action
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework.response import Response
+
+from .metrics import registrar_cache
+from .services import CambiosService, OperacionesMasivasService, VersionesService
+
+
+# ============================================================================
+# LISTADO RÁPIDO CON values_list()
+# ============================================================================
+
+# to_representation que no cambian el valor que entrega el driver
+_REPRESENTACION_IDENTIDAD = (
+    serializers.CharField.to_representation,
+    serializers.IntegerField.to_representation,
+)
+
+
+@lru_cache(maxsize=None)
+def proyeccion_valores(serializer_class):
+    """
+    Describe un serializer que solo proyecta campos del modelo
+
+    Returns:
+        list de (nombre, columna, to_representation o None si el valor se usa tal cual),
+        o None si algún campo no es una columna directa del modelo (campos
+        anidados, source con puntos, SerializerMethodField, ...)
+    """
+    modelo = serializer_class.Meta.model
+    columnas = {f.name: f.attname for f in modelo._meta.concrete_fields}
+
+    proyeccion = []
+    for campo in serializer_class()._readable_fields:
+        if (
+            isinstance(campo, (serializers.BaseSerializer, serializers.SerializerMethodField))
+            or campo.source not in columnas
+            or columnas[campo.source] != campo.source
+        ):
+            return None
+        representar = campo.to_representation
+        if type(campo).to_representation in _REPRESENTACION_IDENTIDAD:
+            representar = None
+        proyeccion.append((campo.field_name, campo.source, representar))
+    return proyeccion
+
+
+def filas_a_dicts(proyeccion, filas):
+    """Convierte tuplas de values_list() en los mismos dicts que produciría el serializer"""
+    nombres = [nombre for nombre, _, _ in proyeccion]
+    conversiones = [
+        (i, representar) for i, (_, _, representar) in enumerate(proyeccion) if representar is not None
+    ]
+
+    datos = []
+    for fila in filas:
+        if conversiones:
+            fila = list(fila)
+            for i, representar in conversiones:
+                if fila[i] is not None:
+                    fila[i] = representar(fila[i])
+        datos.append(dict(zip(nombres, fila)))
+    return datos
+
+
+class ListadoRapidoMixin:
+    """
+    Acción `list` sin instancias de modelo
+
+    Si el serializer del listado solo proyecta columnas del modelo, se leen
+    las tuplas con values_list() y se arman los dicts directamente, aplicando
+    el to_representation de cada campo para que la respuesta sea idéntica.
+    Si no, se usa el list() normal de DRF.
+    """
+
+    def list(self, request, *args, **kwargs):
+        proyeccion = proyeccion_valores(self.get_serializer_class())
+        if proyeccion is not None and hasattr(self, 'filtrar_campos'):
+            # Respetar ?fields=/?include=/?exclude= (CamposDinamicosMixin)
+            conservar = self.filtrar_campos([nombre for nombre, _, _ in proyeccion])
+            proyeccion = [p for p in proyeccion if p[0] in conservar]
+        if not proyeccion:
+            return super().list(request, *args, **kwargs)
+
+        columnas = [columna for _, columna, _ in proyeccion]
+        queryset = self.filter_queryset(self.get_queryset()).values_list(*columnas)
+
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            return self.get_paginated_response(filas_a_dicts(proyeccion, page))
+        return Response(filas_a_dicts(proyeccion, queryset))
+
+
+# ============================================================================
+# CAMPOS DINÁMICOS (?fields= / ?include= / ?exclude=)
+# ============================================================================
+
+class CamposDinamicosMixin:
+    """
+    Permite elegir los campos de la respuesta en peticiones de lectura
+
+    - ?fields=a,b   solo esos campos
+    - ?include=c    agrega campos a los pedidos en fields
+    - ?exclude=d    quita campos
+
+    Los campos se quitan del serializer antes de serializar, así que sus
+    SerializerMethodField y serializers anidados no se ejecutan. Los
+    prefetch declarados en `prefetch_por_campo` ({campo: lookup}) solo se
+    hacen si algún campo que los usa queda en la respuesta.
+    Nombres desconocidos se ignoran.
+    """
+
+    prefetch_por_campo = {}
+
+    def _parametro_campos(self, nombre):
+        valor = self.request.query_params.get(nombre)
+        if not valor:
+            return None
+        return {campo.strip() for campo in valor.split(',') if campo.strip()}
+
+    def filtrar_campos(self, nombres):
+        """Retorna el subconjunto de `nombres` que debe quedar en la respuesta"""
+        nombres = set(nombres)
+        if self.request is None or self.request.method not in SAFE_METHODS:
+            return nombres
+
+        fields = self._parametro_campos('fields')
+        include = self._parametro_campos('include') or set()
+        exclude = self._parametro_campos('exclude') or set()
+
+        conservar = nombres if fields is None else nombres & (fields | include)
+        return conservar - exclude
+
+    def podar_campos(self, serializer):
+        """Quita del serializer (o de su child si es many=True) los campos no pedidos"""
+        destino = getattr(serializer, 'child', serializer)
+        conservar = self.filtrar_campos(destino.fields.keys())
+        for nombre in list(destino.fields.keys()):
+            if nombre not in conservar:
+                destino.fields.pop(nombre)
+        return serializer
+
+    def get_serializer(self, *args, **kwargs):
+        return self.podar_campos(super().get_serializer(*args, **kwargs))
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.prefetch_por_campo:
+            lookups = {
+                self.prefetch_por_campo[campo]
+                for campo in self.filtrar_campos(self.prefetch_por_campo.keys())
+            }
+            if lookups:
+                queryset = queryset.prefetch_related(*sorted(lookups))
+        return queryset
+
+
+# ============================================================================
+# ETAG / GET CONDICIONAL
+# ============================================================================
+
+class _NoModificado(Exception):
+    """El ETag del cliente sigue vigente: se responde 304 sin ejecutar la acción"""
+
+
+class ETagMixin:
+    """
+    ETag en las lecturas y 304 Not Modified si el cliente ya tiene la respuesta
+
+    El ETag se calcula sin consultar los datos: es un hash de la ruta, los
+    parámetros, el formato y la versión de cada tabla de `tablas_etag` (las
+    que leen el queryset y los serializers de la acción; ver
+    VersionesService). Si coincide con If-None-Match se responde 304 antes
+    de ejecutar la acción, ya con autenticación y permisos verificados.
+
+    Las versiones se leen antes que los datos: una escritura intermedia deja
+    un ETag viejo con datos nuevos, y la siguiente petición los vuelve a pedir.
+    Si alguna tabla no tiene el trigger de versión, la respuesta va sin ETag.
+    """
+
+    tablas_etag = ()
+    acciones_etag = ('list', 'retrieve')
+
+    def calcular_etag(self, request):
+        """ETag de la petición, o None si alguna tabla no tiene versión (sin trigger)"""
+        versiones = VersionesService.obtener(self.tablas_etag)
+        if versiones is None:
+            return None
+        contenido = orjson.dumps([
+            request.path,
+            sorted(request.query_params.lists()),
+            request.accepted_media_type,
+            sorted(versiones.items()),
+        ])
+        return f'W/"{hashlib.sha1(contenido).hexdigest()}"'
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        self.etag = None
+        if (
+            not self.tablas_etag
+            or self.action not in self.acciones_etag
+            or request.method not in ('GET', 'HEAD')
+        ):
+            return
+
+        self.etag = self.calcular_etag(request)
+        if self.etag is None:
+            return
+        etags_cliente = parse_etags(request.headers.get('If-None-Match', ''))
+        # Comparación débil (RFC 9110): se ignora el prefijo W/
+        vigente = '*' in etags_cliente or self.etag.removeprefix('W/') in (
+            etag.removeprefix('W/') for etag in etags_cliente
+        )
+        if etags_cliente:
+            registrar_cache('etag', vigente)
+        if vigente:
+            raise _NoModificado()
+
+    def handle_exception(self, exc):
+        if isinstance(exc, _NoModificado):
+            return Response(status=status.HTTP_304_NOT_MODIFIED)
+        return super().handle_exception(exc)
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(request, response, *args, **kwargs)
+        if getattr(self, 'etag', None) and response.status_code in (200, 304):
+            response['ETag'] = self.etag
+            # El navegador guarda la respuesta pero la revalida en cada uso
+            response['Cache-Control'] = 'private, no-cache'
+        return response
+
+
+# ============================================================================
+# CAMBIOS INCREMENTALES (?since=)
+# ============================================================================
+
+class CambiosMixin:
+    """
+    Acción GET /<recurso>/cambios/?since=<cursor> para sincronización incremental
+
+    Sin `since` retorna solo el cursor actual (el cliente hace la carga
+    completa y luego pide los cambios desde ese cursor). Con `since`
+    retorna los registros insertados o actualizados después del cursor
+    (serializados con `serializer_cambios_class`) y los ids eliminados.
+    """
+
+    recurso_cambios = None
+    serializer_cambios_class = None
+
+    @action(detail=False, methods=['get'])
+    def cambios(self, request):
+        """Registros modificados y eliminados después del cursor `since`"""
+        desde = request.query_params.get('since')
+        if not desde:
+            return Response({'cursor': CambiosService.cursor_actual()})
+
+        try:
+            cambios = CambiosService.obtener(self.recurso_cambios, desde)
+        except ValueError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        registros = self.get_queryset().filter(pk__in=cambios['modificados'])
+        serializer_class = self.serializer_cambios_class or self.get_serializer_class()
+        serializer = serializer_class(registros, many=True, context=self.get_serializer_context())
+        if hasattr(self, 'podar_campos'):
+            # Respetar ?fields=/?include=/?exclude= (CamposDinamicosMixin)
+            self.podar_campos(serializer)
+
+        # Los que ya no existen (o no cumplen los filtros) se informan como eliminados
+        encontrados = {registro.pk for registro in registros}
+        eliminados = cambios['eliminados'] + [i for i in cambios['modificados'] if i not in encontrados]
+
+        return Response({
+            'cursor': cambios['cursor'],
+            'modificados': serializer.data,
+            'eliminados': eliminados,
+            'hay_mas': cambios['hay_mas'],
+        })
+
+
+# ============================================================================
+# OPERACIONES MASIVAS
+# ============================================================================
+
+class OperacionesMasivasMixin:
+    """
+    Acciones POST /<recurso>/eliminar_masivo/ y PATCH /<recurso>/actualizar_masivo/
+
+    Los registros se indican en el body con `ids` (lista) o con
+    `filtrar: true`, que toma los mismos parámetros de búsqueda del listado
+    desde la URL (ej: ?search=obsoleto). Con `filtrar` se exige al menos uno
+    de `filtros_masivos` para no afectar por error a todos los registros.
+
+    La actualización asigna los mismos `cambios` a todos los registros; solo
+    se aceptan los campos de `campos_masivos`, validados con
+    `serializer_masivo_class`.
+    """
+
+    campos_masivos = ()
+    serializer_masivo_class = None
+    filtros_masivos = ('search',)
+    MAX_IDS_MASIVO = 10000
+
+    def _error_masivo(self, mensaje):
+        return Response({'error': mensaje}, status=status.HTTP_400_BAD_REQUEST)
+
+    def _ids_masivos(self, request):
+        """Retorna (ids sin repetir, None) o (None, Response de error)"""
+        ids = request.data.get('ids')
+
+        if request.data.get('filtrar'):
+            if ids is not None:
+                return None, self._error_masivo('Usar ids o filtrar, no ambos')
+            if not any(request.query_params.get(filtro) for filtro in self.filtros_masivos):
+                return None, self._error_masivo(
+                    f"filtrar requiere al menos uno de estos parámetros: {', '.join(self.filtros_masivos)}"
+                )
+            queryset = self.filter_queryset(self.get_queryset())
+            ids = list(queryset.values_list('pk', flat=True)[:self.MAX_IDS_MASIVO + 1])
+        elif (
+            not isinstance(ids, list) or not ids
+            or not all(isinstance(i, int) and not isinstance(i, bool) for i in ids)
+        ):
+            return None, self._error_masivo('ids debe ser una lista de enteros (o usar filtrar: true)')
+
+        ids = list(dict.fromkeys(ids))
+        if len(ids) > self.MAX_IDS_MASIVO:
+            return None, self._error_masivo(f'Máximo {self.MAX_IDS_MASIVO} registros por petición')
+        return ids, None
+
+    @action(detail=False, methods=['post'])
+    def eliminar_masivo(self, request):
+        """Elimina muchos registros; informa los no encontrados y los conflictos por id"""
+        ids, error = self._ids_masivos(request)
+        if error:
+            return error
+        return Response(OperacionesMasivasService.eliminar(self.get_queryset(), ids))
+
+    @action(detail=False, methods=['patch'])
+    def actualizar_masivo(self, request):
+        """Asigna los mismos cambios a muchos registros"""
+        cambios = request.data.get('cambios')
+        if not isinstance(cambios, dict) or not cambios:
+            return self._error_masivo('cambios debe ser un objeto con los campos a modificar')
+
+        no_permitidos = sorted(set(cambios) - set(self.campos_masivos))
+        if no_permitidos:
+            return self._error_masivo(
+                f"Campos no permitidos: {', '.join(no_permitidos)}. "
+                f"Permitidos: {', '.join(self.campos_masivos) or 'ninguno'}"
+            )
+
+        serializer = self.serializer_masivo_class(data=cambios, partial=True)
+        serializer.is_valid(raise_exception=True)
+
+        ids, error = self._ids_masivos(request)
+        if error:
+            return error
+        return Response(
+            OperacionesMasivasService.actualizar(self.get_queryset(), ids, serializer.validated_data)
+        )
@@ -1,3 +1,127 @@
+"""
+Modelos propios de la API (tablas administradas por Django)
+"""
 from django.db import models
 
-# Create your models here.
+
+class ReporteJob(models.Model):
+    """Trabajo de generación de reporte en segundo plano"""
+    ESTADO_CHOICES = [
+        ('PENDIENTE', 'Pendiente'),
+        ('EN_PROCESO', 'En proceso'),
+        ('COMPLETADO', 'Completado'),
+        ('ERROR', 'Error'),
+    ]
+
+    tipo = models.CharField(max_length=50)
+    parametros = models.JSONField(default=dict)
+    clave = models.CharField(max_length=64, db_index=True)  # sha256 de tipo + parámetros
+    estado = models.CharField(max_length=20, choices=ESTADO_CHOICES, default='PENDIENTE')
+    resultado = models.JSONField(blank=True, null=True)
+    error = models.TextField(blank=True, null=True)
+    intentos = models.IntegerField(default=0)
+    fecha_creacion = models.DateTimeField(auto_now_add=True)
+    fecha_inicio = models.DateTimeField(blank=True, null=True)
+    fecha_fin = models.DateTimeField(blank=True, null=True)
+
+    class Meta:
+        db_table = 'reporte_jobs'
+        verbose_name = 'Trabajo de Reporte'
+        verbose_name_plural = 'Trabajos de Reportes'
+        ordering = ['-fecha_creacion']
+        indexes = [
+            models.Index(fields=['estado', 'fecha_creacion'], name='reporte_job_cola_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.tipo} #{self.id} ({self.estado})"
+
+
+class ResultadoReporte(models.Model):
+    """Último resultado calculado de un reporte, compartido entre workers"""
+    clave = models.CharField(max_length=64, unique=True)  # sha256 de tipo + parámetros
+    tipo = models.CharField(max_length=50)
+    parametros = models.JSONField(default=dict)
+    resultado = models.JSONField()
+    fecha_calculo = models.DateTimeField()
+    duracion = models.FloatField(default=0)  # Segundos que tomó el cálculo
+    vence = models.DateTimeField(db_index=True)
+
+    class Meta:
+        db_table = 'reportes_resultados'
+        verbose_name = 'Resultado de Reporte'
+        verbose_name_plural = 'Resultados de Reportes'
+        ordering = ['-fecha_calculo']
+
+    def __str__(self):
+        return f"{self.tipo} {self.parametros} ({self.fecha_calculo:%Y-%m-%d %H:%M:%S})"
+
+
+class AjustePrecio(models.Model):
+    """Registro de auditoría de un ajuste masivo de precios"""
+    MODO_CHOICES = [
+        ('porcentaje', 'Porcentaje sobre el precio final'),
+        ('monto', 'Monto fijo sobre el precio final'),
+        ('margen', 'Margen sobre el precio de compra'),
+    ]
+
+    modo = models.CharField(max_length=20, choices=MODO_CHOICES)
+    valor = models.DecimalField(max_digits=12, decimal_places=4)
+    redondeo = models.DecimalField(max_digits=10, decimal_places=2, blank=True, null=True)
+    filtros = models.JSONField(default=dict)
+    productos_afectados = models.IntegerField(default=0)
+    total_antes = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    total_despues = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    notas = models.TextField(blank=True, null=True)
+    fecha = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        db_table = 'ajustes_precios'
+        verbose_name = 'Ajuste de Precios'
+        verbose_name_plural = 'Ajustes de Precios'
+        ordering = ['-fecha']
+
+    def __str__(self):
+        return f"Ajuste #{self.id}: {self.modo} {self.valor} ({self.productos_afectados} productos)"
+
+
+class ResumenMovimiento(models.Model):
+    """Totales mensuales por producto y tipo de los movimientos archivados"""
+    producto_id = models.IntegerField()
+    mes = models.DateField()  # Primer día del mes (settings.TIME_ZONE)
+    tipo = models.CharField(max_length=20)
+    movimientos = models.IntegerField(default=0)
+    cantidad = models.BigIntegerField(default=0)
+    primera_fecha = models.DateTimeField()
+    ultima_fecha = models.DateTimeField()
+
+    class Meta:
+        db_table = 'movimientos_resumen_mensual'
+        verbose_name = 'Resumen Mensual de Movimientos'
+        verbose_name_plural = 'Resúmenes Mensuales de Movimientos'
+        ordering = ['-mes', 'producto_id', 'tipo']
+        constraints = [
+            models.UniqueConstraint(fields=['producto_id', 'mes', 'tipo'], name='resumen_movimiento_unico'),
+        ]
+
+    def __str__(self):
+        return f"Producto {self.producto_id} {self.mes:%Y-%m} {self.tipo}: {self.cantidad}"
+
+
+class ArchivoMovimientos(models.Model):
+    """Archivo gzip NDJSON con el detalle de movimientos de un mes retirados de la tabla"""
+    mes = models.DateField(db_index=True)
+    ruta = models.CharField(max_length=255, unique=True)  # Relativa a MOVIMIENTOS_ARCHIVO_DIR
+    filas = models.IntegerField(default=0)
+    tamano_bytes = models.BigIntegerField(default=0)
+    sha256 = models.CharField(max_length=64)
+    fecha_creacion = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        db_table = 'movimientos_archivos'
+        verbose_name = 'Archivo de Movimientos'
+        verbose_name_plural = 'Archivos de Movimientos'
+        ordering = ['-mes', '-fecha_creacion']
+
+    def __str__(self):
+        return f"{self.ruta} ({self.filas} movimientos)"
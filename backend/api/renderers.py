@@ -0,0 +1,58 @@
+"""
+Renderer y parser JSON basados en orjson
+
+Producen la misma salida que los de DRF (JSON compacto, UTF-8 sin escapar,
+fechas con el formato del JSONEncoder de DRF) pero serializan en C. Los tipos
+que orjson no conoce (Decimal, datetime, textos lazy, ...) pasan por el
+encoder de DRF. Si orjson no puede serializar algo (ej: enteros de más de
+64 bits) o se pide JSON indentado, se usa el renderer estándar.
+"""
+import orjson
+from django.conf import settings
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+
+_encoder = JSONEncoder()
+
+# Los datetime van al encoder de DRF para conservar su formato (milisegundos, 'Z')
+OPCIONES = orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS
+
+
+def _por_defecto(obj):
+    return _encoder.default(obj)
+
+
+class ORJSONRenderer(JSONRenderer):
+    """Renderer JSON con orjson, compatible con la salida de JSONRenderer"""
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+
+        renderer_context = renderer_context or {}
+        if self.get_indent(accepted_media_type, renderer_context):
+            return super().render(data, accepted_media_type, renderer_context)
+
+        try:
+            return orjson.dumps(data, default=_por_defecto, option=OPCIONES)
+        except orjson.JSONEncodeError:
+            return super().render(data, accepted_media_type, renderer_context)
+
+
+class ORJSONParser(JSONParser):
+    """Parser JSON con orjson"""
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        parser_context = parser_context or {}
+        encoding = parser_context.get('encoding', settings.DEFAULT_CHARSET)
+
+        try:
+            contenido = stream.read()
+            if encoding.lower().replace('-', '') != 'utf8':
+                contenido = contenido.decode(encoding)
+            return orjson.loads(contenido)
+        except ValueError as exc:
+            raise ParseError('JSON parse error - %s' % str(exc))
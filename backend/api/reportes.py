@@ -0,0 +1,502 @@
+"""
+Cálculo de reportes del sistema
+
+Funciones puras (sin request) usadas por las vistas de reportes y por el
+worker de reportes en segundo plano. Cada reporte tiene además una versión
+async que ejecuta sus consultas independientes en paralelo.
+"""
+import asyncio
+import hashlib
+import json
+
+from asgiref.sync import sync_to_async
+from django.db import close_old_connections
+from django.utils.dateparse import parse_date
+
+from .db_router import conexion_lectura
+from .metrics import contar_consultas, medir_reporte
+
+
+# Parámetros aceptados por cada reporte: (nombre, requerido)
+PARAMETROS = {
+    'inventario': [],
+    'ventas': [('fecha_inicio', True), ('fecha_fin', True)],
+    'compras': [('fecha_inicio', True), ('fecha_fin', True), ('proveedor', False)],
+    'productos_mas_vendidos': [('fecha_inicio', True), ('fecha_fin', True), ('limite', False)],
+}
+
+
+def normalizar_parametros(tipo, datos):
+    """
+    Extrae y valida los parámetros de un reporte
+
+    Args:
+        tipo: Nombre del reporte (clave de PARAMETROS)
+        datos: Diccionario o QueryDict con los parámetros recibidos
+
+    Returns:
+        dict: Solo los parámetros conocidos, con valores no vacíos, en orden estable
+
+    Raises:
+        ValueError: Si el reporte no existe o falta/es inválido un parámetro
+    """
+    if tipo not in PARAMETROS:
+        raise ValueError(f'Reporte desconocido: {tipo}')
+
+    parametros = {}
+    for nombre, requerido in PARAMETROS[tipo]:
+        valor = datos.get(nombre)
+        if valor in (None, ''):
+            if requerido:
+                raise ValueError('Debe proporcionar fecha_inicio y fecha_fin')
+            continue
+        valor = str(valor)
+        if nombre.startswith('fecha_'):
+            try:
+                fecha = parse_date(valor)
+            except ValueError:
+                fecha = None
+            if fecha is None:
+                raise ValueError(f'{nombre} debe tener formato YYYY-MM-DD')
+            # Fechas equivalentes (2024-1-5 y 2024-01-05) dan la misma clave
+            valor = fecha.isoformat()
+        if nombre in ('proveedor', 'limite') and not valor.isdigit():
+            raise ValueError(f'{nombre} debe ser un número entero')
+        parametros[nombre] = valor
+    return parametros
+
+
+# Tablas que lee cada reporte: sus versiones (VersionesService) entran en la
+# clave del resultado guardado, así que cualquier escritura lo deja sin uso
+TABLAS_REPORTE = {
+    'inventario': ('productos',),
+    'ventas': ('ventas', 'cliente'),
+    'compras': ('orden_compra', 'orden_producto', 'productos', 'proveedores'),
+    'productos_mas_vendidos': ('producto_venta', 'ventas', 'productos'),
+}
+
+
+def clave_reporte(tipo, parametros, versiones=None):
+    """
+    Clave estable (sha256) de un reporte y sus parámetros normalizados
+
+    Con `versiones` ({tabla: versión}) la clave cambia cuando cambian los datos.
+    """
+    datos = {'tipo': tipo, 'parametros': parametros}
+    if versiones is not None:
+        datos['versiones'] = versiones
+    contenido = json.dumps(datos, sort_keys=True)
+    return hashlib.sha256(contenido.encode('utf-8')).hexdigest()
+
+
+# ============================================================================
+# CONSULTAS
+# ============================================================================
+# Cada reporte se divide en consultas independientes que abren su propio
+# cursor. La versión síncrona las ejecuta una tras otra; la versión async las
+# ejecuta a la vez, cada una en un hilo y por lo tanto en su propia conexión.
+
+def _inventario_resumen():
+    """Totales del reporte de inventario (un solo recorrido de productos)"""
+    with conexion_lectura().cursor() as cursor:
+        cursor.execute("""
+            SELECT
+                COUNT(*),
+                SUM(cantidad_actual * precio_final),
+                COUNT(*) FILTER (WHERE cantidad_actual <= cantidad_minima AND cantidad_actual > 0),
+                COUNT(*) FILTER (WHERE cantidad_actual = 0)
+            FROM productos
+        """)
+        total_productos, valor_total, productos_stock_bajo, productos_sin_stock = cursor.fetchone()
+
+    return {
+        'total_productos': total_productos,
+        'valor_total': float(valor_total or 0),
+        'productos_stock_bajo': productos_stock_bajo,
+        'productos_sin_stock': productos_sin_stock,
+    }
+
+
+def _inventario_productos():
+    """Listado de productos del reporte de inventario"""
+    with conexion_lectura().cursor() as cursor:
+        cursor.execute("""
+            SELECT
+                id_producto,
+                sku_producto as codigo,
+                nombre,
+                cantidad_actual as stock_actual,
+                cantidad_minima as stock_minimo,
+                precio_final as precio_venta,
+                (cantidad_actual * precio_final) as valor_stock
+            FROM productos
+            ORDER BY nombre
+        """)
+
+        productos = []
+        for row in cursor.fetchall():
+            productos.append({
+                'id': row[0],
+                'codigo': row[1],
+                'nombre': row[2],
+                'stock_actual': row[3],
+                'stock_minimo': row[4],
+                'precio_venta': float(row[5]) if row[5] else 0,
+                'valor_stock': float(row[6]) if row[6] else 0,
+            })
+    return productos
+
+
+def _ventas_totales(fecha_inicio, fecha_fin):
+    """Total y número de ventas del rango"""
+    with conexion_lectura().cursor() as cursor:
+        cursor.execute("""
+            SELECT COALESCE(SUM(total), 0), COUNT(*)
+            FROM ventas
+            WHERE fecha BETWEEN %s AND %s
+        """, [fecha_inicio, fecha_fin])
+        result = cursor.fetchone()
+    return float(result[0]) if result[0] else 0, result[1]
+
+
+def _ventas_por_cliente(fecha_inicio, fecha_fin):
+    """Top 10 de clientes por monto vendido"""
+    with conexion_lectura().cursor() as cursor:
+        cursor.execute("""
+            SELECT
+                c.nombre as cliente,
+                COALESCE(SUM(v.total), 0) as total
+            FROM ventas v
+            INNER JOIN cliente c ON c.id_cliente = v.id_cliente
+            WHERE v.fecha BETWEEN %s AND %s
+            GROUP BY c.nombre
+            ORDER BY total DESC
+            LIMIT 10
+        """, [fecha_inicio, fecha_fin])
+
+        por_cliente = []
+        for row in cursor.fetchall():
+            por_cliente.append({
+                'cliente': row[0],
+                'total': float(row[1])
+            })
+    return por_cliente
+
+
+def _ventas_ordenes(fecha_inicio, fecha_fin):
+    """Listado de órdenes de venta del rango"""
+    with conexion_lectura().cursor() as cursor:
+        cursor.execute("""
+            SELECT
+                v.id_venta as numero_orden,
+                c.nombre as cliente,
+                v.fecha,
+                v.total
+            FROM ventas v
+            INNER JOIN cliente c ON c.id_cliente = v.id_cliente
+            WHERE v.fecha BETWEEN %s AND %s
+            ORDER BY v.fecha DESC
+        """, [fecha_inicio, fecha_fin])
+
+        ordenes = []
+        for row in cursor.fetchall():
+            ordenes.append({
+                'id': row[0],
+                'numero_orden': row[0],
+                'cliente': row[1],
+                'fecha': str(row[2]),
+                'total': float(row[3]),
+                'estado': 'confirmada'
+            })
+    return ordenes
+
+
+def _filtro_compras(fecha_inicio, fecha_fin, proveedor):
+    """WHERE y parámetros comunes de las consultas de compras"""
+    where_clause = "WHERE oc.fecha_creacion BETWEEN %s AND %s"
+    params = [fecha_inicio, fecha_fin]
+
+    if proveedor:
+        where_clause += " AND oc.id_proveedor = %s"
+        params.append(proveedor)
+    return where_clause, params
+
+
+def _compras_totales(fecha_inicio, fecha_fin, proveedor=None):
+    """Número y total de órdenes de compra del rango"""
+    where_clause, params = _filtro_compras(fecha_inicio, fecha_fin, proveedor)
+    with conexion_lectura().cursor() as cursor:
+        cursor.execute(f"""
+            SELECT COUNT(*), COALESCE(SUM(
+                (SELECT SUM(p.precio_compra_unitario)
+                 FROM orden_producto op
+                 INNER JOIN productos p ON p.id_producto = op.id_producto
+                 WHERE op.id_orden = oc.id_orden)
+            ), 0)
+            FROM orden_compra oc
+            {where_clause}
+        """, params)
+        result = cursor.fetchone()
+    return result[0], float(result[1]) if result[1] else 0
+
+
+def _compras_por_proveedor(fecha_inicio, fecha_fin, proveedor=None):
+    """Top 10 de proveedores por monto comprado"""
+    where_clause, params = _filtro_compras(fecha_inicio, fecha_fin, proveedor)
+    with conexion_lectura().cursor() as cursor:
+        cursor.execute(f"""
+            SELECT
+                pr.nombre_empresa as proveedor,
+                COALESCE(SUM(
+                    (SELECT SUM(p.precio_compra_unitario)
+                     FROM orden_producto op
+                     INNER JOIN productos p ON p.id_producto = op.id_producto
+                     WHERE op.id_orden = oc.id_orden)
+                ), 0) as total
+            FROM orden_compra oc
+            INNER JOIN proveedores pr ON pr.id_proveedor = oc.id_proveedor
+            {where_clause}
+            GROUP BY pr.nombre_empresa
+            ORDER BY total DESC
+            LIMIT 10
+        """, params)
+
+        por_proveedor = []
+        for row in cursor.fetchall():
+            por_proveedor.append({
+                'proveedor': row[0],
+                'total': float(row[1])
+            })
+    return por_proveedor
+
+
+def _compras_ordenes(fecha_inicio, fecha_fin, proveedor=None):
+    """Listado de órdenes de compra del rango"""
+    where_clause, params = _filtro_compras(fecha_inicio, fecha_fin, proveedor)
+    with conexion_lectura().cursor() as cursor:
+        cursor.execute(f"""
+            SELECT
+                oc.id_orden as numero_orden,
+                pr.nombre_empresa as proveedor,
+                oc.fecha_creacion as fecha,
+                (SELECT SUM(p.precio_compra_unitario)
+                 FROM orden_producto op
+                 INNER JOIN productos p ON p.id_producto = op.id_producto
+                 WHERE op.id_orden = oc.id_orden) as total,
+                CASE
+                    WHEN oc.id_estado = 1 THEN 'cancelada'
+                    WHEN oc.id_estado = 2 THEN 'pendiente'
+                    WHEN oc.id_estado = 3 THEN 'recibida'
+                    ELSE 'desconocido'
+                END as estado
+            FROM orden_compra oc
+            INNER JOIN proveedores pr ON pr.id_proveedor = oc.id_proveedor
+            {where_clause}
+            ORDER BY oc.fecha_creacion DESC
+        """, params)
+
+        ordenes = []
+        for row in cursor.fetchall():
+            ordenes.append({
+                'id': row[0],
+                'numero_orden': row[0],
+                'proveedor': row[1],
+                'fecha': str(row[2]),
+                'total': float(row[3]) if row[3] else 0,
+                'estado': row[4]
+            })
+    return ordenes
+
+
+def _productos_mas_vendidos(fecha_inicio, fecha_fin, limite=10):
+    """Productos más vendidos del rango"""
+    with conexion_lectura().cursor() as cursor:
+        cursor.execute("""
+            SELECT
+                p.id_producto as producto_id,
+                p.nombre as producto,
+                SUM(pv.cantidad) as cantidad_vendida,
+                SUM(pv.precio_unitario * pv.cantidad) as total_ventas
+            FROM producto_venta pv
+            INNER JOIN ventas v ON v.id_venta = pv.id_venta
+            INNER JOIN productos p ON p.id_producto = pv.id_producto
+            WHERE v.fecha BETWEEN %s AND %s
+              -- Redundante con v.fecha, pero permite descartar particiones de producto_venta
+              AND pv.fecha BETWEEN %s AND %s
+            GROUP BY p.id_producto, p.nombre
+            ORDER BY cantidad_vendida DESC
+            LIMIT %s
+        """, [fecha_inicio, fecha_fin, fecha_inicio, fecha_fin, int(limite)])
+
+        productos = []
+        for row in cursor.fetchall():
+            productos.append({
+                'producto_id': row[0],
+                'producto': row[1],
+                'cantidad_vendida': row[2],
+                'total_ventas': float(row[3]) if row[3] else 0
+            })
+    return productos
+
+
+# ============================================================================
+# ARMADO DE RESPUESTAS
+# ============================================================================
+
+def _armar_inventario(resumen, productos):
+    return {
+        **resumen,
+        'productos': productos,
+        'por_categoria': []  # Placeholder para gráfico
+    }
+
+
+def _armar_ventas(totales, por_cliente, ordenes):
+    total_ventas, numero_ordenes = totales
+    return {
+        'total_ventas': total_ventas,
+        'numero_ordenes': numero_ordenes,
+        'ticket_promedio': total_ventas / numero_ordenes if numero_ordenes > 0 else 0,
+        'por_cliente': por_cliente,
+        'ordenes': ordenes
+    }
+
+
+def _armar_compras(totales, por_proveedor, ordenes):
+    numero_ordenes, total_compras = totales
+    return {
+        'total_compras': total_compras,
+        'numero_ordenes': numero_ordenes,
+        'compra_promedio': total_compras / numero_ordenes if numero_ordenes > 0 else 0,
+        'por_proveedor': por_proveedor,
+        'ordenes': ordenes
+    }
+
+
+# ============================================================================
+# REPORTES SÍNCRONOS
+# ============================================================================
+
+@medir_reporte('inventario')
+def calcular_reporte_inventario():
+    """Genera reporte del estado actual del inventario"""
+    return _armar_inventario(_inventario_resumen(), _inventario_productos())
+
+
+@medir_reporte('ventas')
+def calcular_reporte_ventas(fecha_inicio, fecha_fin):
+    """Genera reporte de ventas por rango de fechas"""
+    return _armar_ventas(
+        _ventas_totales(fecha_inicio, fecha_fin),
+        _ventas_por_cliente(fecha_inicio, fecha_fin),
+        _ventas_ordenes(fecha_inicio, fecha_fin),
+    )
+
+
+@medir_reporte('compras')
+def calcular_reporte_compras(fecha_inicio, fecha_fin, proveedor=None):
+    """Genera reporte de compras por rango de fechas"""
+    return _armar_compras(
+        _compras_totales(fecha_inicio, fecha_fin, proveedor),
+        _compras_por_proveedor(fecha_inicio, fecha_fin, proveedor),
+        _compras_ordenes(fecha_inicio, fecha_fin, proveedor),
+    )
+
+
+@medir_reporte('productos_mas_vendidos')
+def calcular_productos_mas_vendidos(fecha_inicio, fecha_fin, limite=10):
+    """Genera reporte de productos más vendidos"""
+    return _productos_mas_vendidos(fecha_inicio, fecha_fin, limite)
+
+
+# Registro de reportes por nombre (usado por el worker de reportes)
+REPORTES = {
+    'inventario': calcular_reporte_inventario,
+    'ventas': calcular_reporte_ventas,
+    'compras': calcular_reporte_compras,
+    'productos_mas_vendidos': calcular_productos_mas_vendidos,
+}
+
+
+def generar_reporte(tipo, parametros):
+    """Calcula un reporte a partir de sus parámetros normalizados"""
+    return REPORTES[tipo](**parametros)
+
+
+# ============================================================================
+# REPORTES ASYNC
+# ============================================================================
+
+def _en_conexion_propia(consulta):
+    """
+    Envuelve una consulta para ejecutarla en un hilo del pool de asgiref
+
+    Las conexiones de Django son por hilo, así que cada consulta usa su propia
+    conexión. Al terminar se libera según CONN_MAX_AGE, igual que al final
+    de una petición.
+    """
+    def ejecutar(*args):
+        try:
+            with contar_consultas():
+                return consulta(*args)
+        finally:
+            close_old_connections()
+    return sync_to_async(ejecutar, thread_sensitive=False)
+
+
+async def _en_paralelo(*consultas):
+    """Ejecuta a la vez varias (consulta, args) y retorna sus resultados en orden"""
+    return await asyncio.gather(*(
+        _en_conexion_propia(consulta)(*args) for consulta, args in consultas
+    ))
+
+
+@medir_reporte('inventario')
+async def calcular_reporte_inventario_async():
+    """Versión async de calcular_reporte_inventario"""
+    return _armar_inventario(*await _en_paralelo(
+        (_inventario_resumen, ()),
+        (_inventario_productos, ()),
+    ))
+
+
+@medir_reporte('ventas')
+async def calcular_reporte_ventas_async(fecha_inicio, fecha_fin):
+    """Versión async de calcular_reporte_ventas"""
+    rango = (fecha_inicio, fecha_fin)
+    return _armar_ventas(*await _en_paralelo(
+        (_ventas_totales, rango),
+        (_ventas_por_cliente, rango),
+        (_ventas_ordenes, rango),
+    ))
+
+
+@medir_reporte('compras')
+async def calcular_reporte_compras_async(fecha_inicio, fecha_fin, proveedor=None):
+    """Versión async de calcular_reporte_compras"""
+    args = (fecha_inicio, fecha_fin, proveedor)
+    return _armar_compras(*await _en_paralelo(
+        (_compras_totales, args),
+        (_compras_por_proveedor, args),
+        (_compras_ordenes, args),
+    ))
+
+
+@medir_reporte('productos_mas_vendidos')
+async def calcular_productos_mas_vendidos_async(fecha_inicio, fecha_fin, limite=10):
+    """Versión async de calcular_productos_mas_vendidos (una sola consulta)"""
+    productos, = await _en_paralelo((_productos_mas_vendidos, (fecha_inicio, fecha_fin, limite)))
+    return productos
+
+
+REPORTES_ASYNC = {
+    'inventario': calcular_reporte_inventario_async,
+    'ventas': calcular_reporte_ventas_async,
+    'compras': calcular_reporte_compras_async,
+    'productos_mas_vendidos': calcular_productos_mas_vendidos_async,
+}
+
+
+async def generar_reporte_async(tipo, parametros):
+    """Calcula un reporte ejecutando sus consultas independientes en paralelo"""
+    return await REPORTES_ASYNC[tipo](**parametros)
@@ -1,12 +1,16 @@
 """
 Serializers para la API de Inventrix
 """
+from decimal import Decimal
+
 from rest_framework import serializers
 from inventory.models import (
     Proveedor, Marca, Categoria, Producto, Cliente,
     OrdenCompra, DetalleOrdenCompra, OrdenVenta, DetalleOrdenVenta,
     MovimientoInventario, Moto, ServicioMoto, Servicio
 )
+from .cargadores import CargaPorLotesMixin, ListaCargaPorLotes
+from .models import AjustePrecio, ResumenMovimiento
 
 
 # ============================================================================
@@ -96,6 +100,39 @@ class ProductoCreateSerializer(serializers.ModelSerializer):
         ]
 
 
+class AjustePrecioSerializer(serializers.Serializer):
+    """Parámetros de un ajuste masivo de precios (ver PrecioService)"""
+    MODOS = [choice[0] for choice in AjustePrecio.MODO_CHOICES]
+    STOCK = ['bajo', 'agotado', 'con_stock']
+
+    modo = serializers.ChoiceField(choices=MODOS)
+    # porcentaje/margen: en %, ej. 8.5; monto: en pesos, puede ser negativo
+    valor = serializers.DecimalField(max_digits=12, decimal_places=4)
+    # Múltiplo al que se redondea el precio nuevo (ej: 0.50, 10); default 0.01
+    redondeo = serializers.DecimalField(max_digits=10, decimal_places=2, required=False, min_value=Decimal('0.01'))
+    # Selección de productos (sin filtros: todo el catálogo)
+    search = serializers.CharField(required=False, allow_blank=True)
+    sku_prefijo = serializers.CharField(required=False, allow_blank=True)
+    stock = serializers.ChoiceField(choices=STOCK, required=False)
+    simular = serializers.BooleanField(default=False)
+    notas = serializers.CharField(required=False, allow_blank=True)
+
+    def validate(self, data):
+        if data['modo'] in ('porcentaje', 'margen') and data['valor'] <= -100:
+            raise serializers.ValidationError({'valor': 'El porcentaje debe ser mayor a -100'})
+        return data
+
+
+class AjustePrecioRegistroSerializer(serializers.ModelSerializer):
+    """Serializer para el historial de ajustes de precios"""
+    class Meta:
+        model = AjustePrecio
+        fields = [
+            'id', 'modo', 'valor', 'redondeo', 'filtros', 'productos_afectados',
+            'total_antes', 'total_despues', 'notas', 'fecha'
+        ]
+
+
 # ============================================================================
 # CLIENTE SERIALIZERS
 # ============================================================================
@@ -137,25 +174,25 @@ class DetalleOrdenCompraSerializer(serializers.ModelSerializer):
         read_only_fields = ['subtotal']
 
 
-class OrdenCompraListSerializer(serializers.ModelSerializer):
+class OrdenCompraListSerializer(CargaPorLotesMixin, serializers.ModelSerializer):
     """Serializer para listado de órdenes de compra"""
     proveedor_nombre = serializers.SerializerMethodField()
     estado_display = serializers.SerializerMethodField()
     total = serializers.SerializerMethodField()
+
+    cargas_por_lote = {'proveedor': (Proveedor, 'id_proveedor', ['proveedor_nombre'])}
     
     class Meta:
         model = OrdenCompra
+        list_serializer_class = ListaCargaPorLotes
         fields = [
             'id_orden', 'id_proveedor', 'proveedor_nombre', 'id_estado', 
             'estado_display', 'fecha_creacion', 'total'
         ]
     
     def get_proveedor_nombre(self, obj):
-        try:
-            proveedor = Proveedor.objects.get(id_proveedor=obj.id_proveedor)
-            return proveedor.nombre_empresa
-        except Proveedor.DoesNotExist:
-            return 'Proveedor no encontrado'
+        proveedor = self.relacionado('proveedor', obj)
+        return proveedor.nombre_empresa if proveedor else 'Proveedor no encontrado'
     
     def get_estado_display(self, obj):
         estados = {
@@ -180,7 +217,7 @@ class OrdenCompraListSerializer(serializers.ModelSerializer):
             return float(result[0]) if result and result[0] else 0.0
 
 
-class OrdenCompraDetailSerializer(serializers.ModelSerializer):
+class OrdenCompraDetailSerializer(CargaPorLotesMixin, serializers.ModelSerializer):
     """Serializer detallado para orden de compra"""
     proveedor_nombre = serializers.SerializerMethodField()
     proveedor_contacto = serializers.SerializerMethodField()
@@ -188,27 +225,26 @@ class OrdenCompraDetailSerializer(serializers.ModelSerializer):
     total = serializers.SerializerMethodField()
     subtotal = serializers.SerializerMethodField()
     productos = serializers.SerializerMethodField()
+
+    cargas_por_lote = {
+        'proveedor': (Proveedor, 'id_proveedor', ['proveedor_nombre', 'proveedor_contacto']),
+    }
     
     class Meta:
         model = OrdenCompra
+        list_serializer_class = ListaCargaPorLotes
         fields = [
             'id_orden', 'id_proveedor', 'proveedor_nombre', 'proveedor_contacto',
             'id_estado', 'estado_display', 'fecha_creacion', 'total', 'subtotal', 'productos'
         ]
     
     def get_proveedor_nombre(self, obj):
-        try:
-            proveedor = Proveedor.objects.get(id_proveedor=obj.id_proveedor)
-            return proveedor.nombre_empresa
-        except Proveedor.DoesNotExist:
-            return 'Proveedor no encontrado'
+        proveedor = self.relacionado('proveedor', obj)
+        return proveedor.nombre_empresa if proveedor else 'Proveedor no encontrado'
     
     def get_proveedor_contacto(self, obj):
-        try:
-            proveedor = Proveedor.objects.get(id_proveedor=obj.id_proveedor)
-            return proveedor.persona_contacto
-        except Proveedor.DoesNotExist:
-            return None
+        proveedor = self.relacionado('proveedor', obj)
+        return proveedor.persona_contacto if proveedor else None
     
     def get_estado_display(self, obj):
         estados = {
@@ -328,50 +364,50 @@ class DetalleOrdenVentaSerializer(serializers.ModelSerializer):
         read_only_fields = ['subtotal']
 
 
-class OrdenVentaListSerializer(serializers.ModelSerializer):
+class OrdenVentaListSerializer(CargaPorLotesMixin, serializers.ModelSerializer):
     """Serializer para listado de órdenes de venta"""
     cliente_nombre = serializers.SerializerMethodField()
     estado_display = serializers.SerializerMethodField()
+
+    cargas_por_lote = {'cliente': (Cliente, 'id_cliente', ['cliente_nombre'])}
     
     class Meta:
         model = OrdenVenta
+        list_serializer_class = ListaCargaPorLotes
         fields = [
             'id_venta', 'id_cliente', 'cliente_nombre',
             'fecha', 'estado_display', 'total'
         ]
     
     def get_cliente_nombre(self, obj):
-        try:
-            cliente = Cliente.objects.get(id_cliente=obj.id_cliente)
-            return cliente.nombre
-        except Cliente.DoesNotExist:
-            return 'Cliente no encontrado'
+        cliente = self.relacionado('cliente', obj)
+        return cliente.nombre if cliente else 'Cliente no encontrado'
     
     def get_estado_display(self, obj):
         # Por ahora retornamos un estado por defecto
         return 'Completado'
 
 
-class OrdenVentaDetailSerializer(serializers.ModelSerializer):
+class OrdenVentaDetailSerializer(CargaPorLotesMixin, serializers.ModelSerializer):
     """Serializer detallado para orden de venta"""
     cliente_nombre = serializers.SerializerMethodField()
     estado_display = serializers.SerializerMethodField()
     productos = serializers.SerializerMethodField()
     total = serializers.SerializerMethodField()
+
+    cargas_por_lote = {'cliente': (Cliente, 'id_cliente', ['cliente_nombre'])}
     
     class Meta:
         model = OrdenVenta
+        list_serializer_class = ListaCargaPorLotes
         fields = [
             'id_venta', 'id_cliente', 'cliente_nombre',
             'fecha', 'estado_display', 'total', 'productos'
         ]
     
     def get_cliente_nombre(self, obj):
-        try:
-            cliente = Cliente.objects.get(id_cliente=obj.id_cliente)
-            return cliente.nombre
-        except Cliente.DoesNotExist:
-            return 'Cliente no encontrado'
+        cliente = self.relacionado('cliente', obj)
+        return cliente.nombre if cliente else 'Cliente no encontrado'
     
     def get_estado_display(self, obj):
         return 'Completado'
@@ -489,16 +525,18 @@ class OrdenVentaCreateSerializer(serializers.Serializer):
             ])
             id_venta = cursor.fetchone()[0]
             
-            # Insertar productos en producto_venta
+            # Insertar productos en producto_venta (con la fecha de la venta:
+            # es la clave de partición de la tabla)
             for detalle in detalles_data:
                 cursor.execute("""
-                    INSERT INTO producto_venta (id_venta, id_producto, cantidad, precio_unitario)
-                    VALUES (%s, %s, %s, %s)
+                    INSERT INTO producto_venta (id_venta, id_producto, cantidad, precio_unitario, fecha)
+                    VALUES (%s, %s, %s, %s, %s)
                 """, [
                     id_venta,
                     detalle['producto'],
                     detalle['cantidad'],
-                    detalle['precio_unitario']
+                    detalle['precio_unitario'],
+                    validated_data['fecha']
                 ])
         
         # Retornar la orden creada
@@ -538,6 +576,16 @@ class MovimientoInventarioCreateSerializer(serializers.ModelSerializer):
         ]
 
 
+class ResumenMovimientoSerializer(serializers.ModelSerializer):
+    """Serializer para los totales mensuales de movimientos archivados"""
+    class Meta:
+        model = ResumenMovimiento
+        fields = [
+            'producto_id', 'mes', 'tipo', 'movimientos', 'cantidad',
+            'primera_fecha', 'ultima_fecha'
+        ]
+
+
 # ============================================================================
 # MOTO Y SERVICIO SERIALIZERS
 # ============================================================================
@@ -1,14 +1,34 @@
 """
 Servicios de lógica de negocio para Inventrix
 """
-from django.db import transaction
-from django.db.models import Sum, F, Q
+import csv
+import gzip
+import hashlib
+import io
+import math
+import random
+import time
+from pathlib import Path
+
+import orjson
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, DataError, IntegrityError, connection, transaction
+from django.db.models import Count, DecimalField, ExpressionWrapper, F, Max, Q, Sum, Value
+from django.db.models.functions import Cast, Coalesce, Round
+from django.db.models.lookups import GreaterThanOrEqual, LessThanOrEqual
+from django.utils import timezone
 from decimal import Decimal
-from datetime import datetime, date
+from datetime import datetime, date, timedelta
 from inventory.models import (
     Producto, MovimientoInventario, OrdenCompra, DetalleOrdenCompra,
     OrdenVenta, DetalleOrdenVenta
 )
+from .cache import CalculoUnico, invalidar_al_confirmar
+from .db_router import conexion_lectura, lecturas_en_replica
+from .db_utils import copy_csv, quote_ident
+from .metrics import STOCK_LOCK_WAIT, registrar_cache
+from .models import AjustePrecio, ArchivoMovimientos, ReporteJob, ResultadoReporte
+from .reportes import TABLAS_REPORTE, clave_reporte, generar_reporte
 
 
 # ============================================================================
@@ -39,7 +59,8 @@ class InventoryService:
 
     @staticmethod
     @transaction.atomic
-    def actualizar_stock(producto_id, cantidad, tipo, referencia=None, tipo_referencia=None, notas=None):
+    def actualizar_stock(producto_id, cantidad, tipo, referencia=None, tipo_referencia=None, notas=None,
+                         invalidar=True):
         """
         Actualiza el stock de un producto y crea un movimiento de inventario
         
@@ -50,6 +71,8 @@ class InventoryService:
             referencia: Referencia del movimiento (ej: número de orden)
             tipo_referencia: Tipo de referencia (ej: 'orden_compra', 'orden_venta')
             notas: Notas adicionales
+            invalidar: Si es False, quien llama invalida la caché de productos
+                (las órdenes lo hacen una vez para todas sus líneas)
             
         Returns:
             MovimientoInventario: El movimiento creado
@@ -58,29 +81,33 @@ class InventoryService:
             InsufficientStockException: Si no hay stock suficiente para salida
         """
         try:
-            producto = Producto.objects.select_for_update().get(id=producto_id)
+            # Medir cuánto se espera por el bloqueo de la fila del producto
+            with STOCK_LOCK_WAIT.time():
+                producto = Producto.objects.select_for_update().get(pk=producto_id)
         except Producto.DoesNotExist:
             raise ValueError(f"Producto con ID {producto_id} no existe")
 
         # Validar stock suficiente para salidas
-        if tipo == 'salida' and producto.stock_actual < cantidad:
+        if tipo == 'salida' and producto.cantidad_actual < cantidad:
             raise InsufficientStockException(
                 f"Stock insuficiente para {producto.nombre}. "
-                f"Disponible: {producto.stock_actual}, Requerido: {cantidad}"
+                f"Disponible: {producto.cantidad_actual}, Requerido: {cantidad}"
             )
 
         # Actualizar stock según el tipo de movimiento
         if tipo == 'entrada':
-            producto.stock_actual += cantidad
+            producto.cantidad_actual += cantidad
         elif tipo == 'salida':
-            producto.stock_actual -= cantidad
+            producto.cantidad_actual -= cantidad
         elif tipo == 'ajuste':
             # Para ajustes, la cantidad puede ser positiva o negativa
-            producto.stock_actual = cantidad
+            producto.cantidad_actual = cantidad
         else:
             raise ValueError(f"Tipo de movimiento inválido: {tipo}")
 
         producto.save()
+        if invalidar:
+            invalidar_al_confirmar('productos', [producto_id])
 
         # Crear movimiento de inventario
         movimiento = MovimientoInventario.objects.create(
@@ -107,8 +134,8 @@ class InventoryService:
             bool: True si hay stock suficiente, False en caso contrario
         """
         try:
-            producto = Producto.objects.get(id=producto_id)
-            return producto.stock_actual >= cantidad
+            producto = Producto.objects.get(pk=producto_id)
+            return producto.cantidad_actual >= cantidad
         except Producto.DoesNotExist:
             return False
 
@@ -165,7 +192,8 @@ class InventoryService:
             fecha_fin: Fecha de fin del rango (opcional)
             
         Returns:
-            QuerySet: Movimientos del producto
+            QuerySet: Movimientos del producto (los archivados por
+            archivar_movimientos están en ArchivoMovimientosService.buscar)
         """
         movimientos = MovimientoInventario.objects.filter(
             producto_id=producto_id
@@ -343,13 +371,15 @@ class OrdenCompraService:
         # Actualizar stock de cada producto
         for detalle in orden.detalles.all():
             InventoryService.actualizar_stock(
-                producto_id=detalle.producto.id,
+                producto_id=detalle.producto_id,
                 cantidad=detalle.cantidad,
                 tipo='entrada',
                 referencia=orden.numero_orden,
                 tipo_referencia='orden_compra',
-                notas=f"Recepción de orden de compra {orden.numero_orden}"
+                notas=f"Recepción de orden de compra {orden.numero_orden}",
+                invalidar=False
             )
+        invalidar_al_confirmar('productos', {d.producto_id for d in orden.detalles.all()})
 
         # Cambiar estado de la orden
         orden.estado = 'recibida'
@@ -589,24 +619,26 @@ class OrdenVentaService:
         # Validar stock disponible antes de confirmar
         for detalle in orden.detalles.all():
             if not InventoryService.verificar_stock_disponible(
-                detalle.producto.id,
+                detalle.producto_id,
                 detalle.cantidad
             ):
                 raise InsufficientStockException(
                     f"Stock insuficiente para {detalle.producto.nombre}. "
-                    f"Disponible: {detalle.producto.stock_actual}, Requerido: {detalle.cantidad}"
+                    f"Disponible: {detalle.producto.cantidad_actual}, Requerido: {detalle.cantidad}"
                 )
 
         # Reducir stock de cada producto
         for detalle in orden.detalles.all():
             InventoryService.actualizar_stock(
-                producto_id=detalle.producto.id,
+                producto_id=detalle.producto_id,
                 cantidad=detalle.cantidad,
                 tipo='salida',
                 referencia=orden.numero_orden,
                 tipo_referencia='orden_venta',
-                notas=f"Venta - Orden {orden.numero_orden}"
+                notas=f"Venta - Orden {orden.numero_orden}",
+                invalidar=False
             )
+        invalidar_al_confirmar('productos', {d.producto_id for d in orden.detalles.all()})
 
         # Cambiar estado de la orden
         orden.estado = 'confirmada'
@@ -646,13 +678,15 @@ class OrdenVentaService:
         if orden.estado == 'confirmada':
             for detalle in orden.detalles.all():
                 InventoryService.actualizar_stock(
-                    producto_id=detalle.producto.id,
+                    producto_id=detalle.producto_id,
                     cantidad=detalle.cantidad,
                     tipo='entrada',
                     referencia=orden.numero_orden,
                     tipo_referencia='cancelacion_venta',
-                    notas=f"Devolución por cancelación de orden {orden.numero_orden}"
+                    notas=f"Devolución por cancelación de orden {orden.numero_orden}",
+                    invalidar=False
                 )
+            invalidar_al_confirmar('productos', {d.producto_id for d in orden.detalles.all()})
 
         orden.estado = 'cancelada'
         if motivo:
@@ -1025,3 +1059,1472 @@ class ReporteService:
         )[:limite]
 
         return top_productos
+
+
+# ============================================================================
+# REPORTE JOB SERVICE
+# ============================================================================
+
+class ReporteJobService:
+    """Servicio para la cola de reportes en segundo plano (sin broker externo)"""
+
+    MAX_INTENTOS = 3
+
+    @staticmethod
+    def encolar(tipo, parametros):
+        """
+        Encola un reporte, reutilizando un trabajo idéntico si ya existe
+
+        Se reutiliza un trabajo con la misma clave que esté pendiente, en
+        proceso, o completado dentro de REPORT_JOB_RESULT_TTL segundos.
+
+        Args:
+            tipo: Nombre del reporte
+            parametros: Parámetros normalizados (ver reportes.normalizar_parametros)
+
+        Returns:
+            ReporteJob: El trabajo nuevo o el reutilizado
+        """
+        clave = clave_reporte(tipo, parametros)
+        vigencia = timezone.now() - timedelta(seconds=settings.REPORT_JOB_RESULT_TTL)
+
+        with transaction.atomic():
+            # Serializar encolados idénticos para no crear trabajos duplicados
+            with connection.cursor() as cursor:
+                cursor.execute("SELECT pg_advisory_xact_lock(hashtext(%s))", [clave])
+
+            existente = ReporteJob.objects.filter(clave=clave).filter(
+                Q(estado__in=['PENDIENTE', 'EN_PROCESO']) |
+                Q(estado='COMPLETADO', fecha_fin__gte=vigencia)
+            ).order_by('-fecha_creacion').first()
+            if existente:
+                return existente
+
+            return ReporteJob.objects.create(tipo=tipo, parametros=parametros, clave=clave)
+
+    @staticmethod
+    def tomar_siguiente():
+        """
+        Toma el trabajo pendiente más antiguo y lo marca en proceso
+
+        Usa SELECT ... FOR UPDATE SKIP LOCKED para que varios workers puedan
+        consumir la cola a la vez sin tomar el mismo trabajo.
+
+        Returns:
+            ReporteJob o None si la cola está vacía
+        """
+        with transaction.atomic():
+            job = ReporteJob.objects.select_for_update(skip_locked=True).filter(
+                estado='PENDIENTE'
+            ).order_by('fecha_creacion').first()
+            if job is None:
+                return None
+
+            job.estado = 'EN_PROCESO'
+            job.intentos += 1
+            job.fecha_inicio = timezone.now()
+            job.save(update_fields=['estado', 'intentos', 'fecha_inicio'])
+        return job
+
+    @staticmethod
+    def ejecutar(job):
+        """
+        Calcula el reporte de un trabajo y guarda el resultado o el error
+
+        Returns:
+            ReporteJob: El trabajo actualizado
+        """
+        try:
+            # El cálculo solo lee: va a la réplica si está configurada
+            with lecturas_en_replica():
+                job.resultado = generar_reporte(job.tipo, job.parametros)
+            job.estado = 'COMPLETADO'
+            job.error = None
+        except Exception as e:
+            job.estado = 'ERROR'
+            job.error = str(e)
+        job.fecha_fin = timezone.now()
+        job.save(update_fields=['resultado', 'estado', 'error', 'fecha_fin'])
+        return job
+
+    @staticmethod
+    def recuperar_abandonados(timeout):
+        """
+        Devuelve a la cola los trabajos en proceso de un worker que murió
+
+        Args:
+            timeout: Segundos tras los cuales un trabajo en proceso se considera abandonado
+
+        Returns:
+            int: Número de trabajos recuperados
+        """
+        limite = timezone.now() - timedelta(seconds=timeout)
+        abandonados = ReporteJob.objects.filter(estado='EN_PROCESO', fecha_inicio__lt=limite)
+
+        abandonados.filter(intentos__gte=ReporteJobService.MAX_INTENTOS).update(
+            estado='ERROR', error='Se agotaron los intentos', fecha_fin=timezone.now()
+        )
+        return abandonados.filter(intentos__lt=ReporteJobService.MAX_INTENTOS).update(estado='PENDIENTE')
+
+    @staticmethod
+    def limpiar(dias):
+        """Elimina trabajos terminados hace más de `dias` días"""
+        limite = timezone.now() - timedelta(days=dias)
+        eliminados, _ = ReporteJob.objects.filter(
+            estado__in=['COMPLETADO', 'ERROR'], fecha_fin__lt=limite
+        ).delete()
+        return eliminados
+
+
+# ============================================================================
+# REPORTE COMPARTIDO SERVICE
+# ============================================================================
+
+class ReporteCompartidoService:
+    """
+    Caché de resultados de reportes, sin repetir el trabajo entre peticiones simultáneas
+
+    Cada resultado se guarda en reportes_resultados por clave_reporte (tipo +
+    parámetros normalizados + versión de las tablas que lee el reporte) con
+    un vencimiento según el rango (ver `ttl`). Cualquier escritura en esas
+    tablas cambia la clave: ventas con fecha pasada u órdenes eliminadas no
+    dejan resultados viejos en uso.
+    Antes de vencer, una petición puede recalcularlo con probabilidad
+    creciente (XFetch, ver `_refrescar_antes`), así que un reporte muy pedido
+    se renueva una sola vez y no todas sus peticiones a la vez al vencer.
+
+    Las peticiones idénticas que llegan mientras el reporte se calcula
+    esperan ese cálculo en lugar de repetirlo:
+
+    - Dentro del worker, un lock por clave (CalculoUnico): solo un thread sigue.
+    - Entre workers, un advisory lock de PostgreSQL: solo un proceso calcula y
+      guarda el resultado en reportes_resultados; los demás sondean la tabla
+      hasta encontrar un resultado calculado después de su llegada.
+
+    Si la espera supera ESPERA_MAXIMA (un cálculo colgado), se calcula sin
+    esperar más.
+    """
+
+    # Espacio de los advisory locks de dos claves (no choca con los de una
+    # clave de ReporteJobService.encolar)
+    BLOQUEO_REPORTES = 4_302_002
+    ESPERA_MAXIMA = 30
+    INTERVALO_SONDEO = 0.1
+
+    # Locks por clave de los threads de este proceso
+    calculos = CalculoUnico()
+
+    @staticmethod
+    def ttl(tipo, parametros):
+        """
+        Segundos de validez de un resultado
+
+        Las escrituras ya invalidan por versión (ver `obtener`); el TTL acota
+        lo que un resultado ocupa la tabla. Los rangos que terminan antes de
+        hoy (settings.TIME_ZONE) rara vez cambian: REPORT_CACHE_TTL_HISTORICO.
+        Los que incluyen hoy, y el inventario (estado actual),
+        REPORT_CACHE_TTL_RECIENTE.
+        """
+        fecha_fin = parametros.get('fecha_fin')
+        if fecha_fin and date.fromisoformat(fecha_fin) < timezone.localdate():
+            return settings.REPORT_CACHE_TTL_HISTORICO
+        return settings.REPORT_CACHE_TTL_RECIENTE
+
+    @staticmethod
+    def _refrescar_antes(duracion, vence, ahora):
+        """
+        XFetch: True si esta petición debe recalcular un resultado aún vigente
+
+        La probabilidad crece al acercarse el vencimiento y con lo que tarda
+        el cálculo (Vattani et al., "Optimal Probabilistic Cache Stampede
+        Prevention").
+        """
+        adelanto = -duracion * settings.REPORT_CACHE_XFETCH_BETA * math.log(1 - random.random())
+        return ahora + timedelta(seconds=adelanto) >= vence
+
+    @staticmethod
+    def obtener(tipo, parametros, usar_cache=True, generar=generar_reporte):
+        """
+        Resultado de un reporte: guardado y vigente, o calculado uniéndose al cálculo en curso
+
+        Args:
+            tipo: Nombre del reporte
+            parametros: Parámetros normalizados (ver reportes.normalizar_parametros)
+            usar_cache: False para no usar un resultado guardado (Cache-Control:
+                no-cache); se recibe uno calculado después de la llegada
+            generar: Función (tipo, parametros) que calcula el reporte si hace
+                falta (la vista async pasa la versión con consultas en paralelo)
+        """
+        # Versiones leídas antes que los datos, de la misma base (ver ETagMixin)
+        versiones = VersionesService.obtener(TABLAS_REPORTE[tipo])
+        if versiones is None:
+            # Alguna tabla sin trigger: no hay forma de saber si el resultado sigue vigente
+            usar_cache = False
+        clave = clave_reporte(tipo, parametros, versiones)
+        llegada = timezone.now()
+
+        if usar_cache:
+            guardado = ResultadoReporte.objects.using(DEFAULT_DB_ALIAS).filter(
+                clave=clave, vence__gt=llegada
+            ).values_list('resultado', 'duracion', 'vence').first()
+            if guardado is not None:
+                resultado, duracion, vence = guardado
+                if not ReporteCompartidoService._refrescar_antes(duracion, vence, llegada):
+                    registrar_cache('reportes', True)
+                    return resultado
+
+        with ReporteCompartidoService.calculos.bloqueo(clave, ReporteCompartidoService.ESPERA_MAXIMA):
+            # Otro thread del proceso pudo terminarlo mientras se esperaba
+            resultado = ReporteCompartidoService._calculado_desde(clave, llegada)
+            if resultado is not None:
+                registrar_cache('reportes', True)
+                return resultado
+            return ReporteCompartidoService._calcular(tipo, parametros, clave, llegada, generar)
+
+    @staticmethod
+    def _calculado_desde(clave, desde):
+        """Resultado guardado después de `desde`, o None (siempre lee la primaria)"""
+        return ResultadoReporte.objects.using(DEFAULT_DB_ALIAS).filter(
+            clave=clave, fecha_calculo__gte=desde
+        ).values_list('resultado', flat=True).first()
+
+    @staticmethod
+    def _calcular(tipo, parametros, clave, llegada, generar):
+        """Calcula con el advisory lock de la clave, o toma el resultado de quien lo tenga"""
+        bloqueo = [ReporteCompartidoService.BLOQUEO_REPORTES, clave]
+        limite = time.monotonic() + ReporteCompartidoService.ESPERA_MAXIMA
+
+        with connection.cursor() as cursor:
+            while True:
+                cursor.execute("SELECT pg_try_advisory_lock(%s, hashtext(%s))", bloqueo)
+                if cursor.fetchone()[0]:
+                    break
+                time.sleep(ReporteCompartidoService.INTERVALO_SONDEO)
+                resultado = ReporteCompartidoService._calculado_desde(clave, llegada)
+                if resultado is not None:
+                    registrar_cache('reportes', True)
+                    return resultado
+                if time.monotonic() >= limite:
+                    registrar_cache('reportes', False)
+                    return ReporteCompartidoService._generar_y_guardar(tipo, parametros, clave, generar)
+
+            try:
+                # Quien soltó el lock pudo terminar justo antes
+                resultado = ReporteCompartidoService._calculado_desde(clave, llegada)
+                if resultado is not None:
+                    registrar_cache('reportes', True)
+                    return resultado
+                registrar_cache('reportes', False)
+                return ReporteCompartidoService._generar_y_guardar(tipo, parametros, clave, generar)
+            finally:
+                cursor.execute("SELECT pg_advisory_unlock(%s, hashtext(%s))", bloqueo)
+
+    @staticmethod
+    def _generar_y_guardar(tipo, parametros, clave, generar):
+        inicio = time.perf_counter()
+        resultado = generar(tipo, parametros)
+        duracion = time.perf_counter() - inicio
+
+        ahora = timezone.now()
+        ResultadoReporte.objects.bulk_create(
+            [ResultadoReporte(
+                clave=clave, tipo=tipo, parametros=parametros, resultado=resultado,
+                fecha_calculo=ahora, duracion=duracion,
+                vence=ahora + timedelta(seconds=ReporteCompartidoService.ttl(tipo, parametros)),
+            )],
+            update_conflicts=True,
+            unique_fields=['clave'],
+            update_fields=['resultado', 'fecha_calculo', 'duracion', 'vence'],
+        )
+        return resultado
+
+    @staticmethod
+    def limpiar():
+        """Elimina los resultados vencidos"""
+        eliminados, _ = ResultadoReporte.objects.filter(vence__lt=timezone.now()).delete()
+        return eliminados
+
+
+# ============================================================================
+# VERSIONES SERVICE
+# ============================================================================
+
+class VersionesService:
+    """
+    Versión de datos por tabla (tabla versiones_tablas, llenada por triggers)
+
+    La versión de una tabla aumenta con cada sentencia que la modifica; es la
+    base de los ETag de ETagMixin. Ver la migración 0010_versiones_tablas.
+    """
+
+    _con_trigger = {}  # alias de la base -> frozenset de tablas con el trigger version_tabla
+
+    @staticmethod
+    def tablas_con_trigger():
+        """
+        Tablas que tienen el trigger version_tabla en la base de lectura
+
+        Se consulta una vez por proceso y base: los triggers se instalan con
+        migrate, antes de arrancar los workers.
+        """
+        conexion = conexion_lectura()
+        tablas = VersionesService._con_trigger.get(conexion.alias)
+        if tablas is None:
+            with conexion.cursor() as cursor:
+                cursor.execute("""
+                    SELECT c.relname
+                    FROM pg_trigger t
+                    JOIN pg_class c ON c.oid = t.tgrelid
+                    WHERE t.tgname = 'version_tabla' AND pg_table_is_visible(c.oid)
+                """)
+                tablas = frozenset(fila[0] for fila in cursor.fetchall())
+            VersionesService._con_trigger[conexion.alias] = tablas
+        return tablas
+
+    @staticmethod
+    def obtener(tablas):
+        """
+        Versión actual de cada tabla
+
+        Se lee de la misma base que los datos de la petición (primaria o
+        réplica): una versión más nueva que los datos leídos dejaría al
+        cliente con datos viejos bajo un ETag vigente.
+
+        Returns:
+            dict: {tabla: versión}; 0 para tablas nunca modificadas. None si
+            alguna tabla no tiene el trigger: su versión nunca cambiaría
+        """
+        tablas = list(tablas)
+        sin_trigger = set(tablas) - VersionesService.tablas_con_trigger()
+        if sin_trigger:
+            return None
+        with conexion_lectura().cursor() as cursor:
+            cursor.execute("""
+                SELECT tabla, SUM(version)
+                FROM versiones_tablas
+                WHERE tabla = ANY(%s)
+                GROUP BY tabla
+            """, [tablas])
+            versiones = dict(cursor.fetchall())
+        return {tabla: int(versiones.get(tabla, 0)) for tabla in tablas}
+
+
+# ============================================================================
+# CAMBIOS SERVICE
+# ============================================================================
+
+class CambiosService:
+    """
+    Lectura del registro de cambios (tabla registro_cambios, llenada por triggers)
+
+    El cursor es el par (xid, id) del último cambio entregado, como texto
+    'xid:id'. Solo se entregan cambios de transacciones anteriores al xmin
+    del snapshot actual: una transacción que aún no terminó podría confirmar
+    después cambios con ids menores, y con un cursor por id se perderían.
+    """
+
+    LIMITE = 1000
+
+    @staticmethod
+    def _parsear_cursor(cursor):
+        """Convierte 'xid:id' en (xid, id); ValueError si es inválido"""
+        xid, _, id_cambio = cursor.partition(':')
+        if not xid.isdigit() or not id_cambio.isdigit():
+            raise ValueError('since debe ser un cursor retornado por este endpoint')
+        return int(xid), int(id_cambio)
+
+    @staticmethod
+    def cursor_actual():
+        """Cursor a partir del cual se entregan los cambios aún no confirmados"""
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT pg_snapshot_xmin(pg_current_snapshot())::text")
+            return f'{cursor.fetchone()[0]}:0'
+
+    @staticmethod
+    def obtener(recurso, desde, limite=None):
+        """
+        Obtiene los cambios de un recurso posteriores a un cursor
+
+        Args:
+            recurso: Nombre del recurso (ej: 'productos')
+            desde: Cursor 'xid:id'
+            limite: Máximo de cambios a leer
+
+        Returns:
+            dict con 'cursor' (nuevo cursor), 'modificados' (ids insertados o
+            actualizados), 'eliminados' (ids borrados) y 'hay_mas'
+
+        Raises:
+            ValueError: Si el cursor es inválido
+        """
+        limite = limite or CambiosService.LIMITE
+        xid, id_cambio = CambiosService._parsear_cursor(desde)
+
+        with connection.cursor() as cursor:
+            cursor.execute("""
+                SELECT xid::text, id, id_registro, operacion
+                FROM registro_cambios
+                WHERE recurso = %s
+                  AND (xid, id) > (%s::text::xid8, %s)
+                  AND xid < pg_snapshot_xmin(pg_current_snapshot())
+                ORDER BY xid, id
+                LIMIT %s
+            """, [recurso, str(xid), id_cambio, limite])
+            filas = cursor.fetchall()
+
+            if filas:
+                nuevo_cursor = f'{filas[-1][0]}:{filas[-1][1]}'
+            else:
+                # Todo lo anterior al xmin ya se entregó: avanzar hasta él
+                cursor.execute("SELECT pg_snapshot_xmin(pg_current_snapshot())::text")
+                xmin = int(cursor.fetchone()[0])
+                nuevo_cursor = f'{max(xmin, xid)}:{0 if xmin > xid else id_cambio}'
+
+        # La última operación de cada registro define si está vivo o eliminado
+        ultima = {}
+        for _, _, id_registro, operacion in filas:
+            ultima[id_registro] = operacion
+
+        return {
+            'cursor': nuevo_cursor,
+            'modificados': [i for i, op in ultima.items() if op != 'D'],
+            'eliminados': [i for i, op in ultima.items() if op == 'D'],
+            'hay_mas': len(filas) == limite,
+        }
+
+    @staticmethod
+    def purgar(dias):
+        """Elimina cambios de más de `dias` días; retorna cuántos se eliminaron"""
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "DELETE FROM registro_cambios WHERE fecha < now() - make_interval(days => %s)",
+                [dias]
+            )
+            return cursor.rowcount
+
+
+# ============================================================================
+# CATÁLOGO SERVICE
+# ============================================================================
+
+class CatalogoService:
+    """
+    Importación masiva del catálogo de productos desde CSV
+
+    El archivo se carga con COPY a una tabla temporal de texto, se valida con
+    SQL y se aplica con un solo INSERT ... ON CONFLICT (sku_producto) sobre
+    productos. Las filas inválidas se rechazan sin afectar a las demás.
+    """
+
+    TABLA_STAGING = 'importacion_productos'
+
+    # Columnas que acepta el CSV y la validación de cada una
+    COLUMNAS = {
+        'sku_producto': ("length(btrim({c})) > 100", 'sku_producto de más de 100 caracteres'),
+        'nombre': ("length(btrim({c})) > 255", 'nombre de más de 255 caracteres'),
+        'precio_compra_unitario': ("btrim({c}) !~ '^\\d{{1,9}}$'", 'precio_compra_unitario debe ser un entero'),
+        'precio_final': ("btrim({c}) !~ '^\\d{{1,8}}(\\.\\d{{1,2}})?$'", 'precio_final inválido'),
+        'cantidad_minima': ("btrim({c}) !~ '^\\d{{1,9}}$'", 'cantidad_minima debe ser un entero'),
+    }
+    # Conversión del texto validado al tipo de productos
+    CONVERSION = {
+        'sku_producto': 'btrim(sku_producto)',
+        'nombre': 'btrim(nombre)',
+        'precio_compra_unitario': 'btrim(precio_compra_unitario)::integer',
+        'precio_final': 'btrim(precio_final)::numeric(10, 2)',
+        'cantidad_minima': 'btrim(cantidad_minima)::integer',
+    }
+    # Valor para productos nuevos cuando la columna no viene en el CSV
+    POR_DEFECTO = {
+        'nombre': "''",
+        'precio_compra_unitario': '0',
+        'precio_final': '0',
+        'cantidad_minima': '0',
+    }
+    # Sin estas columnas el CSV solo puede actualizar productos existentes
+    OBLIGATORIAS = ('nombre', 'precio_compra_unitario', 'precio_final')
+
+    MAX_ERRORES = 100
+
+    @staticmethod
+    def _leer_encabezado(archivo, delimitador):
+        """Retorna (columnas de staging en orden del CSV, columnas ignoradas)"""
+        linea = archivo.readline()
+        nombres = [n.strip().lower() for n in next(csv.reader([linea], delimiter=delimitador), [])]
+
+        if 'sku_producto' not in nombres:
+            raise ValueError('El CSV debe tener encabezado con la columna sku_producto')
+        repetidas = sorted({n for n in nombres if n and nombres.count(n) > 1})
+        if repetidas:
+            raise ValueError(f"Columnas repetidas en el encabezado: {', '.join(repetidas)}")
+
+        columnas, ignoradas = [], []
+        for i, nombre in enumerate(nombres):
+            if nombre in CatalogoService.COLUMNAS:
+                columnas.append(nombre)
+            else:
+                # Columnas extra del proveedor: se cargan pero no se usan
+                columnas.append(f'extra_{i}')
+                ignoradas.append(nombre)
+        return columnas, ignoradas
+
+    @staticmethod
+    def importar_csv(archivo, simular=False, delimitador=','):
+        """
+        Crea o actualiza productos por sku_producto a partir de un CSV
+
+        Solo se actualizan las columnas presentes en el CSV; para crear un
+        producto se requieren nombre, precio_compra_unitario y precio_final.
+        El stock no se importa (los productos nuevos empiezan en 0).
+
+        Args:
+            archivo: Archivo binario con el CSV (UTF-8, con encabezado)
+            simular: Si es True, valida y cuenta sin guardar cambios
+            delimitador: Separador de campos
+
+        Returns:
+            dict con 'total', 'insertados', 'actualizados', 'sin_cambios',
+            'rechazados', 'errores' (primeras filas rechazadas con su motivo)
+            y 'columnas_ignoradas'
+
+        Raises:
+            ValueError: Si el encabezado o el formato CSV son inválidos, o
+                falta el índice único de sku_producto
+        """
+        texto = io.TextIOWrapper(archivo, encoding='utf-8-sig', newline='')
+        columnas, ignoradas = CatalogoService._leer_encabezado(texto, delimitador)
+        presentes = [c for c in CatalogoService.COLUMNAS if c in columnas]
+        staging = CatalogoService.TABLA_STAGING
+
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.execute("SELECT to_regclass('productos_sku_producto_uniq') IS NOT NULL")
+            if not cursor.fetchone()[0]:
+                raise ValueError(
+                    'Falta el índice único de productos.sku_producto (hay SKUs repetidos); '
+                    'corregirlos y volver a aplicar la migración api.0004'
+                )
+
+            definicion = ', '.join(f'{quote_ident(c)} text' for c in columnas)
+            cursor.execute(
+                f"CREATE TEMP TABLE {staging} (linea bigserial, {definicion}, error text) ON COMMIT DROP"
+            )
+            try:
+                copy_csv(cursor, staging, columnas, texto, delimitador)
+            except (DataError, connection.Database.DataError, UnicodeDecodeError) as e:
+                # COPY usa el cursor del driver: sus errores no pasan por Django
+                raise ValueError(f'CSV inválido: {e}')
+
+            # Validación por fila: la primera condición que falla es el motivo
+            condiciones = []
+            for columna in presentes:
+                condicion, mensaje = CatalogoService.COLUMNAS[columna]
+                condiciones.append(f"WHEN coalesce(btrim({columna}), '') = '' THEN '{columna} vacío'")
+                condiciones.append(f"WHEN {condicion.format(c=columna)} THEN '{mensaje}'")
+            cursor.execute(f"UPDATE {staging} SET error = CASE {' '.join(condiciones)} END")
+
+            # SKU repetido en el archivo: vale la última aparición
+            cursor.execute(f"""
+                UPDATE {staging} s SET error = 'sku_producto repetido más abajo en el archivo'
+                FROM (
+                    SELECT linea, row_number() OVER (
+                        PARTITION BY btrim(sku_producto) ORDER BY linea DESC
+                    ) AS n
+                    FROM {staging}
+                    WHERE error IS NULL
+                ) r
+                WHERE s.linea = r.linea AND r.n > 1
+            """)
+
+            faltantes = [c for c in CatalogoService.OBLIGATORIAS if c not in presentes]
+            if faltantes:
+                cursor.execute(f"""
+                    UPDATE {staging} s SET error = %s
+                    WHERE error IS NULL
+                      AND NOT EXISTS (SELECT 1 FROM productos p WHERE p.sku_producto = btrim(s.sku_producto))
+                """, [f"Producto nuevo sin {', '.join(faltantes)}"])
+
+            # Upsert en una sola sentencia. Los valores por defecto de columnas
+            # obligatorias ausentes nunca llegan a un producto nuevo (se
+            # rechazaron arriba); las filas sin cambios no se reescriben.
+            valores = [
+                CatalogoService.CONVERSION[c] if c in presentes else defecto
+                for c, defecto in CatalogoService.POR_DEFECTO.items()
+            ]
+            actualizables = [c for c in presentes if c != 'sku_producto']
+            if actualizables:
+                conflicto = f"""
+                    DO UPDATE SET {', '.join(f'{c} = EXCLUDED.{c}' for c in actualizables)}
+                    WHERE ROW({', '.join(f'productos.{c}' for c in actualizables)})
+                        IS DISTINCT FROM ROW({', '.join(f'EXCLUDED.{c}' for c in actualizables)})
+                """
+            else:
+                conflicto = 'DO NOTHING'
+            cursor.execute(f"""
+                WITH resultado AS (
+                    INSERT INTO productos (
+                        sku_producto, {', '.join(CatalogoService.POR_DEFECTO)}, cantidad_actual, cantidad_total
+                    )
+                    SELECT {CatalogoService.CONVERSION['sku_producto']}, {', '.join(valores)}, 0, 0
+                    FROM {staging}
+                    WHERE error IS NULL
+                    ORDER BY linea
+                    ON CONFLICT (sku_producto) {conflicto}
+                    RETURNING (xmax = 0) AS insertado
+                )
+                SELECT count(*) FILTER (WHERE insertado), count(*) FILTER (WHERE NOT insertado)
+                FROM resultado
+            """)
+            insertados, actualizados = cursor.fetchone()
+
+            cursor.execute(f"""
+                SELECT count(*), count(*) FILTER (WHERE error IS NOT NULL) FROM {staging}
+            """)
+            total, rechazados = cursor.fetchone()
+
+            cursor.execute(f"""
+                SELECT linea + 1, sku_producto, error FROM {staging}
+                WHERE error IS NOT NULL ORDER BY linea LIMIT %s
+            """, [CatalogoService.MAX_ERRORES])
+            errores = [
+                {'linea': linea, 'sku_producto': sku, 'error': error}
+                for linea, sku, error in cursor.fetchall()
+            ]
+
+            if simular:
+                transaction.set_rollback(True)
+            else:
+                invalidar_al_confirmar('productos')
+
+        return {
+            'total': total,
+            'insertados': insertados,
+            'actualizados': actualizados,
+            'sin_cambios': total - rechazados - insertados - actualizados,
+            'rechazados': rechazados,
+            'errores': errores,
+            'columnas_ignoradas': ignoradas,
+            'simulado': simular,
+        }
+
+
+# ============================================================================
+# PRECIO SERVICE
+# ============================================================================
+
+class PrecioService:
+    """
+    Ajuste masivo de precios con un solo UPDATE
+
+    El precio nuevo se calcula en la base de datos con una expresión, así que
+    reajustar todo el catálogo es una sola sentencia sin importar cuántos
+    productos tenga. Cada ajuste aplicado queda registrado en AjustePrecio.
+    """
+
+    # Límite de precio_final (numeric(10, 2))
+    PRECIO_MAXIMO = Decimal('99999999.99')
+    TAMANO_MUESTRA = 20
+
+    @staticmethod
+    def seleccionar(search=None, sku_prefijo=None, stock=None):
+        """Productos a ajustar según los filtros (mismos criterios que el listado)"""
+        queryset = Producto.objects.all()
+        if search:
+            queryset = queryset.filter(Q(sku_producto__icontains=search) | Q(nombre__icontains=search))
+        if sku_prefijo:
+            queryset = queryset.filter(sku_producto__startswith=sku_prefijo)
+        if stock == 'bajo':
+            queryset = queryset.filter(cantidad_actual__lte=F('cantidad_minima'))
+        elif stock == 'agotado':
+            queryset = queryset.filter(cantidad_actual=0)
+        elif stock == 'con_stock':
+            queryset = queryset.filter(cantidad_actual__gt=0)
+        return queryset
+
+    @staticmethod
+    def expresion_precio(modo, valor, redondeo=None):
+        """
+        Expresión SQL del precio nuevo
+
+        Args:
+            modo: 'porcentaje' (sobre precio_final), 'monto' (suma a
+                precio_final) o 'margen' (porcentaje sobre precio_compra_unitario)
+            valor: Porcentaje o monto
+            redondeo: Múltiplo al que se redondea (default: centavos)
+        """
+        decimal = DecimalField(max_digits=14, decimal_places=4)
+        if modo == 'monto':
+            nuevo = F('precio_final') + Value(valor, output_field=decimal)
+        else:
+            base = F('precio_compra_unitario') if modo == 'margen' else F('precio_final')
+            nuevo = Cast(base, decimal) * Value(1 + valor / 100, output_field=decimal)
+
+        if redondeo:
+            paso = Value(redondeo, output_field=decimal)
+            nuevo = Round(nuevo / paso) * paso
+        else:
+            nuevo = Round(nuevo, 2)
+        return ExpressionWrapper(nuevo, output_field=DecimalField(max_digits=10, decimal_places=2))
+
+    @staticmethod
+    def ajustar(modo, valor, redondeo=None, search=None, sku_prefijo=None, stock=None,
+                simular=False, notas=None):
+        """
+        Calcula (simular=True) o aplica un ajuste de precios
+
+        Returns:
+            dict con 'productos' (seleccionados), 'cambian', 'total_antes',
+            'total_despues', 'fuera_de_rango', 'muestra' (primeros productos
+            con su precio actual y nuevo) y, si se aplicó, 'actualizados' y
+            'ajuste' (id del registro de auditoría)
+
+        Al aplicar, las filas seleccionadas se bloquean antes de validar: nadie
+        cambia sus precios entre la validación y el UPDATE. El UPDATE además
+        solo toca precios nuevos dentro del rango, así que un producto creado
+        en medio (no bloqueado) nunca hace fallar la sentencia.
+
+        Raises:
+            ValueError: Si algún precio nuevo queda negativo o excede el máximo
+        """
+        queryset = PrecioService.seleccionar(search, sku_prefijo, stock)
+        precio_nuevo = PrecioService.expresion_precio(modo, valor, redondeo)
+        anotado = queryset.annotate(precio_nuevo=precio_nuevo)
+        fuera_de_rango = Q(precio_nuevo__lt=0) | Q(precio_nuevo__gt=PrecioService.PRECIO_MAXIMO)
+
+        with transaction.atomic():
+            if not simular:
+                # En orden de pk para no provocar deadlocks con otros ajustes
+                list(queryset.select_for_update().order_by('pk').values_list('pk', flat=True))
+            resumen = anotado.aggregate(
+                productos=Count('pk'),
+                cambian=Count('pk', filter=~Q(precio_final=F('precio_nuevo'))),
+                total_antes=Coalesce(Sum('precio_final'), Decimal('0')),
+                total_despues=Coalesce(Sum('precio_nuevo'), Decimal('0')),
+                fuera_de_rango=Count('pk', filter=fuera_de_rango),
+            )
+            resumen['muestra'] = list(
+                anotado.order_by('nombre').values(
+                    'id_producto', 'sku_producto', 'nombre', 'precio_final', 'precio_nuevo'
+                )[:PrecioService.TAMANO_MUESTRA]
+            )
+            resumen['simulado'] = simular
+            if simular:
+                return resumen
+
+            if resumen['fuera_de_rango']:
+                raise ValueError(
+                    f"El ajuste deja {resumen['fuera_de_rango']} producto(s) con precio negativo "
+                    f"o mayor a {PrecioService.PRECIO_MAXIMO}"
+                )
+
+            # Un solo UPDATE; los productos cuyo precio no cambia no se reescriben
+            actualizados = queryset.exclude(precio_final=precio_nuevo).filter(
+                GreaterThanOrEqual(precio_nuevo, Decimal('0')),
+                LessThanOrEqual(precio_nuevo, PrecioService.PRECIO_MAXIMO),
+            ).update(precio_final=precio_nuevo)
+            invalidar_al_confirmar('productos')
+
+            ajuste = AjustePrecio.objects.create(
+                modo=modo,
+                valor=valor,
+                redondeo=redondeo,
+                filtros={
+                    clave: filtro for clave, filtro in
+                    (('search', search), ('sku_prefijo', sku_prefijo), ('stock', stock)) if filtro
+                },
+                productos_afectados=actualizados,
+                total_antes=resumen['total_antes'],
+                total_despues=resumen['total_despues'],
+                notas=notas,
+            )
+
+        resumen['actualizados'] = actualizados
+        resumen['ajuste'] = ajuste.id
+        return resumen
+
+
+# ============================================================================
+# OPERACIONES MASIVAS SERVICE
+# ============================================================================
+
+class OperacionesMasivasService:
+    """
+    Eliminación y actualización de muchos registros por lotes
+
+    Cada lote es una sola sentencia dentro de un savepoint. Si el lote viola
+    una restricción (ej: una llave foránea), se revierte solo ese lote y se
+    reintenta registro por registro para informar qué ids tienen conflicto;
+    el resto se aplica normalmente. Todo corre en una transacción.
+    """
+
+    TAMANO_LOTE = 500
+
+    @staticmethod
+    def _describir_error(error):
+        """Mensaje y restricción de un IntegrityError del driver"""
+        diag = getattr(error.__cause__, 'diag', None)
+        if diag is not None and diag.message_primary:
+            return {
+                'error': diag.message_detail or diag.message_primary,
+                'restriccion': diag.constraint_name,
+            }
+        return {'error': str(error).strip().splitlines()[0], 'restriccion': None}
+
+    @staticmethod
+    def _por_lotes(ids, aplicar):
+        """
+        Aplica `aplicar(lote)` (que retorna filas afectadas) lote por lote
+
+        Returns:
+            (filas afectadas, lista de conflictos por id)
+        """
+        afectados, conflictos = 0, []
+        for inicio in range(0, len(ids), OperacionesMasivasService.TAMANO_LOTE):
+            lote = ids[inicio:inicio + OperacionesMasivasService.TAMANO_LOTE]
+            try:
+                with transaction.atomic():
+                    afectados += aplicar(lote)
+                continue
+            except IntegrityError:
+                pass
+
+            # El lote falló: registro por registro para aislar los conflictos
+            for id_registro in lote:
+                try:
+                    with transaction.atomic():
+                        afectados += aplicar([id_registro])
+                except IntegrityError as e:
+                    conflictos.append({'id': id_registro, **OperacionesMasivasService._describir_error(e)})
+        return afectados, conflictos
+
+    @staticmethod
+    def _separar_existentes(queryset, ids):
+        """Retorna (ids existentes en el queryset, ids no encontrados)"""
+        existentes = set()
+        modelo = queryset.model
+        for inicio in range(0, len(ids), OperacionesMasivasService.TAMANO_LOTE * 10):
+            lote = ids[inicio:inicio + OperacionesMasivasService.TAMANO_LOTE * 10]
+            existentes.update(queryset.filter(pk__in=lote).values_list(modelo._meta.pk.attname, flat=True))
+        return [i for i in ids if i in existentes], [i for i in ids if i not in existentes]
+
+    @staticmethod
+    def eliminar(queryset, ids):
+        """
+        Elimina por SQL directo (como los perform_destroy, sin el collector
+        de Django) los ids que pertenecen al queryset
+
+        Returns:
+            dict con 'solicitados', 'eliminados', 'no_encontrados' y 'conflictos'
+        """
+        modelo = queryset.model
+        sql = 'DELETE FROM {} WHERE {} = ANY(%s)'.format(
+            quote_ident(modelo._meta.db_table), quote_ident(modelo._meta.pk.column)
+        )
+
+        def aplicar(lote):
+            with connection.cursor() as cursor:
+                cursor.execute(sql, [lote])
+                return cursor.rowcount
+
+        with transaction.atomic():
+            existentes, no_encontrados = OperacionesMasivasService._separar_existentes(queryset, ids)
+            eliminados, conflictos = OperacionesMasivasService._por_lotes(existentes, aplicar)
+            invalidar_al_confirmar(modelo._meta.db_table, existentes)
+
+        return {
+            'solicitados': len(ids),
+            'eliminados': eliminados,
+            'no_encontrados': no_encontrados,
+            'conflictos': conflictos,
+        }
+
+    @staticmethod
+    def actualizar(queryset, ids, cambios):
+        """
+        Asigna los mismos `cambios` ({campo: valor} ya validados) a los ids
+        que pertenecen al queryset
+
+        Returns:
+            dict con 'solicitados', 'actualizados', 'no_encontrados' y 'conflictos'
+        """
+        modelo = queryset.model
+
+        def aplicar(lote):
+            return modelo.objects.filter(pk__in=lote).update(**cambios)
+
+        with transaction.atomic():
+            existentes, no_encontrados = OperacionesMasivasService._separar_existentes(queryset, ids)
+            actualizados, conflictos = OperacionesMasivasService._por_lotes(existentes, aplicar)
+            invalidar_al_confirmar(modelo._meta.db_table, existentes)
+
+        return {
+            'solicitados': len(ids),
+            'actualizados': actualizados,
+            'no_encontrados': no_encontrados,
+            'conflictos': conflictos,
+        }
+
+
+# ============================================================================
+# PARTICIONES SERVICE
+# ============================================================================
+
+class ParticionesService:
+    """
+    Particionado mensual por rango de las tablas de solo inserción
+
+    `particionar` reemplaza una tabla normal por una particionada con el mismo
+    nombre (los modelos no administrados y el SQL existente no cambian) y
+    `mantener` crea por adelantado las particiones de los próximos meses.
+    Las particiones se llaman <tabla>_pAAAA_MM; las filas fuera de todas
+    quedan en <tabla>_default hasta que se cree su mes. En columnas
+    timestamptz los meses se cortan a medianoche de settings.TIME_ZONE.
+    """
+
+    # tabla: columna de partición
+    TABLAS = {
+        'ventas': 'fecha',
+        'producto_venta': 'fecha',
+        'movimientos_inventario': 'fecha',
+    }
+    MESES_FUTUROS = 3
+    # Llave de pg_try_advisory_xact_lock: un solo mantenimiento a la vez
+    BLOQUEO_MANTENIMIENTO = 4_302_001
+    SUFIJO_ORIGINAL = '_sin_particionar'
+
+    @staticmethod
+    def tipo_tabla(cursor, tabla):
+        """relkind de la tabla: 'p' particionada, 'r' normal o None si no existe"""
+        cursor.execute("SELECT relkind FROM pg_class WHERE oid = to_regclass(%s)", [tabla])
+        fila = cursor.fetchone()
+        return fila[0] if fila else None
+
+    @staticmethod
+    def _tipo_columna(cursor, tabla, columna):
+        cursor.execute("""
+            SELECT format_type(atttypid, atttypmod)
+            FROM pg_attribute
+            WHERE attrelid = to_regclass(%s) AND attname = %s AND NOT attisdropped
+        """, [tabla, columna])
+        fila = cursor.fetchone()
+        return fila[0] if fila else None
+
+    @staticmethod
+    def nombre_particion(tabla, mes):
+        return f'{tabla}_p{mes:%Y_%m}'
+
+    @staticmethod
+    def _mes_siguiente(mes):
+        return date(mes.year + mes.month // 12, mes.month % 12 + 1, 1)
+
+    @staticmethod
+    def _meses(desde, hasta):
+        """Primer día de cada mes entre `desde` y `hasta` (inclusive)"""
+        mes = desde.replace(day=1)
+        while mes <= hasta:
+            yield mes
+            mes = ParticionesService._mes_siguiente(mes)
+
+    @staticmethod
+    def _meses_vigentes(meses_futuros=None):
+        """(mes actual, último mes que debe tener partición), como primer día del mes"""
+        if meses_futuros is None:
+            meses_futuros = ParticionesService.MESES_FUTUROS
+        actual = timezone.localdate().replace(day=1)
+        ultimo = actual
+        for _ in range(meses_futuros):
+            ultimo = ParticionesService._mes_siguiente(ultimo)
+        return actual, ultimo
+
+    @staticmethod
+    def _limite(mes, tipo):
+        """Literal SQL del inicio de `mes` para una columna de tipo `tipo`"""
+        if tipo == 'timestamp with time zone':
+            return f"'{timezone.make_aware(datetime(mes.year, mes.month, 1)).isoformat()}'"
+        return f"'{mes.isoformat()}'"
+
+    @staticmethod
+    def _expresion_mes(columna, tipo):
+        """Expresión SQL (y parámetros) del primer día del mes local de la columna"""
+        valor = quote_ident(columna)
+        if tipo == 'timestamp with time zone':
+            return f"date_trunc('month', {valor} AT TIME ZONE %s)::date", [settings.TIME_ZONE]
+        return f"date_trunc('month', {valor})::date", []
+
+    @staticmethod
+    def _particion_default(cursor, tabla):
+        cursor.execute("""
+            SELECT NULLIF(partdefid, 0)::regclass::text
+            FROM pg_partitioned_table
+            WHERE partrelid = to_regclass(%s)
+        """, [tabla])
+        fila = cursor.fetchone()
+        return fila[0] if fila else None
+
+    @staticmethod
+    def _crear_particion(cursor, tabla, columna, tipo, mes, default):
+        """
+        Crea la partición de `mes` si no existe; retorna True si la creó
+
+        Se crea como tabla suelta, recibe las filas de ese mes que estén en la
+        partición default y luego se adjunta (ATTACH valida que no queden
+        filas del rango en la default).
+        """
+        nombre = ParticionesService.nombre_particion(tabla, mes)
+        cursor.execute("SELECT to_regclass(%s) IS NOT NULL", [nombre])
+        if cursor.fetchone()[0]:
+            return False
+
+        desde = ParticionesService._limite(mes, tipo)
+        hasta = ParticionesService._limite(ParticionesService._mes_siguiente(mes), tipo)
+        rango = f'{quote_ident(columna)} >= {desde} AND {quote_ident(columna)} < {hasta}'
+
+        cursor.execute(
+            f'CREATE TABLE {quote_ident(nombre)} '
+            f'(LIKE {quote_ident(tabla)} INCLUDING DEFAULTS INCLUDING CONSTRAINTS)'
+        )
+        if default:
+            cursor.execute(f'SELECT EXISTS (SELECT 1 FROM {quote_ident(default)} WHERE {rango})')
+            if cursor.fetchone()[0]:
+                # Mover filas no es borrarlas ni insertarlas: sin registro de cambios ni NOTIFY
+                cursor.execute(f'ALTER TABLE {quote_ident(default)} DISABLE TRIGGER USER')
+                cursor.execute(f"""
+                    WITH movidas AS (DELETE FROM {quote_ident(default)} WHERE {rango} RETURNING *)
+                    INSERT INTO {quote_ident(nombre)} SELECT * FROM movidas
+                """)
+                cursor.execute(f'ALTER TABLE {quote_ident(default)} ENABLE TRIGGER USER')
+        cursor.execute(
+            f'ALTER TABLE {quote_ident(tabla)} ATTACH PARTITION {quote_ident(nombre)} '
+            f'FOR VALUES FROM ({desde}) TO ({hasta})'
+        )
+        return True
+
+    @staticmethod
+    def eliminar_si_vacia(cursor, tabla, mes):
+        """Elimina la partición de `mes` si existe y no tiene filas; retorna True si la eliminó"""
+        nombre = ParticionesService.nombre_particion(tabla, mes)
+        cursor.execute("""
+            SELECT 1 FROM pg_inherits
+            WHERE inhrelid = to_regclass(%s) AND inhparent = to_regclass(%s)
+        """, [nombre, tabla])
+        if cursor.fetchone() is None:
+            return False
+        cursor.execute(f'SELECT EXISTS (SELECT 1 FROM {quote_ident(nombre)})')
+        if cursor.fetchone()[0]:
+            return False
+        cursor.execute(f'DROP TABLE {quote_ident(nombre)}')
+        return True
+
+    @staticmethod
+    def mantener(tablas=None, meses_futuros=None):
+        """
+        Crea las particiones del mes actual y los `meses_futuros` siguientes,
+        y las de los meses que tengan filas en la partición default
+
+        Solo actúa sobre las tablas ya particionadas. Si otro proceso está
+        haciendo el mantenimiento no hace nada.
+
+        Returns:
+            list con los nombres de las particiones creadas
+        """
+        hoy, ultimo = ParticionesService._meses_vigentes(meses_futuros)
+
+        creadas = []
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.execute("SELECT pg_try_advisory_xact_lock(%s)", [ParticionesService.BLOQUEO_MANTENIMIENTO])
+            if not cursor.fetchone()[0]:
+                return creadas
+
+            for tabla in tablas or ParticionesService.TABLAS:
+                if ParticionesService.tipo_tabla(cursor, tabla) != 'p':
+                    continue
+                columna = ParticionesService.TABLAS[tabla]
+                tipo = ParticionesService._tipo_columna(cursor, tabla, columna)
+                default = ParticionesService._particion_default(cursor, tabla)
+
+                meses = set(ParticionesService._meses(hoy, ultimo))
+                if default:
+                    expresion, params = ParticionesService._expresion_mes(columna, tipo)
+                    cursor.execute(
+                        f'SELECT DISTINCT {expresion} FROM {quote_ident(default)} '
+                        f'WHERE {quote_ident(columna)} IS NOT NULL',
+                        params
+                    )
+                    meses.update(fila[0] for fila in cursor.fetchall())
+
+                for mes in sorted(meses):
+                    if ParticionesService._crear_particion(cursor, tabla, columna, tipo, mes, default):
+                        creadas.append(ParticionesService.nombre_particion(tabla, mes))
+        return creadas
+
+    @staticmethod
+    def particionar(tabla, meses_futuros=None, conservar_original=False):
+        """
+        Reemplaza `tabla` por una tabla particionada por mes con el mismo nombre
+
+        Todo corre en una transacción con la tabla bloqueada (ACCESS
+        EXCLUSIVE): la tabla original se renombra a <tabla>_sin_particionar,
+        se crea la nueva con sus columnas, defaults y CHECK, una partición por
+        mes con datos (y los `meses_futuros` siguientes) más la default, se
+        copian las filas y se recrean llaves, índices, llaves foráneas y
+        triggers. La secuencia del id pasa a la tabla nueva.
+
+        Postgres exige que las llaves primarias y únicas de una tabla
+        particionada incluyan la columna de partición, así que se les agrega;
+        por lo mismo, las llaves foráneas de otras tablas que apuntan a esta
+        se eliminan (se informan en el resultado).
+
+        Returns:
+            dict con 'tabla', 'filas', 'particiones', 'llaves_ampliadas',
+            'fks_eliminadas', 'indices_omitidos' y 'original' (nombre de la
+            tabla conservada o None)
+
+        Raises:
+            ValueError: Si la tabla no existe, ya está particionada, no tiene
+                la columna de partición o tiene filas sin ella
+        """
+        columna = ParticionesService.TABLAS[tabla]
+        original = tabla + ParticionesService.SUFIJO_ORIGINAL
+        t, c, o = quote_ident(tabla), quote_ident(columna), quote_ident(original)
+
+        with transaction.atomic(), connection.cursor() as cursor:
+            tipo_tabla = ParticionesService.tipo_tabla(cursor, tabla)
+            if tipo_tabla is None:
+                raise ValueError(f'La tabla {tabla} no existe')
+            if tipo_tabla == 'p':
+                raise ValueError(f'La tabla {tabla} ya está particionada')
+            tipo = ParticionesService._tipo_columna(cursor, tabla, columna)
+            if tipo is None:
+                raise ValueError(f'{tabla} no tiene la columna {columna} (¿faltan migraciones?)')
+            if ParticionesService.tipo_tabla(cursor, original) is not None:
+                raise ValueError(f'Ya existe la tabla {original}; eliminarla antes de particionar')
+
+            cursor.execute(f'LOCK TABLE {t} IN ACCESS EXCLUSIVE MODE')
+            cursor.execute(f'SELECT count(*) FROM {t} WHERE {c} IS NULL')
+            nulos = cursor.fetchone()[0]
+            if nulos:
+                raise ValueError(f'{tabla} tiene {nulos} fila(s) sin {columna}; completarlas antes de particionar')
+
+            # Estructura de la tabla original (las definiciones se leen antes de
+            # renombrar, así quedan apuntando al nombre que tomará la nueva)
+            cursor.execute("""
+                SELECT conname, contype, pg_get_constraintdef(oid), ARRAY(
+                    SELECT a.attname
+                    FROM unnest(conkey) WITH ORDINALITY AS k(attnum, orden)
+                    JOIN pg_attribute a ON a.attrelid = conrelid AND a.attnum = k.attnum
+                    ORDER BY k.orden
+                )
+                FROM pg_constraint
+                WHERE conrelid = to_regclass(%s) AND contype IN ('p', 'u', 'f')
+                ORDER BY contype DESC, conname
+            """, [tabla])
+            restricciones = cursor.fetchall()
+
+            cursor.execute("""
+                SELECT i.relname, pg_get_indexdef(x.indexrelid), x.indisunique, EXISTS (
+                    SELECT 1 FROM pg_constraint k
+                    WHERE k.conrelid = x.indrelid AND k.conindid = x.indexrelid
+                ), %s = ANY(ARRAY(
+                    SELECT attname FROM pg_attribute
+                    WHERE attrelid = x.indrelid AND attnum = ANY(x.indkey)
+                ))
+                FROM pg_index x
+                JOIN pg_class i ON i.oid = x.indexrelid
+                WHERE x.indrelid = to_regclass(%s)
+            """, [columna, tabla])
+            indices = cursor.fetchall()
+
+            cursor.execute("""
+                SELECT pg_get_triggerdef(oid)
+                FROM pg_trigger
+                WHERE tgrelid = to_regclass(%s) AND NOT tgisinternal
+            """, [tabla])
+            triggers = [fila[0] for fila in cursor.fetchall()]
+
+            cursor.execute("""
+                SELECT attname, attidentity <> '', pg_get_serial_sequence(%s, attname)
+                FROM pg_attribute
+                WHERE attrelid = to_regclass(%s) AND attnum > 0 AND NOT attisdropped
+                  AND pg_get_serial_sequence(%s, attname) IS NOT NULL
+            """, [tabla, tabla, tabla])
+            secuencias = cursor.fetchall()
+
+            cursor.execute("""
+                SELECT conrelid::regclass::text, conname
+                FROM pg_constraint
+                WHERE confrelid = to_regclass(%s) AND contype = 'f' AND conrelid <> confrelid
+            """, [tabla])
+            fks_entrantes = cursor.fetchall()
+
+            # Llaves foráneas hacia esta tabla: no pueden apuntar a una particionada
+            # sin la columna de partición
+            for referente, nombre in fks_entrantes:
+                cursor.execute(f'ALTER TABLE {referente} DROP CONSTRAINT {quote_ident(nombre)}')
+
+            # Liberar los nombres de índices (y de sus restricciones) y de la tabla
+            for nombre, *_ in indices:
+                nuevo = nombre[:63 - len(ParticionesService.SUFIJO_ORIGINAL)] + ParticionesService.SUFIJO_ORIGINAL
+                cursor.execute(f'ALTER INDEX {quote_ident(nombre)} RENAME TO {quote_ident(nuevo)}')
+            cursor.execute(f'ALTER TABLE {t} RENAME TO {o}')
+
+            cursor.execute(
+                f'CREATE TABLE {t} (LIKE {o} INCLUDING ALL EXCLUDING INDEXES) PARTITION BY RANGE ({c})'
+            )
+            cursor.execute(f'ALTER TABLE {t} ALTER COLUMN {c} SET NOT NULL')
+
+            # Un mes por cada mes con datos, hasta `meses_futuros` después del actual
+            hoy, ultimo = ParticionesService._meses_vigentes(meses_futuros)
+            expresion, params = ParticionesService._expresion_mes(columna, tipo)
+            cursor.execute(f'SELECT min({expresion}), max({expresion}) FROM {o}', params * 2)
+            primero_con_datos, ultimo_con_datos = cursor.fetchone()
+            particiones = 0
+            for mes in ParticionesService._meses(
+                min(primero_con_datos or hoy, hoy), max(ultimo_con_datos or ultimo, ultimo)
+            ):
+                cursor.execute(
+                    f'CREATE TABLE {quote_ident(ParticionesService.nombre_particion(tabla, mes))} '
+                    f'PARTITION OF {t} FOR VALUES FROM ({ParticionesService._limite(mes, tipo)}) '
+                    f'TO ({ParticionesService._limite(ParticionesService._mes_siguiente(mes), tipo)})'
+                )
+                particiones += 1
+            cursor.execute(f'CREATE TABLE {quote_ident(tabla + "_default")} PARTITION OF {t} DEFAULT')
+
+            # Sin triggers todavía: la copia no genera registro de cambios ni NOTIFY
+            sobrescribir = 'OVERRIDING SYSTEM VALUE' if any(identidad for _, identidad, _ in secuencias) else ''
+            cursor.execute(f'INSERT INTO {t} {sobrescribir} SELECT * FROM {o}')
+            filas = cursor.rowcount
+
+            llaves_ampliadas = []
+            for nombre, tipo_restriccion, definicion, columnas in restricciones:
+                if tipo_restriccion == 'f':
+                    cursor.execute(f'ALTER TABLE {t} ADD CONSTRAINT {quote_ident(nombre)} {definicion}')
+                    continue
+                if columna not in columnas:
+                    columnas = list(columnas) + [columna]
+                    llaves_ampliadas.append(nombre)
+                clase = 'PRIMARY KEY' if tipo_restriccion == 'p' else 'UNIQUE'
+                cursor.execute(
+                    f'ALTER TABLE {t} ADD CONSTRAINT {quote_ident(nombre)} '
+                    f'{clase} ({", ".join(quote_ident(col) for col in columnas)})'
+                )
+
+            indices_omitidos = []
+            for nombre, definicion, unico, de_restriccion, incluye_columna in indices:
+                if de_restriccion:
+                    continue
+                if unico and not incluye_columna:
+                    indices_omitidos.append(nombre)
+                    continue
+                cursor.execute(definicion)
+
+            for definicion in triggers:
+                cursor.execute(definicion)
+
+            for nombre_columna, identidad, secuencia in secuencias:
+                if identidad:
+                    # La tabla nueva tiene su propia secuencia de identidad
+                    cursor.execute(
+                        f'SELECT setval(pg_get_serial_sequence(%s, %s), '
+                        f'COALESCE(MAX({quote_ident(nombre_columna)}), 1)) FROM {t}',
+                        [tabla, nombre_columna]
+                    )
+                else:
+                    # serial: el default de la tabla nueva ya usa la misma secuencia
+                    cursor.execute(f'ALTER SEQUENCE {secuencia} OWNED BY {t}.{quote_ident(nombre_columna)}')
+
+            cursor.execute(f'SELECT count(*) FROM {o}')
+            if cursor.fetchone()[0] != filas:
+                raise RuntimeError(f'La copia de {tabla} no coincide con la original; se revierte')
+
+            if not conservar_original:
+                cursor.execute(f'DROP TABLE {o}')
+            cursor.execute(f'ANALYZE {t}')
+
+        return {
+            'tabla': tabla,
+            'filas': filas,
+            'particiones': particiones,
+            'llaves_ampliadas': llaves_ampliadas,
+            'fks_eliminadas': [f'{referente}.{nombre}' for referente, nombre in fks_entrantes],
+            'indices_omitidos': indices_omitidos,
+            'original': original if conservar_original else None,
+        }
+
+
+# ============================================================================
+# ARCHIVO DE MOVIMIENTOS SERVICE
+# ============================================================================
+
+class ArchivoMovimientosService:
+    """
+    Retención de movimientos_inventario
+
+    Los movimientos de meses completos anteriores a la retención se retiran
+    de la tabla: sus totales por producto, mes y tipo se suman en
+    ResumenMovimiento y el detalle se guarda en un archivo gzip NDJSON por
+    mes (registrado en ArchivoMovimientos), que `buscar` puede leer. Así la
+    tabla conserva solo los meses recientes.
+    """
+
+    CAMPOS = ('id', 'producto_id', 'tipo', 'cantidad', 'fecha', 'referencia', 'tipo_referencia', 'notas')
+    TAMANO_BLOQUE = 5000
+    MAX_RESULTADOS = 1000
+
+    @staticmethod
+    def directorio():
+        return Path(settings.MOVIMIENTOS_ARCHIVO_DIR)
+
+    @staticmethod
+    def _inicio_mes(mes):
+        """Medianoche del primer día de `mes` en settings.TIME_ZONE"""
+        return timezone.make_aware(datetime(mes.year, mes.month, 1))
+
+    @staticmethod
+    def corte(meses):
+        """Primer día del mes más antiguo que se conserva (el actual y los `meses` anteriores)"""
+        mes = timezone.localdate().replace(day=1)
+        for _ in range(meses):
+            mes = (mes - timedelta(days=1)).replace(day=1)
+        return mes
+
+    @staticmethod
+    def pendientes(meses):
+        """list de (mes, movimientos) anteriores al corte, del más antiguo al más reciente"""
+        corte = ArchivoMovimientosService.corte(meses)
+        with connection.cursor() as cursor:
+            cursor.execute("""
+                SELECT date_trunc('month', fecha AT TIME ZONE %s)::date, count(*)
+                FROM movimientos_inventario
+                WHERE fecha < %s
+                GROUP BY 1
+                ORDER BY 1
+            """, [settings.TIME_ZONE, ArchivoMovimientosService._inicio_mes(corte)])
+            return cursor.fetchall()
+
+    @staticmethod
+    def archivar_mes(mes):
+        """
+        Archiva y retira de la tabla los movimientos de `mes`
+
+        El archivo se escribe antes de borrar y se elimina si la transacción
+        falla, así la tabla nunca pierde filas sin archivar. Solo se toman los
+        movimientos con id hasta el mayor existente al comenzar: los que se
+        inserten mientras tanto quedan para la siguiente ejecución.
+
+        Returns:
+            ArchivoMovimientos creado, o None si el mes no tenía movimientos
+        """
+        desde = ArchivoMovimientosService._inicio_mes(mes)
+        hasta = ArchivoMovimientosService._inicio_mes(ParticionesService._mes_siguiente(mes))
+        movimientos = MovimientoInventario.objects.filter(fecha__gte=desde, fecha__lt=hasta)
+        tope = movimientos.aggregate(tope=Max('id'))['tope']
+        if tope is None:
+            return None
+        movimientos = movimientos.filter(id__lte=tope)
+
+        directorio = ArchivoMovimientosService.directorio()
+        directorio.mkdir(parents=True, exist_ok=True)
+        nombre = f'movimientos_{mes:%Y_%m}_{timezone.now():%Y%m%d%H%M%S}.ndjson.gz'
+        ruta = directorio / nombre
+        temporal = ruta.with_name(nombre + '.tmp')
+
+        try:
+            with transaction.atomic():
+                filas = 0
+                with gzip.open(temporal, 'wb') as destino:
+                    # iterator() dentro de la transacción usa un cursor del servidor
+                    for fila in movimientos.order_by('id').values_list(*ArchivoMovimientosService.CAMPOS).iterator(
+                        chunk_size=ArchivoMovimientosService.TAMANO_BLOQUE
+                    ):
+                        destino.write(orjson.dumps(dict(zip(ArchivoMovimientosService.CAMPOS, fila))) + b'\n')
+                        filas += 1
+                temporal.replace(ruta)
+
+                with open(ruta, 'rb') as archivo:
+                    sha256 = hashlib.file_digest(archivo, 'sha256').hexdigest()
+
+                with connection.cursor() as cursor:
+                    cursor.execute("""
+                        INSERT INTO movimientos_resumen_mensual AS r
+                            (producto_id, mes, tipo, movimientos, cantidad, primera_fecha, ultima_fecha)
+                        SELECT producto_id, %s, tipo, count(*), sum(cantidad), min(fecha), max(fecha)
+                        FROM movimientos_inventario
+                        WHERE fecha >= %s AND fecha < %s AND id <= %s
+                        GROUP BY producto_id, tipo
+                        ON CONFLICT (producto_id, mes, tipo) DO UPDATE SET
+                            movimientos = r.movimientos + EXCLUDED.movimientos,
+                            cantidad = r.cantidad + EXCLUDED.cantidad,
+                            primera_fecha = LEAST(r.primera_fecha, EXCLUDED.primera_fecha),
+                            ultima_fecha = GREATEST(r.ultima_fecha, EXCLUDED.ultima_fecha)
+                    """, [mes, desde, hasta, tope])
+
+                    borrados, _ = movimientos.delete()
+                    if borrados != filas:
+                        raise RuntimeError(
+                            f'Se archivaron {filas} movimientos de {mes:%Y-%m} pero se borrarían {borrados}; se revierte'
+                        )
+
+                    # Con la tabla particionada, la partición vacía del mes se elimina
+                    ParticionesService.eliminar_si_vacia(cursor, 'movimientos_inventario', mes)
+
+                return ArchivoMovimientos.objects.create(
+                    mes=mes, ruta=nombre, filas=filas, tamano_bytes=ruta.stat().st_size, sha256=sha256
+                )
+        except BaseException:
+            temporal.unlink(missing_ok=True)
+            ruta.unlink(missing_ok=True)
+            raise
+
+    @staticmethod
+    def buscar(producto_id=None, tipo=None, fecha_inicio=None, fecha_fin=None, limite=None):
+        """
+        Busca movimientos en los archivos, del más reciente al más antiguo
+
+        Args:
+            producto_id: Filtrar por producto (opcional)
+            tipo: ENTRADA, SALIDA o AJUSTE (opcional)
+            fecha_inicio: date, inclusive (opcional)
+            fecha_fin: date, inclusive (opcional)
+            limite: Máximo de movimientos a retornar
+
+        Returns:
+            dict con 'movimientos' (dicts con los campos de la tabla y
+            'archivado': True), 'hay_mas' y 'archivos_no_encontrados'
+        """
+        limite = limite or ArchivoMovimientosService.MAX_RESULTADOS
+        archivos = ArchivoMovimientos.objects.all()
+        if fecha_inicio:
+            archivos = archivos.filter(mes__gte=fecha_inicio.replace(day=1))
+        if fecha_fin:
+            archivos = archivos.filter(mes__lte=fecha_fin)
+
+        movimientos, no_encontrados = [], []
+        for archivo in archivos.order_by('-mes', '-fecha_creacion'):
+            # Los meses siguientes son más antiguos que todo lo ya encontrado
+            if len(movimientos) > limite and archivo.mes < movimientos[-1]['fecha'].date().replace(day=1):
+                break
+            ruta = ArchivoMovimientosService.directorio() / archivo.ruta
+            if not ruta.exists():
+                no_encontrados.append(archivo.ruta)
+                continue
+
+            with gzip.open(ruta, 'rb') as origen:
+                for linea in origen:
+                    movimiento = orjson.loads(linea)
+                    if producto_id is not None and movimiento['producto_id'] != producto_id:
+                        continue
+                    if tipo and movimiento['tipo'] != tipo:
+                        continue
+                    movimiento['fecha'] = timezone.localtime(datetime.fromisoformat(movimiento['fecha']))
+                    dia = movimiento['fecha'].date()
+                    if (fecha_inicio and dia < fecha_inicio) or (fecha_fin and dia > fecha_fin):
+                        continue
+                    movimiento['archivado'] = True
+                    movimientos.append(movimiento)
+            movimientos.sort(key=lambda m: (m['fecha'], m['id']), reverse=True)
+            del movimientos[limite + 1:]
+
+        return {
+            'movimientos': movimientos[:limite],
+            'hay_mas': len(movimientos) > limite,
+            'archivos_no_encontrados': no_encontrados,
+        }
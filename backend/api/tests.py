@@ -1,3 +1,366 @@
-from django.test import TestCase
+"""
+Pruebas de la API que no necesitan base de datos
 
-# Create your tests here.
+Ejecutar con: python manage.py test api
+"""
+import threading
+from decimal import Decimal
+from unittest import mock
+
+import orjson
+from asgiref.sync import async_to_sync, sync_to_async
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase
+from django.urls import resolve
+from rest_framework.test import APIRequestFactory
+
+from .cache import CacheLRU, CalculoUnico, EscuchaInvalidaciones, _caches, _origen
+from .db_router import REPLICA_DB_ALIAS, alias_lectura, lecturas_en_replica, ruta_de_lectura
+from .exportes_views import exportar_inventario
+from .metrics import ContadorConsultas, contar_consultas
+from .middleware import ReplicaMiddleware
+from .mixins import filas_a_dicts, proyeccion_valores
+from .renderers import ORJSONRenderer
+from .serializers import ClienteListSerializer, ProductoListSerializer, ProveedorListSerializer
+
+
+# ============================================================================
+# LISTADO RÁPIDO
+# ============================================================================
+
+class ListadoRapidoTests(SimpleTestCase):
+    """El listado por values_list() produce el mismo JSON que el serializer"""
+
+    def assertMismoJSON(self, serializer_class, filas):
+        """Compara ambos caminos con instancias creadas como lo hace el ORM (from_db)"""
+        modelo = serializer_class.Meta.model
+        attnames = [campo.attname for campo in modelo._meta.concrete_fields]
+        instancias = [modelo.from_db('default', attnames, fila) for fila in filas]
+
+        proyeccion = proyeccion_valores(serializer_class)
+        self.assertIsNotNone(proyeccion)
+        indices = [attnames.index(columna) for _, columna, _ in proyeccion]
+        proyectadas = [tuple(fila[i] for i in indices) for fila in filas]
+
+        renderer = ORJSONRenderer()
+        self.assertEqual(
+            renderer.render(filas_a_dicts(proyeccion, proyectadas)),
+            renderer.render(serializer_class(instancias, many=True).data),
+        )
+
+    def test_productos(self):
+        # id_producto, sku_producto, nombre, cantidad_actual, cantidad_total,
+        # cantidad_minima, precio_compra_unitario, precio_final
+        self.assertMismoJSON(ProductoListSerializer, [
+            (1, 'SKU-001', 'Balatas delanteras', 10, 12, 2, 150, Decimal('249.90')),
+            (2, 'ÑÚ-ß-002', 'Cadena 428 reforzada – ñandú', 0, 0, 0, 0, Decimal('0.00')),
+            (3, 'SKU-003', 'Aceite 20W50 "premium"', -1, 5, 3, 99999, Decimal('99999999.99')),
+            (4, 'SKU-004', 'Bujía', 7, 7, 1, 35, Decimal('35.5')),
+        ])
+
+    def test_clientes(self):
+        # id_cliente, nombre, telefono, email
+        self.assertMismoJSON(ClienteListSerializer, [
+            (1, 'José Ñúñez', '555-0101', 'jose@example.com'),
+            (2, 'Ana Peña', None, None),
+            (3, '李小龍 🏍️', '', 'li@example.com'),
+        ])
+
+    def test_proveedores(self):
+        # id_proveedor, nombre_empresa, persona_contacto, telefono, email, direccion
+        self.assertMismoJSON(ProveedorListSerializer, [
+            (1, 'Refacciones del Bajío', 'Mónica Ávila', '555-0202', 'ventas@bajio.mx', 'Av. Juárez 12\nLeón'),
+            (2, 'Motopartes S.A.', None, None, None, None),
+            (3, 'Importadora Ñandú', '', '', 'contacto@ñandu.mx', 'Calle \\ "Comillas"'),
+        ])
+
+
+# ============================================================================
+# CACHÉS EN MEMORIA
+# ============================================================================
+
+class CacheLRUTests(SimpleTestCase):
+    """LRU con dependencias por registro (api/cache.py)"""
+
+    def crear_cache(self, **kwargs):
+        nombre = f'prueba_{self._testMethodName}'
+        cache = CacheLRU(nombre, dependencias=lambda valor: valor['registros'], **kwargs)
+        self.addCleanup(_caches.pop, nombre, None)
+        return cache
+
+    def valor(self, *registros):
+        return {'registros': list(registros)}
+
+    def test_no_guarda_valor_calculado_antes_de_una_invalidacion(self):
+        cache = self.crear_cache()
+
+        def calcular():
+            # Una escritura confirma mientras se calcula con los datos viejos
+            cache.invalidar('productos', [1])
+            return self.valor(('productos', 1))
+
+        self.assertEqual(cache.obtener('a', calcular), self.valor(('productos', 1)))
+        self.assertEqual(len(cache), 0)
+
+        calculos = []
+        cache.obtener('a', lambda: calculos.append(1) or self.valor(('productos', 1)))
+        cache.obtener('a', lambda: calculos.append(1) or self.valor(('productos', 1)))
+        self.assertEqual(len(calculos), 1)
+
+    def test_no_guarda_ausencias(self):
+        cache = self.crear_cache()
+        self.assertIsNone(cache.obtener('a', lambda: None))
+        self.assertEqual(len(cache), 0)
+
+    def test_invalidar_por_ids_y_tabla_completa(self):
+        cache = self.crear_cache()
+        cache.guardar('p1', self.valor(('productos', 1)))
+        cache.guardar('p2', self.valor(('productos', 2)))
+        cache.guardar('c1', self.valor(('cliente', 1)))
+
+        cache.invalidar('productos', [1, 99])
+        self.assertEqual(set(cache._entradas), {'p2', 'c1'})
+
+        cache.invalidar('productos')
+        self.assertEqual(set(cache._entradas), {'c1'})
+        self.assertEqual(set(cache._por_registro), {('cliente', 1)})
+
+    def test_expulsion_lru_limpia_indice_por_registro(self):
+        cache = self.crear_cache(max_entradas=2)
+        cache.guardar('a', self.valor(('productos', 1)))
+        cache.guardar('b', self.valor(('productos', 2)))
+        # Usar 'a' la deja como la más reciente: se expulsa 'b'
+        cache.obtener('a', lambda: self.fail('debía estar en la caché'))
+        cache.guardar('c', self.valor(('productos', 3)))
+
+        self.assertEqual(list(cache._entradas), ['a', 'c'])
+        self.assertEqual(set(cache._por_registro), {('productos', 1), ('productos', 3)})
+
+    def test_reemplazar_entrada_actualiza_dependencias(self):
+        cache = self.crear_cache()
+        cache.guardar('a', self.valor(('productos', 1)))
+        cache.guardar('a', self.valor(('productos', 2)))
+
+        self.assertEqual(set(cache._por_registro), {('productos', 2)})
+        cache.invalidar('productos', [1])
+        self.assertIn('a', cache._entradas)
+
+
+class EscuchaInvalidacionesTests(SimpleTestCase):
+    """Mensajes recibidos por LISTEN en inventrix_cache"""
+
+    def setUp(self):
+        self.cache = CacheLRU('prueba_escucha', dependencias=lambda valor: [('productos', valor)])
+        self.addCleanup(_caches.pop, 'prueba_escucha', None)
+        self.cache.guardar('a', 1)
+        self.escucha = EscuchaInvalidaciones()
+
+    def recibir(self, origen, tabla='productos', ids=None):
+        self.escucha._recibir(orjson.dumps({'origen': origen, 'tabla': tabla, 'ids': ids}).decode())
+
+    def test_ignora_mensajes_propios(self):
+        # Este proceso ya invalidó al confirmar
+        self.recibir(_origen(), ids=[1])
+        self.assertIn('a', self.cache._entradas)
+
+    def test_invalida_mensajes_de_otros_workers(self):
+        self.recibir('otro-worker', ids=[2])
+        self.assertIn('a', self.cache._entradas)
+        self.recibir('otro-worker', ids=[1])
+        self.assertNotIn('a', self.cache._entradas)
+
+    def test_ids_nulos_invalidan_la_tabla(self):
+        self.recibir('otro-worker', ids=None)
+        self.assertEqual(len(self.cache), 0)
+
+    def test_ignora_mensajes_invalidos(self):
+        with self.assertLogs('api.cache', 'WARNING'):
+            self.escucha._recibir('no es json')
+        with self.assertLogs('api.cache', 'WARNING'):
+            self.escucha._recibir('{"tabla": "productos"}')
+        self.assertIn('a', self.cache._entradas)
+
+
+class CalculoUnicoTests(SimpleTestCase):
+    """Lock por clave para no repetir cálculos simultáneos"""
+
+    def test_timeout_y_limpieza_de_locks(self):
+        calculos = CalculoUnico()
+        tomado = threading.Event()
+        soltar = threading.Event()
+
+        def primero():
+            with calculos.bloqueo('a') as adquirido:
+                if adquirido:
+                    tomado.set()
+                    soltar.wait(5)
+
+        hilo = threading.Thread(target=primero)
+        hilo.start()
+        self.assertTrue(tomado.wait(5))
+
+        with calculos.bloqueo('a', timeout=0.05) as adquirido:
+            self.assertFalse(adquirido)
+        # Otra clave no espera
+        with calculos.bloqueo('b', timeout=0.05) as adquirido:
+            self.assertTrue(adquirido)
+        self.assertEqual(set(calculos._locks), {'a'})
+
+        soltar.set()
+        hilo.join(5)
+        self.assertEqual(calculos._locks, {})
+
+        with calculos.bloqueo('a', timeout=0.05) as adquirido:
+            self.assertTrue(adquirido)
+        self.assertEqual(calculos._locks, {})
+
+    def test_espera_al_primero(self):
+        calculos = CalculoUnico()
+        orden = []
+        esperando = threading.Event()
+
+        def segundo():
+            esperando.set()
+            with calculos.bloqueo('a') as adquirido:
+                orden.append(('segundo', adquirido))
+
+        with calculos.bloqueo('a'):
+            hilo = threading.Thread(target=segundo)
+            hilo.start()
+            self.assertTrue(esperando.wait(5))
+            hilo.join(0.05)
+            self.assertTrue(hilo.is_alive())
+            orden.append(('primero', True))
+        hilo.join(5)
+
+        self.assertEqual(orden, [('primero', True), ('segundo', True)])
+        self.assertEqual(calculos._locks, {})
+
+
+# ============================================================================
+# RÉPLICA DE LECTURA
+# ============================================================================
+
+@mock.patch.dict(settings.DATABASES, {REPLICA_DB_ALIAS: {'NAME': 'replica'}})
+class ReplicaTests(SimpleTestCase):
+    """Qué lecturas van a la réplica (api/db_router.py y ReplicaMiddleware)"""
+
+    def test_rutas_de_lectura(self):
+        for nombre in (
+            'producto-list', 'orden-venta-list', 'reporte-ventas', 'reporte-async',
+            'productos-mas-vendidos', 'exportar-compras',
+        ):
+            with self.subTest(nombre=nombre):
+                self.assertTrue(ruta_de_lectura(nombre))
+        for nombre in ('reporte-job', 'producto-detail', 'producto-cambios', 'metrics', None):
+            with self.subTest(nombre=nombre):
+                self.assertFalse(ruta_de_lectura(nombre))
+
+    def test_alias_lectura(self):
+        self.assertEqual(alias_lectura(), DEFAULT_DB_ALIAS)
+        with lecturas_en_replica():
+            self.assertEqual(alias_lectura(), REPLICA_DB_ALIAS)
+            # Dentro de atomic() las lecturas quedan en la transacción de la primaria
+            with mock.patch.object(connections[DEFAULT_DB_ALIAS], 'in_atomic_block', True):
+                self.assertEqual(alias_lectura(), DEFAULT_DB_ALIAS)
+        self.assertEqual(alias_lectura(), DEFAULT_DB_ALIAS)
+
+    def test_alias_lectura_sin_replica_configurada(self):
+        del settings.DATABASES[REPLICA_DB_ALIAS]
+        with lecturas_en_replica():
+            self.assertEqual(alias_lectura(), DEFAULT_DB_ALIAS)
+
+    def pedir(self, metodo, path, status=200, **extra):
+        """Pasa una petición por ReplicaMiddleware; retorna (alias usado por la vista, response)"""
+        request = getattr(RequestFactory(), metodo.lower())(path, **extra)
+        request.resolver_match = resolve(path)
+        usado = []
+
+        def vista(request):
+            middleware.process_view(request, request.resolver_match.func, (), {})
+            usado.append(alias_lectura())
+            return HttpResponse(status=status)
+
+        middleware = ReplicaMiddleware(vista)
+        response = middleware(request)
+        # El contexto se restaura al terminar la petición
+        self.assertEqual(alias_lectura(), DEFAULT_DB_ALIAS)
+        return usado[0], response
+
+    def test_listados_y_reportes_leen_de_la_replica(self):
+        for path in ('/api/productos/', '/api/reportes/ventas/', '/api/reportes/compras/exportar/'):
+            with self.subTest(path=path):
+                self.assertEqual(self.pedir('GET', path)[0], REPLICA_DB_ALIAS)
+        for path in ('/api/productos/1/', '/api/reportes/jobs/1/'):
+            with self.subTest(path=path):
+                self.assertEqual(self.pedir('GET', path)[0], DEFAULT_DB_ALIAS)
+
+    def test_cookie_y_header_mantienen_la_primaria(self):
+        alias, _ = self.pedir('GET', '/api/productos/', HTTP_COOKIE=f'{ReplicaMiddleware.COOKIE}=1')
+        self.assertEqual(alias, DEFAULT_DB_ALIAS)
+        alias, _ = self.pedir('GET', '/api/productos/', HTTP_X_LEER_PRIMARIA='1')
+        self.assertEqual(alias, DEFAULT_DB_ALIAS)
+
+    def test_escritura_exitosa_activa_read_your_writes(self):
+        alias, response = self.pedir('POST', '/api/productos/', status=201)
+        self.assertEqual(alias, DEFAULT_DB_ALIAS)
+        self.assertIn(ReplicaMiddleware.COOKIE, response.cookies)
+        self.assertEqual(
+            response[ReplicaMiddleware.HEADER_SEGUNDOS], str(settings.DB_REPLICA_RYW_SECONDS)
+        )
+
+        for metodo, status in (('POST', 400), ('GET', 200)):
+            with self.subTest(metodo=metodo, status=status):
+                _, response = self.pedir(metodo, '/api/productos/', status=status)
+                self.assertNotIn(ReplicaMiddleware.COOKIE, response.cookies)
+                self.assertFalse(response.has_header(ReplicaMiddleware.HEADER_SEGUNDOS))
+
+
+# ============================================================================
+# EXPORTACIONES
+# ============================================================================
+
+class ExportacionesTests(SimpleTestCase):
+    """Validación de parámetros de las exportaciones (no llegan a consultar)"""
+
+    def test_formato_desconocido(self):
+        response = exportar_inventario(APIRequestFactory().get('/api/reportes/inventario/exportar/?formato=pdf'))
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data, {'error': 'formato debe ser uno de: csv, xlsx'})
+
+
+# ============================================================================
+# MÉTRICAS
+# ============================================================================
+
+class ContarConsultasTests(SimpleTestCase):
+    """Consultas de los hilos de sync_to_async en el contador de la petición"""
+
+    def wrappers(self):
+        return list(connections[DEFAULT_DB_ALIAS].execute_wrappers)
+
+    def test_hilos_heredan_el_contador_de_la_peticion(self):
+        def en_hilo():
+            with contar_consultas() as contador:
+                instalados = self.wrappers()
+                contador(lambda *args: None, 'SELECT 1', None, False, {})
+            return contador, instalados, self.wrappers()
+
+        with contar_consultas(ContadorConsultas()) as contador:
+            heredado, instalados, despues = async_to_sync(sync_to_async(en_hilo, thread_sensitive=False))()
+            # En el mismo hilo no se instala dos veces
+            with contar_consultas():
+                self.assertEqual(self.wrappers(), [contador])
+
+        self.assertIs(heredado, contador)
+        self.assertEqual(instalados, [contador])
+        self.assertEqual(despues, [])
+        self.assertEqual(contador.total, 1)
+        self.assertEqual(self.wrappers(), [])
+
+    def test_sin_peticion_no_cuenta(self):
+        with contar_consultas() as contador:
+            self.assertIsNone(contador)
+            self.assertEqual(self.wrappers(), [])
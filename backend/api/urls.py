@@ -13,8 +13,13 @@ from .reportes_views import (
     reporte_inventario,
     reporte_ventas,
     reporte_compras,
-    productos_mas_vendidos
+    productos_mas_vendidos,
+    reporte_job,
+    reporte_async
 )
+from .exportes_views import exportar_inventario, exportar_ventas, exportar_compras
+from .eventos_views import eventos_stream
+from .metrics import metrics_view
 
 # Create router instance
 router = DefaultRouter()
@@ -39,4 +44,14 @@ urlpatterns = [
     path('reportes/ventas/', reporte_ventas, name='reporte-ventas'),
     path('reportes/compras/', reporte_compras, name='reporte-compras'),
     path('reportes/productos_mas_vendidos/', productos_mas_vendidos, name='productos-mas-vendidos'),
+    path('reportes/jobs/<int:pk>/', reporte_job, name='reporte-job'),
+    path('reportes/async/<str:tipo>/', reporte_async, name='reporte-async'),
+    # Exportación en streaming (?formato=csv|xlsx)
+    path('reportes/inventario/exportar/', exportar_inventario, name='exportar-inventario'),
+    path('reportes/ventas/exportar/', exportar_ventas, name='exportar-ventas'),
+    path('reportes/compras/exportar/', exportar_compras, name='exportar-compras'),
+    # Eventos en tiempo real (SSE, requiere ASGI)
+    path('eventos/', eventos_stream, name='eventos'),
+    # Métricas Prometheus
+    path('metrics/', metrics_view, name='metrics'),
 ]
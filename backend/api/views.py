@@ -3,8 +3,10 @@ ViewSets para la API de Inventrix
 """
 from rest_framework import viewsets, status, filters
 from rest_framework.decorators import action
+from rest_framework.parsers import MultiPartParser
 from rest_framework.response import Response
 from django.db import models
+from django.utils.dateparse import parse_date
 from django.db.models import Q, Sum, F
 from inventory.models import (
     Proveedor, Marca, Categoria, Producto, Cliente,
@@ -18,10 +20,14 @@ from .serializers import (
     OrdenCompraListSerializer, OrdenCompraDetailSerializer, OrdenCompraCreateSerializer,
     OrdenVentaListSerializer, OrdenVentaDetailSerializer, OrdenVentaCreateSerializer,
     MovimientoInventarioSerializer, MovimientoInventarioCreateSerializer,
-    MotoSerializer, ServicioMotoSerializer, ClienteConMotosSerializer, ServicioSerializer
+    MotoSerializer, ServicioMotoSerializer, ClienteConMotosSerializer, ServicioSerializer,
+    AjustePrecioSerializer, AjustePrecioRegistroSerializer, ResumenMovimientoSerializer
 )
+from .cache import invalidar_al_confirmar, productos_por_sku
+from .mixins import CambiosMixin, CamposDinamicosMixin, ETagMixin, ListadoRapidoMixin, OperacionesMasivasMixin
+from .models import AjustePrecio, ResumenMovimiento
 from .services import (
-    InventoryService, OrdenCompraService, OrdenVentaService,
+    ArchivoMovimientosService, CatalogoService, InventoryService, OrdenCompraService, OrdenVentaService, PrecioService,
     InsufficientStockException, InvalidOrderStateException
 )
 
@@ -30,9 +36,17 @@ from .services import (
 # VIEWSETS BÁSICOS
 # ============================================================================
 
-class ProveedorViewSet(viewsets.ModelViewSet):
+class ProveedorViewSet(
+    ETagMixin, OperacionesMasivasMixin, CambiosMixin, ListadoRapidoMixin, CamposDinamicosMixin,
+    viewsets.ModelViewSet
+):
     """ViewSet para gestión de proveedores"""
     queryset = Proveedor.objects.all()
+    tablas_etag = ('proveedores',)
+    recurso_cambios = 'proveedores'
+    serializer_cambios_class = ProveedorListSerializer
+    serializer_masivo_class = ProveedorDetailSerializer
+    campos_masivos = ('persona_contacto', 'telefono', 'email', 'direccion')
     filter_backends = [filters.SearchFilter, filters.OrderingFilter]
     search_fields = ['nombre_empresa', 'persona_contacto', 'email', 'telefono']
     ordering_fields = ['nombre_empresa']
@@ -51,9 +65,10 @@ class ProveedorViewSet(viewsets.ModelViewSet):
         return Response(status=status.HTTP_204_NO_CONTENT)
 
 
-class MarcaViewSet(viewsets.ModelViewSet):
+class MarcaViewSet(ETagMixin, CamposDinamicosMixin, viewsets.ModelViewSet):
     """ViewSet para gestión de marcas"""
     queryset = Marca.objects.all()
+    tablas_etag = ('marcas',)
     serializer_class = MarcaSerializer
     filter_backends = [filters.SearchFilter, filters.OrderingFilter]
     search_fields = ['nombre']
@@ -61,9 +76,10 @@ class MarcaViewSet(viewsets.ModelViewSet):
     ordering = ['nombre']
 
 
-class CategoriaViewSet(viewsets.ModelViewSet):
+class CategoriaViewSet(ETagMixin, CamposDinamicosMixin, viewsets.ModelViewSet):
     """ViewSet para gestión de categorías"""
     queryset = Categoria.objects.all()
+    tablas_etag = ('categorias',)
     serializer_class = CategoriaSerializer
     filter_backends = [filters.SearchFilter, filters.OrderingFilter]
     search_fields = ['nombre']
@@ -71,9 +87,18 @@ class CategoriaViewSet(viewsets.ModelViewSet):
     ordering = ['nombre']
 
 
-class ProductoViewSet(viewsets.ModelViewSet):
+class ProductoViewSet(
+    ETagMixin, OperacionesMasivasMixin, CambiosMixin, ListadoRapidoMixin, CamposDinamicosMixin,
+    viewsets.ModelViewSet
+):
     """ViewSet para gestión de productos"""
     queryset = Producto.objects.all()
+    tablas_etag = ('productos',)
+    recurso_cambios = 'productos'
+    serializer_cambios_class = ProductoListSerializer
+    serializer_masivo_class = ProductoCreateSerializer
+    campos_masivos = ('cantidad_minima', 'precio_compra_unitario', 'precio_final')
+    filtros_masivos = ('search', 'bajo_stock')
     filter_backends = [filters.SearchFilter, filters.OrderingFilter]
     search_fields = ['sku_producto', 'nombre']
     ordering_fields = ['nombre', 'sku_producto', 'cantidad_actual', 'precio_final']
@@ -96,11 +121,36 @@ class ProductoViewSet(viewsets.ModelViewSet):
         
         return queryset
 
+    def perform_update(self, serializer):
+        super().perform_update(serializer)
+        invalidar_al_confirmar('productos', [serializer.instance.id_producto])
+
     def perform_destroy(self, instance):
         """Eliminar producto usando SQL directo para evitar verificación de relaciones"""
         from django.db import connection
         with connection.cursor() as cursor:
             cursor.execute("DELETE FROM productos WHERE id_producto = %s", [instance.id_producto])
+        invalidar_al_confirmar('productos', [instance.id_producto])
+
+    @action(detail=False, methods=['get'], url_path=r'sku/(?P<sku>[^/]+)')
+    def por_sku(self, request, sku=None):
+        """
+        Búsqueda exacta por SKU (lector de código de barras)
+
+        Una lectura por el índice único de sku_producto, sin búsqueda,
+        orden ni COUNT; los SKUs consultados quedan en una caché del
+        worker que se invalida al modificar el producto.
+        """
+        def consultar():
+            producto = Producto.objects.filter(sku_producto=sku).first()
+            return ProductoListSerializer(producto).data if producto else None
+
+        datos = productos_por_sku.obtener(sku, consultar)
+        if datos is None:
+            return Response(
+                {'error': f'No existe un producto con SKU {sku}'}, status=status.HTTP_404_NOT_FOUND
+            )
+        return Response(datos)
 
     @action(detail=False, methods=['get'])
     def bajo_stock(self, request):
@@ -111,10 +161,75 @@ class ProductoViewSet(viewsets.ModelViewSet):
         serializer = self.get_serializer(productos, many=True)
         return Response(serializer.data)
 
+    @action(detail=False, methods=['post'], parser_classes=[MultiPartParser])
+    def importar(self, request):
+        """
+        Crea o actualiza productos por SKU desde un CSV (campo `archivo`)
+
+        Query params:
+            simular: true/1 para validar y contar sin guardar
+        Campos del formulario:
+            delimitador: Separador del CSV (default: ',')
+        """
+        archivo = request.FILES.get('archivo')
+        if archivo is None:
+            return Response(
+                {'error': 'Se requiere el CSV en el campo archivo'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        delimitador = request.data.get('delimitador') or ','
+        if len(delimitador) != 1:
+            return Response(
+                {'error': 'delimitador debe ser un solo carácter'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        simular = request.query_params.get('simular', '').lower() in ('1', 'true')
+        try:
+            resultado = CatalogoService.importar_csv(archivo, simular=simular, delimitador=delimitador)
+        except ValueError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        return Response(resultado)
+
+    @action(detail=False, methods=['post'])
+    def ajustar_precios(self, request):
+        """
+        Ajusta precio_final de los productos seleccionados con un solo UPDATE
+
+        Con simular=true retorna la vista previa (totales y muestra) sin
+        modificar nada. Ver AjustePrecioSerializer para los parámetros.
+        """
+        serializer = AjustePrecioSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
 
-class ClienteViewSet(viewsets.ModelViewSet):
+        try:
+            resultado = PrecioService.ajustar(**serializer.validated_data)
+        except ValueError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        return Response(resultado)
+
+    @action(detail=False, methods=['get'])
+    def historial_precios(self, request):
+        """Ajustes masivos de precios aplicados, del más reciente al más antiguo"""
+        page = self.paginate_queryset(AjustePrecio.objects.all())
+        serializer = AjustePrecioRegistroSerializer(page, many=True)
+        return self.get_paginated_response(serializer.data)
+
+
+class ClienteViewSet(
+    ETagMixin, OperacionesMasivasMixin, CambiosMixin, ListadoRapidoMixin, CamposDinamicosMixin,
+    viewsets.ModelViewSet
+):
     """ViewSet para gestión de clientes"""
     queryset = Cliente.objects.all()
+    tablas_etag = ('cliente',)
+    recurso_cambios = 'clientes'
+    serializer_cambios_class = ClienteListSerializer
+    serializer_masivo_class = ClienteDetailSerializer
+    campos_masivos = ('telefono', 'email')
     filter_backends = [filters.SearchFilter, filters.OrderingFilter]
     search_fields = ['nombre', 'telefono', 'email']
     ordering_fields = ['nombre']
@@ -133,9 +248,12 @@ class ClienteViewSet(viewsets.ModelViewSet):
         return Response(status=status.HTTP_204_NO_CONTENT)
 
 
-class OrdenCompraViewSet(viewsets.ModelViewSet):
+class OrdenCompraViewSet(ETagMixin, CambiosMixin, CamposDinamicosMixin, viewsets.ModelViewSet):
     """ViewSet para gestión de órdenes de compra"""
     queryset = OrdenCompra.objects.all()
+    tablas_etag = ('orden_compra', 'orden_producto', 'proveedores', 'productos')
+    recurso_cambios = 'ordenes-compra'
+    serializer_cambios_class = OrdenCompraListSerializer
     filter_backends = [filters.SearchFilter, filters.OrderingFilter]
     search_fields = ['id_orden']
     ordering_fields = ['fecha_creacion']
@@ -213,9 +331,13 @@ class OrdenCompraViewSet(viewsets.ModelViewSet):
             )
 
 
-class OrdenVentaViewSet(viewsets.ModelViewSet):
+class OrdenVentaViewSet(ETagMixin, CambiosMixin, CamposDinamicosMixin, viewsets.ModelViewSet):
     """ViewSet para gestión de órdenes de venta"""
     queryset = OrdenVenta.objects.all()
+    # productos de una venta de servicio: servicio_motos y motos
+    tablas_etag = ('ventas', 'producto_venta', 'cliente', 'productos', 'servicio_motos', 'motos')
+    recurso_cambios = 'ordenes-venta'
+    serializer_cambios_class = OrdenVentaListSerializer
     filter_backends = [filters.SearchFilter, filters.OrderingFilter]
     search_fields = ['id_venta']
     ordering_fields = ['fecha', 'total']
@@ -277,9 +399,10 @@ class OrdenVentaViewSet(viewsets.ModelViewSet):
             )
 
 
-class MovimientoInventarioViewSet(viewsets.ModelViewSet):
+class MovimientoInventarioViewSet(ETagMixin, CamposDinamicosMixin, viewsets.ModelViewSet):
     """ViewSet para gestión de movimientos de inventario"""
     queryset = MovimientoInventario.objects.select_related('producto').all()
+    tablas_etag = ('movimientos_inventario', 'productos')
     filter_backends = [filters.SearchFilter, filters.OrderingFilter]
     search_fields = ['producto__nombre', 'producto__codigo', 'referencia']
     ordering_fields = ['fecha']
@@ -303,6 +426,67 @@ class MovimientoInventarioViewSet(viewsets.ModelViewSet):
         
         return queryset
 
+    def _filtros_archivo(self, request):
+        """Retorna (filtros, None) o (None, Response de error) de ?producto=&tipo=&fecha_inicio=&fecha_fin="""
+        filtros = {'tipo': (request.query_params.get('tipo') or '').upper() or None}
+
+        producto = request.query_params.get('producto')
+        if producto:
+            if not producto.isdigit():
+                return None, Response(
+                    {'error': 'producto debe ser un id numérico'}, status=status.HTTP_400_BAD_REQUEST
+                )
+            filtros['producto_id'] = int(producto)
+
+        for nombre in ('fecha_inicio', 'fecha_fin'):
+            valor = request.query_params.get(nombre)
+            if valor:
+                filtros[nombre] = parse_date(valor)
+                if filtros[nombre] is None:
+                    return None, Response(
+                        {'error': f'{nombre} debe tener formato AAAA-MM-DD'}, status=status.HTTP_400_BAD_REQUEST
+                    )
+        return filtros, None
+
+    @action(detail=False, methods=['get'])
+    def archivados(self, request):
+        """
+        Movimientos retirados por archivar_movimientos (leídos de los archivos gzip)
+
+        Mismos filtros que el listado más fecha_inicio/fecha_fin; del más
+        reciente al más antiguo, hasta `limite` (máx. 1000).
+        """
+        filtros, error = self._filtros_archivo(request)
+        if error:
+            return error
+        try:
+            limite = min(int(request.query_params.get('limite', 100)), ArchivoMovimientosService.MAX_RESULTADOS)
+        except ValueError:
+            return Response({'error': 'limite debe ser un número entero'}, status=status.HTTP_400_BAD_REQUEST)
+
+        return Response(ArchivoMovimientosService.buscar(limite=max(limite, 1), **filtros))
+
+    @action(detail=False, methods=['get'])
+    def resumen(self, request):
+        """Totales mensuales por producto y tipo de los movimientos archivados"""
+        filtros, error = self._filtros_archivo(request)
+        if error:
+            return error
+
+        resumenes = ResumenMovimiento.objects.all()
+        if 'producto_id' in filtros:
+            resumenes = resumenes.filter(producto_id=filtros['producto_id'])
+        if filtros['tipo']:
+            resumenes = resumenes.filter(tipo=filtros['tipo'])
+        if filtros.get('fecha_inicio'):
+            resumenes = resumenes.filter(mes__gte=filtros['fecha_inicio'].replace(day=1))
+        if filtros.get('fecha_fin'):
+            resumenes = resumenes.filter(mes__lte=filtros['fecha_fin'])
+
+        page = self.paginate_queryset(resumenes)
+        serializer = ResumenMovimientoSerializer(page, many=True)
+        return self.get_paginated_response(serializer.data)
+
 
 # Dashboard y reportes removidos temporalmente
 # Se implementarán cuando se necesiten
@@ -312,10 +496,13 @@ class MovimientoInventarioViewSet(viewsets.ModelViewSet):
 # VIEWSETS PARA MOTOS Y SERVICIOS
 # ============================================================================
 
-class MotoViewSet(viewsets.ModelViewSet):
+class MotoViewSet(ETagMixin, CamposDinamicosMixin, viewsets.ModelViewSet):
     """ViewSet para gestión de motos"""
-    queryset = Moto.objects.all().select_related('id_cliente').prefetch_related('servicios')
+    queryset = Moto.objects.all().select_related('id_cliente')
+    tablas_etag = ('motos', 'cliente', 'servicio_motos')
     serializer_class = MotoSerializer
+    # servicios y total_servicios usan los servicios precargados
+    prefetch_por_campo = {'servicios': 'servicios', 'total_servicios': 'servicios'}
     filter_backends = [filters.SearchFilter, filters.OrderingFilter]
     search_fields = ['marca', 'modelo', 'placa', 'id_cliente__nombre']
     ordering_fields = ['marca', 'modelo', 'anio']
@@ -330,9 +517,10 @@ class MotoViewSet(viewsets.ModelViewSet):
         return queryset
 
 
-class ServicioMotoViewSet(viewsets.ModelViewSet):
+class ServicioMotoViewSet(ETagMixin, CamposDinamicosMixin, viewsets.ModelViewSet):
     """ViewSet para gestión de servicios de motos"""
     queryset = ServicioMoto.objects.all().select_related('id_moto')
+    tablas_etag = ('servicio_motos', 'motos')
     serializer_class = ServicioMotoSerializer
     filter_backends = [filters.SearchFilter, filters.OrderingFilter]
     search_fields = ['tipo_servicio', 'descripcion', 'id_moto__placa']
@@ -380,9 +568,10 @@ class ServicioMotoViewSet(viewsets.ModelViewSet):
 
 
 
-class ServicioViewSet(viewsets.ReadOnlyModelViewSet):
+class ServicioViewSet(ETagMixin, CamposDinamicosMixin, viewsets.ReadOnlyModelViewSet):
     """ViewSet para catálogo de servicios (solo lectura)"""
     queryset = Servicio.objects.all()
+    tablas_etag = ('servicios',)
     serializer_class = ServicioSerializer
     filter_backends = [filters.SearchFilter, filters.OrderingFilter]
     search_fields = ['nombre', 'tipo']
@@ -6,7 +6,7 @@ echo "Waiting for PostgreSQL..."
 python << END
 import time
 import sys
-import psycopg2
+import psycopg
 from urllib.parse import urlparse
 import os
 
@@ -17,8 +17,8 @@ if db_url:
     retry = 0
     while retry < max_retries:
         try:
-            conn = psycopg2.connect(
-                database=result.path[1:],
+            conn = psycopg.connect(
+                dbname=result.path[1:],
                 user=result.username,
                 password=result.password,
                 host=result.hostname,
@@ -27,7 +27,7 @@ if db_url:
             conn.close()
             print("PostgreSQL is ready!")
             sys.exit(0)
-        except psycopg2.OperationalError:
+        except psycopg.OperationalError:
             retry += 1
             time.sleep(1)
     print("Could not connect to PostgreSQL")
@@ -37,6 +37,10 @@ END
 echo "Running migrations..."
 python manage.py migrate --noinput
 
+echo "Creating upcoming partitions..."
+# Solo actúa sobre tablas ya particionadas (ver particionar_tablas)
+python manage.py particionar_tablas --solo-futuras
+
 echo "Creating superuser if not exists..."
 python manage.py shell << END
 from django.contrib.auth import get_user_model
@@ -48,11 +52,28 @@ else:
     print('Superuser already exists')
 END
 
-echo "Starting Gunicorn..."
-exec gunicorn inventrix.wsgi:application \
+echo "Preparing metrics directory..."
+# Métricas Prometheus compartidas entre los workers de Gunicorn
+export PROMETHEUS_MULTIPROC_DIR=${PROMETHEUS_MULTIPROC_DIR:-/tmp/prometheus_multiproc}
+rm -rf "$PROMETHEUS_MULTIPROC_DIR"
+mkdir -p "$PROMETHEUS_MULTIPROC_DIR"
+
+# SERVER_MODE=asgi sirve la aplicación con workers de Uvicorn (vistas async)
+if [ "${SERVER_MODE:-wsgi}" = "asgi" ]; then
+    echo "Starting Gunicorn (ASGI, Uvicorn workers)..."
+    APP="inventrix.asgi:application"
+    WORKER_ARGS="--worker-class uvicorn_worker.UvicornWorker"
+else
+    echo "Starting Gunicorn..."
+    APP="inventrix.wsgi:application"
+    WORKER_ARGS="--threads 2"
+fi
+
+exec gunicorn $APP \
+    --config gunicorn.conf.py \
+    $WORKER_ARGS \
     --bind 0.0.0.0:8000 \
     --workers 4 \
-    --threads 2 \
     --timeout 60 \
     --access-logfile - \
     --error-logfile - \
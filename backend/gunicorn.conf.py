@@ -0,0 +1,20 @@
+"""
+Hooks de Gunicorn para Inventrix
+
+Los parámetros de arranque (workers, threads, timeout) se definen en
+docker-entrypoint.sh; aquí solo van los hooks del ciclo de vida de los workers.
+"""
+import os
+
+
+def child_exit(server, worker):
+    """Limpia los archivos de métricas de un worker que terminó"""
+    if os.getenv('PROMETHEUS_MULTIPROC_DIR'):
+        from prometheus_client import multiprocess
+        multiprocess.mark_process_dead(worker.pid)
+
+
+def post_worker_init(worker):
+    """Inicia el thread que recibe las invalidaciones de cachés de los demás workers"""
+    from api.cache import escucha
+    escucha.iniciar()
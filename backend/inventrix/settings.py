@@ -54,6 +54,8 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'api.middleware.MetricsMiddleware',  # Métricas Prometheus (primero para medir toda la petición)
+    'api.middleware.ReplicaMiddleware',  # Lecturas de listados y reportes a la réplica
     'django.middleware.security.SecurityMiddleware',
     'corsheaders.middleware.CorsMiddleware',  # CORS debe estar antes de CommonMiddleware
     'django.contrib.sessions.middleware.SessionMiddleware',
@@ -109,6 +111,40 @@ else:
         }
     }
 
+# Réplica de solo lectura opcional para listados y reportes (ver api/db_router.py).
+# En tests se usa la misma base que 'default' (MIRROR).
+DB_REPLICA_URL = os.getenv('DB_REPLICA_URL')
+
+if DB_REPLICA_URL:
+    DATABASES['replica'] = dj_database_url.parse(DB_REPLICA_URL)
+    DATABASES['replica']['TEST'] = {'MIRROR': 'default'}
+
+DATABASE_ROUTERS = ['api.db_router.ReplicaRouter']
+
+# Segundos que un cliente lee de la primaria después de escribir (read-your-writes)
+DB_REPLICA_RYW_SECONDS = int(os.getenv('DB_REPLICA_RYW_SECONDS', '5'))
+
+# Pool de conexiones de psycopg 3 (Django >= 5.1), por proceso de Gunicorn.
+# Con pool, CONN_MAX_AGE debe ser 0: al terminar la petición la conexión
+# vuelve al pool en lugar de cerrarse. CONN_HEALTH_CHECKS hace que el pool
+# verifique cada conexión antes de entregarla.
+DB_POOL = os.getenv('DB_POOL', 'True') == 'True'
+
+if DB_POOL:
+    DB_POOL_OPTIONS = {
+        'min_size': int(os.getenv('DB_POOL_MIN_SIZE', '2')),
+        'max_size': int(os.getenv('DB_POOL_MAX_SIZE', '10')),
+        # Segundos máximos esperando una conexión libre antes de fallar
+        'timeout': float(os.getenv('DB_POOL_TIMEOUT', '10')),
+        # Segundos que una conexión puede quedar ociosa (por encima de min_size)
+        'max_idle': float(os.getenv('DB_POOL_MAX_IDLE', '300')),
+        'max_lifetime': float(os.getenv('DB_POOL_MAX_LIFETIME', '3600')),
+    }
+    for base in DATABASES.values():
+        base['CONN_MAX_AGE'] = 0
+        base['CONN_HEALTH_CHECKS'] = True
+        base.setdefault('OPTIONS', {})['pool'] = dict(DB_POOL_OPTIONS)
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
@@ -163,11 +199,12 @@ REST_FRAMEWORK = {
         'rest_framework.filters.SearchFilter',
         'rest_framework.filters.OrderingFilter',
     ],
+    # JSON con orjson (ver api/renderers.py); misma salida que JSONRenderer/JSONParser
     'DEFAULT_RENDERER_CLASSES': [
-        'rest_framework.renderers.JSONRenderer',
+        'api.renderers.ORJSONRenderer',
     ],
     'DEFAULT_PARSER_CLASSES': [
-        'rest_framework.parsers.JSONParser',
+        'api.renderers.ORJSONParser',
         'rest_framework.parsers.FormParser',
         'rest_framework.parsers.MultiPartParser',
     ],
@@ -202,8 +239,12 @@ CORS_ALLOW_HEADERS = [
     'user-agent',
     'x-csrftoken',
     'x-requested-with',
+    'x-leer-primaria',
 ]
 
+# Headers de respuesta legibles desde el frontend
+CORS_EXPOSE_HEADERS = ['x-leer-primaria-segundos']
+
 # Logging Configuration
 LOGGING = {
     'version': 1,
@@ -277,5 +318,27 @@ LOGS_DIR = BASE_DIR / 'logs'
 if not LOGS_DIR.exists():
     LOGS_DIR.mkdir(parents=True, exist_ok=True)
 
+# Reportes en segundo plano: segundos durante los que se reutiliza un resultado idéntico
+REPORT_JOB_RESULT_TTL = int(os.getenv('REPORT_JOB_RESULT_TTL', '900'))
+
+# Caché de resultados de reportes (tabla reportes_resultados, ver ReporteCompartidoService):
+# segundos de validez de rangos que terminan antes de hoy y de los que incluyen hoy
+REPORT_CACHE_TTL_HISTORICO = int(os.getenv('REPORT_CACHE_TTL_HISTORICO', '86400'))
+REPORT_CACHE_TTL_RECIENTE = int(os.getenv('REPORT_CACHE_TTL_RECIENTE', '60'))
+# Renovación anticipada probabilística (XFetch): >1 renueva antes, <1 más cerca del vencimiento
+REPORT_CACHE_XFETCH_BETA = float(os.getenv('REPORT_CACHE_XFETCH_BETA', '1.0'))
+
+# Caché por worker de la búsqueda exacta por SKU (GET /api/productos/sku/{sku}/);
+# las invalidaciones llegan a todos los workers por LISTEN/NOTIFY (api/cache.py)
+SKU_CACHE_MAX_ENTRIES = int(os.getenv('SKU_CACHE_MAX_ENTRIES', '5000'))
+SKU_CACHE_TTL = int(os.getenv('SKU_CACHE_TTL', '60'))
+
+# Acceso a /api/metrics/: token Bearer y/o IPs o redes CIDR permitidas (REMOTE_ADDR)
+METRICS_TOKEN = os.getenv('METRICS_TOKEN', '')
+METRICS_ALLOWED_IPS = os.getenv('METRICS_ALLOWED_IPS', '127.0.0.1,::1').split(',')
+
+# Archivos gzip NDJSON con los movimientos de inventario archivados (archivar_movimientos)
+MOVIMIENTOS_ARCHIVO_DIR = Path(os.getenv('MOVIMIENTOS_ARCHIVO_DIR', BASE_DIR / 'archivo' / 'movimientos'))
+
 # Custom Exception Handler para DRF
 REST_FRAMEWORK['EXCEPTION_HANDLER'] = 'api.exception_handler.custom_exception_handler'
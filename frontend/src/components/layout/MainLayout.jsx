@@ -3,11 +3,15 @@ import Navbar from './Navbar'
 import BottomNav from './BottomNav'
 import { ToastContainer } from '../ui/Toast'
 import useToastStore from '../../hooks/useToast'
+import { useEventos } from '../../hooks/useEventos'
 
 const MainLayout = () => {
   const toasts = useToastStore((state) => state.toasts)
   const removeToast = useToastStore((state) => state.removeToast)
 
+  // Actualizaciones en tiempo real para todas las páginas
+  useEventos()
+
   return (
     <div className="min-h-screen bg-gray-50 dark:bg-gray-900 transition-colors duration-200">
       {/* Navbar */}
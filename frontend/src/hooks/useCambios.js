@@ -0,0 +1,30 @@
+import { useQuery, useQueryClient } from '@tanstack/react-query'
+import { cambiosService } from '../services/cambios.service'
+import { eventosConectados } from './useEventos'
+
+// Cursor de cambios por recurso, compartido por todos los componentes
+const cursores = {}
+
+// Consulta periódicamente los cambios de un recurso (GET /<recurso>/cambios/?since=)
+// y solo si hubo cambios invalida sus queries para que se recarguen.
+// Con el stream de eventos conectado no hay polling: se consulta al llegar un evento.
+export const useCambios = (recurso, campoId, intervalo = 15000) => {
+  const queryClient = useQueryClient()
+
+  return useQuery({
+    queryKey: ['cambios', recurso],
+    queryFn: async () => {
+      const since = cursores[recurso]
+      const response = await cambiosService.get(recurso, since, campoId)
+      const { cursor, modificados = [], eliminados = [] } = response.data
+      cursores[recurso] = cursor
+
+      if (since && (modificados.length > 0 || eliminados.length > 0)) {
+        queryClient.invalidateQueries({ queryKey: [recurso] })
+      }
+      return cursor
+    },
+    refetchInterval: () => (eventosConectados() ? false : intervalo),
+    staleTime: 0,
+  })
+}
@@ -1,7 +1,10 @@
 import { useQuery, useMutation, useQueryClient } from '@tanstack/react-query'
+import { useCambios } from './useCambios'
 import { clientesService } from '../services/clientes.service'
 
 export const useClientes = (params = {}) => {
+  useCambios('clientes', 'id_cliente')
+
   return useQuery({
     queryKey: ['clientes', params],
     queryFn: async () => {
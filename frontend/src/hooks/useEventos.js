@@ -0,0 +1,49 @@
+import { useEffect } from 'react'
+import { useQueryClient } from '@tanstack/react-query'
+import api from '../services/api'
+
+// Estado de la conexión SSE, compartido con useCambios para pausar el polling
+let conectado = false
+export const eventosConectados = () => conectado
+
+// Stream de eventos del backend (GET /eventos/, requiere el backend en ASGI).
+// Un evento 'cambio' hace que useCambios pida los cambios del recurso al momento;
+// 'resync' indica que se pudieron perder eventos y recarga todo.
+// Si el backend no lo soporta (503) el EventSource se cierra y sigue el polling.
+export const useEventos = () => {
+  const queryClient = useQueryClient()
+
+  useEffect(() => {
+    if (typeof EventSource === 'undefined') return undefined
+
+    const fuente = new EventSource(`${api.defaults.baseURL}/eventos/?tipos=cambio`)
+
+    // Al conectar o desconectar se piden los cambios pendientes; eso además
+    // vuelve a evaluar el refetchInterval de useCambios (pausa o reanuda el polling)
+    const pedirCambios = () => queryClient.invalidateQueries({ queryKey: ['cambios'] })
+
+    fuente.onopen = () => {
+      conectado = true
+      pedirCambios()
+    }
+    fuente.onerror = () => {
+      // EventSource reintenta solo; mientras tanto vuelve el polling
+      if (conectado) {
+        conectado = false
+        pedirCambios()
+      }
+    }
+    fuente.addEventListener('cambio', (evento) => {
+      const { recurso } = JSON.parse(evento.data)
+      queryClient.invalidateQueries({ queryKey: ['cambios', recurso] })
+    })
+    fuente.addEventListener('resync', () => {
+      queryClient.invalidateQueries()
+    })
+
+    return () => {
+      fuente.close()
+      conectado = false
+    }
+  }, [queryClient])
+}
@@ -1,7 +1,10 @@
 import { useQuery, useMutation, useQueryClient } from '@tanstack/react-query'
+import { useCambios } from './useCambios'
 import { ordenesVentaService } from '../services/ordenes.service'
 
 export const useOrdenesVenta = (params = {}) => {
+  useCambios('ordenes-venta', 'id_venta')
+
   return useQuery({
     queryKey: ['ordenes-venta', params],
     queryFn: () => ordenesVentaService.getAll(params).then(res => res.data),
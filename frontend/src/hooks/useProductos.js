@@ -1,7 +1,10 @@
 import { useQuery, useMutation, useQueryClient } from '@tanstack/react-query'
+import { useCambios } from './useCambios'
 import { productosService } from '../services/productos.service'
 
 export const useProductos = (params = {}) => {
+  useCambios('productos', 'id_producto')
+
   return useQuery({
     queryKey: ['productos', params],
     queryFn: async () => {
@@ -65,6 +68,19 @@ export const useDeleteProducto = () => {
   })
 }
 
+export const useAjustarPrecios = () => {
+  const queryClient = useQueryClient()
+
+  return useMutation({
+    mutationFn: (data) => productosService.ajustarPrecios(data).then(res => res.data),
+    onSuccess: (resultado) => {
+      if (!resultado.simulado) {
+        queryClient.invalidateQueries({ queryKey: ['productos'] })
+      }
+    },
+  })
+}
+
 export const useProductoMovimientos = (id) => {
   return useQuery({
     queryKey: ['productos', id, 'movimientos'],
@@ -9,10 +9,17 @@ const api = axios.create({
   timeout: 30000, // 30 segundos timeout
 })
 
+// Read-your-writes: después de una escritura el backend indica por cuántos
+// segundos las lecturas deben ir a la base primaria y no a la réplica
+let leerPrimariaHasta = 0
+
 // Request interceptor
 api.interceptors.request.use(
   (config) => {
     // You can add auth tokens here if needed in the future
+    if (Date.now() < leerPrimariaHasta) {
+      config.headers['X-Leer-Primaria'] = '1'
+    }
     return config
   },
   (error) => {
@@ -23,6 +30,10 @@ api.interceptors.request.use(
 // Response interceptor
 api.interceptors.response.use(
   (response) => {
+    const segundos = Number(response.headers['x-leer-primaria-segundos'])
+    if (segundos > 0) {
+      leerPrimariaHasta = Date.now() + segundos * 1000
+    }
     return response
   },
   (error) => {
@@ -0,0 +1,10 @@
+import api from './api'
+
+export const cambiosService = {
+  // Sin cursor retorna el cursor actual; con cursor, los cambios posteriores.
+  // Solo se pide el id de los modificados: se usan para invalidar caché.
+  get: (recurso, since, campoId) => {
+    const params = since ? { since, fields: campoId } : {}
+    return api.get(`/${recurso}/cambios/`, { params })
+  },
+}
@@ -31,6 +31,11 @@ export const productosService = {
     return api.delete(`/productos/${id}/`)
   },
 
+  // Búsqueda exacta por SKU (lector de código de barras); 404 si no existe
+  getBySku: (sku) => {
+    return api.get(`/productos/sku/${encodeURIComponent(sku)}/`)
+  },
+
   // Get productos with low stock
   getStockBajo: () => {
     return api.get('/productos/stock-bajo/')
@@ -40,4 +45,9 @@ export const productosService = {
   getMovimientos: (id) => {
     return api.get(`/productos/${id}/movimientos/`)
   },
+
+  // Ajuste masivo de precios (con simular: true solo retorna la vista previa)
+  ajustarPrecios: (data) => {
+    return api.post('/productos/ajustar_precios/', data)
+  },
 }
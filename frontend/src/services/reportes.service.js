@@ -28,9 +28,15 @@ export const getProductosMasVendidos = async (params) => {
   return response.data
 }
 
+// URL de exportación generada en el servidor (formato: 'csv' | 'xlsx')
+export const getUrlExportacion = (tipo, formato = 'xlsx', params = {}) => {
+  return api.getUri({ url: `/reportes/${tipo}/exportar/`, params: { ...params, formato } })
+}
+
 export default {
   getReporteInventario,
   getReporteVentas,
   getReporteCompras,
   getProductosMasVendidos,
+  getUrlExportacion,
 }
@@ -1,6 +1,7 @@
 import { jsPDF } from 'jspdf'
 import autoTable from 'jspdf-autotable'
 import * as XLSX from 'xlsx'
+import { getUrlExportacion } from '../services/reportes.service'
 
 /**
  * Utilidades para exportar reportes a diferentes formatos
@@ -191,98 +192,36 @@ export const exportarProductosPDF = (productos, filtros) => {
 }
 
 /**
- * Exportar reporte de inventario a Excel
+ * Descargar un reporte generado en el servidor.
+ * El navegador guarda el archivo en streaming, sin cargar las filas en memoria.
  */
-export const exportarInventarioCSV = (reporte) => {
-  const data = reporte.productos?.map((p) => ({
-    Código: p.codigo,
-    Producto: p.nombre,
-    Stock: p.stock_actual,
-    'Stock Mínimo': p.stock_minimo,
-    'Precio Venta': formatCurrency(p.precio_venta),
-    'Valor Stock': formatCurrency(p.valor_stock),
-  }))
-
-  // Crear libro de trabajo
-  const ws = XLSX.utils.json_to_sheet(data)
-  const wb = XLSX.utils.book_new()
-  XLSX.utils.book_append_sheet(wb, ws, 'Inventario')
-
-  // Ajustar ancho de columnas
-  const colWidths = [
-    { wch: 12 }, // Código
-    { wch: 30 }, // Producto
-    { wch: 10 }, // Stock
-    { wch: 15 }, // Stock Mínimo
-    { wch: 15 }, // Precio Venta
-    { wch: 15 }, // Valor Stock
-  ]
-  ws['!cols'] = colWidths
+const descargarDesdeServidor = (tipo, params) => {
+  const link = document.createElement('a')
+  link.href = getUrlExportacion(tipo, 'xlsx', params)
+  document.body.appendChild(link)
+  link.click()
+  document.body.removeChild(link)
+}
 
-  // Descargar archivo
-  XLSX.writeFile(wb, `reporte-inventario-${Date.now()}.xlsx`)
+/**
+ * Exportar reporte de inventario a Excel
+ */
+export const exportarInventarioCSV = () => {
+  descargarDesdeServidor('inventario')
 }
 
 /**
  * Exportar reporte de ventas a Excel
  */
-export const exportarVentasCSV = (reporte) => {
-  const data = reporte.ordenes?.map((o) => ({
-    Orden: o.numero_orden,
-    Cliente: o.cliente,
-    Fecha: o.fecha,
-    Total: formatCurrency(o.total),
-    Estado: o.estado,
-  }))
-
-  // Crear libro de trabajo
-  const ws = XLSX.utils.json_to_sheet(data)
-  const wb = XLSX.utils.book_new()
-  XLSX.utils.book_append_sheet(wb, ws, 'Ventas')
-
-  // Ajustar ancho de columnas
-  const colWidths = [
-    { wch: 15 }, // Orden
-    { wch: 30 }, // Cliente
-    { wch: 12 }, // Fecha
-    { wch: 15 }, // Total
-    { wch: 12 }, // Estado
-  ]
-  ws['!cols'] = colWidths
-
-  // Descargar archivo
-  XLSX.writeFile(wb, `reporte-ventas-${Date.now()}.xlsx`)
+export const exportarVentasCSV = (filtros) => {
+  descargarDesdeServidor('ventas', filtros)
 }
 
 /**
  * Exportar reporte de compras a Excel
  */
-export const exportarComprasCSV = (reporte) => {
-  const data = reporte.ordenes?.map((o) => ({
-    Orden: o.numero_orden,
-    Proveedor: o.proveedor,
-    Fecha: o.fecha,
-    Total: formatCurrency(o.total),
-    Estado: o.estado,
-  }))
-
-  // Crear libro de trabajo
-  const ws = XLSX.utils.json_to_sheet(data)
-  const wb = XLSX.utils.book_new()
-  XLSX.utils.book_append_sheet(wb, ws, 'Compras')
-
-  // Ajustar ancho de columnas
-  const colWidths = [
-    { wch: 15 }, // Orden
-    { wch: 30 }, // Proveedor
-    { wch: 12 }, // Fecha
-    { wch: 15 }, // Total
-    { wch: 12 }, // Estado
-  ]
-  ws['!cols'] = colWidths
-
-  // Descargar archivo
-  XLSX.writeFile(wb, `reporte-compras-${Date.now()}.xlsx`)
+export const exportarComprasCSV = (filtros) => {
+  descargarDesdeServidor('compras', filtros)
 }
 
 /**